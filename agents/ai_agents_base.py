@@ -2,16 +2,107 @@
 
 # agents/ai_agents_base.py
 
-from turtle import distance
 from typing import List
+import faiss
 import numpy as np
 from llm.local_llm import LocalLLM
+from .metrics import FAISS_FIELD_LATENCY, stage_timer
 
 
 class AIBaseAgent:
-    def __init__(self, faiss_indexes: dict, llm: LocalLLM):
+    def __init__(self, faiss_indexes: dict, llm: LocalLLM, scheme_ids: list | None = None):
         self.faiss_indexes = faiss_indexes
         self.llm = llm
+        self._build_ordinal_space(scheme_ids)
+        self._apply_search_params()
+
+    def _build_ordinal_space(self, scheme_ids: list | None = None):
+        """
+        Give every scheme id found in the field indexes a dense integer
+        ordinal and map each field's FAISS row ids onto it, so scores from
+        different fields can be fused with plain array arithmetic.
+
+        `scheme_ids` seeds the ordinal order (e.g. SchemeCatalog.scheme_ids)
+        so the agent and the catalog share one ordinal space.
+        """
+        self.scheme_ids = list(scheme_ids or [])
+        self.scheme_ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self.scheme_ids)}
+        self.field_ordinals = {}
+
+        for field, data in self.faiss_indexes.items():
+            ids = data["ids"]
+            if isinstance(ids, np.ndarray):
+                # Native index sidecar (see agents/faiss_store.py)
+                ids = ids.tolist()
+
+            row_ordinals = np.empty(len(ids), dtype="int64")
+            for row, doc_id in enumerate(ids):
+                ordinal = self.scheme_ordinals.get(doc_id)
+                if ordinal is None:
+                    ordinal = len(self.scheme_ids)
+                    self.scheme_ordinals[doc_id] = ordinal
+                    self.scheme_ids.append(doc_id)
+                row_ordinals[row] = ordinal
+            self.field_ordinals[field] = row_ordinals
+
+    def _extend_ordinal_space(self, scheme_ids: list):
+        """
+        Append ordinals for schemes added after startup. `scheme_ids` is the
+        seeding ordinal order (SchemeCatalog.scheme_ids), which only grows.
+        """
+        for doc_id in scheme_ids[len(self.scheme_ids):]:
+            self.scheme_ordinals[doc_id] = len(self.scheme_ids)
+            self.scheme_ids.append(doc_id)
+
+    def _apply_search_params(self):
+        """
+        Apply the query-time settings recorded when each index was built
+        (nprobe for IVF, efSearch for HNSW; see others/build_faiss.py).
+        """
+        self.field_search_params = {}
+        parameter_space = faiss.ParameterSpace()
+
+        for field, data in self.faiss_indexes.items():
+            meta = data.get("meta") or {}
+            params = {k: int(meta[k]) for k in ("nprobe", "efSearch") if meta.get(k) is not None}
+            for name, value in params.items():
+                parameter_space.set_index_parameter(data["index"], name, value)
+            self.field_search_params[field] = params
+
+    def ordinal_mask(self, allowed) -> np.ndarray:
+        """
+        Normalize an allow-list into a boolean mask over scheme ordinals.
+        Accepts a boolean mask or an iterable of ordinals.
+        """
+        allowed = np.asarray(allowed if isinstance(allowed, np.ndarray) else list(allowed))
+        if allowed.dtype == bool:
+            return allowed
+
+        mask = np.zeros(len(self.scheme_ids), dtype=bool)
+        mask[allowed.astype("int64")] = True
+        return mask
+
+    def _search_parameters(self, field: str, allowed_mask: np.ndarray):
+        """
+        Build FAISS SearchParameters restricting a field search to the allowed
+        ordinals, so filtered-out vectors are never scored. Returns
+        (params, bitmap); the bitmap must outlive the search call.
+        """
+        index = self.faiss_indexes[field]["index"]
+        row_mask = allowed_mask[self.field_ordinals[field]]
+        bitmap = np.packbits(row_mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(row_mask), faiss.swig_ptr(bitmap))
+
+        # Filtered searches bypass the index-level settings, so pass them again
+        search_params = self.field_search_params.get(field, {})
+        if isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=search_params.get("nprobe", index.nprobe))
+        elif isinstance(index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=search_params.get("efSearch", index.hnsw.efSearch))
+        else:
+            params = faiss.SearchParameters(sel=selector)
+
+        return params, bitmap
 
     def retrieve_similar_docs_with_scores(
     self,
@@ -19,6 +110,7 @@ class AIBaseAgent:
     field: str,
     top_k: int = 5,
     oversample_factor: int = 10,
+    allowed_ordinals=None,
 ) -> tuple[list, list]:
 
         if field not in self.faiss_indexes:
@@ -33,7 +125,12 @@ class AIBaseAgent:
         # Oversample because callers may apply additional reranking/filtering.
         search_k = max(top_k * max(oversample_factor, 1), top_k)
 
-        distances, indices = index.search(query_vector, search_k)
+        with FAISS_FIELD_LATENCY.time(field=field):
+            if allowed_ordinals is not None:
+                params, bitmap = self._search_parameters(field, self.ordinal_mask(allowed_ordinals))
+                distances, indices = index.search(query_vector, search_k, params=params)
+            else:
+                distances, indices = index.search(query_vector, search_k)
 
     
        
@@ -60,15 +157,68 @@ class AIBaseAgent:
 
         return doc_ids, scores
 
-    def generate_answer(self, prompt: str, max_tokens: int = 512) -> str:
-        return self.llm.generate(prompt, max_tokens=max_tokens)
+    def retrieve_multi_field_scores(
+        self,
+        query_matrix: np.ndarray,
+        fields: List[str],
+        top_k,
+        oversample_factor: int = 1,
+        allowed_ordinals=None,
+    ) -> dict:
+        """
+        Search several field indexes with a stacked query matrix, one FAISS
+        call per field for all query rows.
+
+        `top_k` is either one depth for every row or a per-row sequence.
+        Returns {field: scores} where scores has shape (n_rows, n_schemes)
+        and is indexed by scheme ordinal (see `scheme_ids`); schemes not
+        retrieved for a row score 0.0.
 
+        `allowed_ordinals` (boolean mask or ordinals) restricts every field
+        search to those schemes through a FAISS IDSelector.
+        """
+        query_matrix = np.ascontiguousarray(np.atleast_2d(query_matrix), dtype="float32")
+        n_rows = query_matrix.shape[0]
+        row_k = np.broadcast_to(np.asarray(top_k, dtype="int64"), (n_rows,))
+        allowed_mask = None if allowed_ordinals is None else self.ordinal_mask(allowed_ordinals)
+
+        field_scores = {}
+        for field in fields:
+            if field not in self.faiss_indexes:
+                raise ValueError(f"FAISS index for '{field}' not found")
+
+            index = self.faiss_indexes[field]["index"]
+            row_ordinals = self.field_ordinals[field]
+            scores = np.zeros((n_rows, len(self.scheme_ids)), dtype="float64")
+
+            search_k = min(int(row_k.max()) * max(oversample_factor, 1), index.ntotal)
+            if search_k > 0:
+                with FAISS_FIELD_LATENCY.time(field=field):
+                    if allowed_mask is not None:
+                        params, bitmap = self._search_parameters(field, allowed_mask)
+                        distances, indices = index.search(query_matrix, search_k, params=params)
+                    else:
+                        distances, indices = index.search(query_matrix, search_k)
+
+                valid = (indices >= 0) & (indices < len(row_ordinals))
+                # Each row keeps only its own first top_k valid hits
+                keep = valid & (np.cumsum(valid, axis=1) <= row_k[:, None])
+                rows, cols = np.nonzero(keep)
+
+                # Convert L2 distance → bounded similarity (0–1)
+                similarity = 1 / (1 + distances[rows, cols].astype("float64"))
+                scores[rows, row_ordinals[indices[rows, cols]]] = similarity
+
+            field_scores[field] = scores
+
+        return field_scores
 
     def generate_answer(self, prompt: str, max_tokens: int = 512) -> str:
         """
         Generate a response from the LLM given a prompt.
         """
-        return self.llm.generate(prompt, max_tokens=max_tokens)
+        with stage_timer("llm_generation"):
+            return self.llm.generate(prompt, max_tokens=max_tokens)
 
     def answer_query(self, query_vector: np.ndarray, field: str, top_k: int = 5) -> str:
         """
@@ -0,0 +1,141 @@
+# agents/bm25_index.py
+
+import os
+import time
+import numpy as np
+from .faiss_store import file_version
+from .scheme_features import TOKEN_PATTERN, normalize_text
+
+# Scheme fields searched by the lexical fallback and occupation candidates
+BM25_FIELDS = ("scheme_name", "description", "eligibility_text", "occupation", "category")
+
+BM25_FILE = "bm25_index.npz"
+
+
+def analyze(text: str) -> list:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over the scheme text fields, stored as
+    CSR posting lists (term -> row, term frequency). Per-posting BM25
+    weights are precomputed on load, so a query is a gather and a sum.
+    """
+
+    def __init__(self, scheme_ids, terms, indptr, postings, term_freqs, doc_lengths, k1=1.2, b=0.75):
+        self.scheme_ids = [str(s) for s in scheme_ids]
+        self.ordinals = {scheme_id: row for row, scheme_id in enumerate(self.scheme_ids)}
+        self.terms = {str(term): i for i, term in enumerate(terms)}
+        self.indptr = np.asarray(indptr, dtype="int64")
+        self.postings = np.asarray(postings, dtype="int32")
+        self.term_freqs = np.asarray(term_freqs, dtype="uint16")
+        self.doc_lengths = np.asarray(doc_lengths, dtype="int32")
+        self.k1 = k1
+        self.b = b
+        self.version = None
+
+        n_docs = len(self.scheme_ids)
+        doc_freqs = np.diff(self.indptr)
+        self.idf = np.log(1 + (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+        avg_length = float(self.doc_lengths.mean()) if n_docs else 0.0
+        length_norm = k1 * (1 - b + b * self.doc_lengths / max(avg_length, 1e-9))
+        tf = self.term_freqs.astype("float32")
+        posting_terms = np.repeat(np.arange(len(self.terms)), doc_freqs)
+        self.weights = (
+            self.idf[posting_terms] * tf * (k1 + 1) / (tf + length_norm[self.postings])
+        ).astype("float32")
+
+    @classmethod
+    def build(cls, schemes, fields=BM25_FIELDS, k1=1.2, b=0.75) -> "BM25Index":
+        scheme_ids = []
+        doc_lengths = []
+        term_rows = {}
+
+        for scheme in schemes:
+            if scheme is None:
+                continue
+            row = len(scheme_ids)
+            scheme_ids.append(scheme.get("_id"))
+
+            tokens = []
+            for field in fields:
+                tokens.extend(analyze(normalize_text(scheme.get(field))))
+            doc_lengths.append(len(tokens))
+
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_rows.setdefault(token, []).append((row, count))
+
+        terms = sorted(term_rows)
+        indptr = np.zeros(len(terms) + 1, dtype="int64")
+        np.cumsum([len(term_rows[t]) for t in terms], out=indptr[1:])
+        postings = np.fromiter((row for t in terms for row, _ in term_rows[t]), dtype="int32", count=int(indptr[-1]))
+        term_freqs = np.fromiter(
+            (min(count, 65535) for t in terms for _, count in term_rows[t]), dtype="uint16", count=int(indptr[-1])
+        )
+
+        return cls(scheme_ids, terms, indptr, postings, term_freqs, doc_lengths, k1=k1, b=b)
+
+    def __len__(self):
+        return len(self.scheme_ids)
+
+    def score(self, tokens) -> np.ndarray:
+        """BM25 score of every indexed scheme (row order) for a bag of query tokens."""
+        scores = np.zeros(len(self.scheme_ids), dtype="float32")
+        for token in set(tokens):
+            term = self.terms.get(token)
+            if term is None:
+                continue
+            start, end = self.indptr[term], self.indptr[term + 1]
+            scores[self.postings[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, tokens, limit: int | None = None) -> list:
+        """[(scheme_id, score)] for schemes matching any token, best first."""
+        scores = self.score(tokens)
+        matched = np.flatnonzero(scores)
+        if limit is not None and len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+            matched.sort()
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.scheme_ids[row], float(scores[row])) for row in order]
+
+    def save(self, index_dir: str):
+        np.savez_compressed(
+            os.path.join(index_dir, BM25_FILE),
+            scheme_ids=np.asarray(self.scheme_ids),
+            terms=np.asarray(sorted(self.terms, key=self.terms.get)),
+            indptr=self.indptr,
+            postings=self.postings,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+            params=np.asarray([self.k1, self.b]),
+        )
+
+    @classmethod
+    def load(cls, index_dir: str):
+        """Load a saved index, or None if the directory has none."""
+        path = os.path.join(index_dir, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+
+        start = time.time()
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            index = cls(
+                data["scheme_ids"].tolist(),
+                data["terms"].tolist(),
+                data["indptr"],
+                data["postings"],
+                data["term_freqs"],
+                data["doc_lengths"],
+                k1=k1,
+                b=b,
+            )
+        index.version = file_version(path)
+        print(f"🔎 BM25 index loaded: {len(index)} schemes, {len(index.terms)} terms in {round((time.time() - start) * 1000, 1)}ms")
+        return index
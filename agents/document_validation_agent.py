@@ -1,6 +1,8 @@
 # agents/document_validation_agent.py
 
 from .ai_agents_base import AIBaseAgent
+from .tracing import traced
+from .metrics import OCR_FAILURES, timed_stage
 import json
 import re
 import os
@@ -100,6 +102,7 @@ class DocumentValidationAgent(AIBaseAgent):
     # --------------------------------------------------
     # 🔹 Public API
     # --------------------------------------------------
+    @traced("document_validation.get_required_documents")
     def get_required_documents(self, scheme_id: str, raw_documents_text: str = "") -> dict:
         """
         Returns structured required documents for UI.
@@ -107,6 +110,7 @@ class DocumentValidationAgent(AIBaseAgent):
         scheme_rules = self.extract_required_documents(scheme_id, raw_documents_text)
         return scheme_rules.get("required_documents", {})
 
+    @traced("document_validation.validate_single_document")
     def validate_single_document(self, scheme_id: str, document_type: str, document_payload: dict) -> dict:
 
         required_docs = self.doc_rules.get(scheme_id, {}).get("required_documents", {})
@@ -256,6 +260,7 @@ class DocumentValidationAgent(AIBaseAgent):
 
         return "PASS", None, str(value), [document_type], 1.0
 
+    @timed_stage("ocr")
     def _extract_text_from_image(self, file_path: str) -> str:
         """Extract text from image using OCR (Tesseract)"""
         try:
@@ -285,6 +290,7 @@ class DocumentValidationAgent(AIBaseAgent):
             return text
             
         except Exception as e:
+            OCR_FAILURES.inc()
             raise Exception(f"OCR extraction failed: {str(e)}")
 
     def _validate_document_content(self, document_type: str, extracted_text: str) -> bool:
@@ -1,7 +1,13 @@
 # agents/eligibility_agent.py
 
 import os
+import threading
+import numpy as np
 from .ai_agents_base import AIBaseAgent
+from .eligibility_engine import EligibilityEngine, normalize_user
+from .eligibility_rules import NO_RULES, compile_all, compile_rules
+from .tracing import FULL, current_span, traced, verbose
+from .metrics import timed_stage
 from pymongo import MongoClient
 import json
 import re
@@ -12,9 +18,12 @@ class EligibilityAgent(AIBaseAgent):
     Agent 2: Deterministic eligibility validation + explainable matrix
     """
 
-    def __init__(self, faiss_indexes=None, llm=None, precomputed_rules_file="precomputed_rules_new.json"):
+    def __init__(self, faiss_indexes=None, llm=None, precomputed_rules_file="precomputed_rules_new.json", catalog=None):
         super().__init__(faiss_indexes or {}, llm)
 
+        # Optional in-memory SchemeCatalog; Mongo is used when absent
+        self.catalog = catalog
+
         client = MongoClient("mongodb://localhost:27017/")
         self.db = client["policy_db"]
         self.collection = self.db["schemes"]
@@ -32,26 +41,39 @@ class EligibilityAgent(AIBaseAgent):
             print("Precomputed rules file not found. Falling back to LLM extraction.")
             self.precomputed_rules = {}
 
+        # Every scheme's rules compiled once into predicates
+        self.compiled_rules = compile_all(self.precomputed_rules)
+
+        # Columnar engine over every scheme, built on first use
+        self._engine = None
+        self._engine_version = None
+        self._engine_lock = threading.Lock()
+
     # --------------------------------------------------
     # Main public API
     # --------------------------------------------------
-    def validate_user_for_schemes(self, user_profile: dict, schemes: list):
+    @traced("eligibility.validate_user_for_schemes")
+    @timed_stage("eligibility")
+    def validate_user_for_schemes(self, user_profile: dict, schemes: list, scheme_context=None):
+        """
+        Eligible / rejected split of retrieved schemes. With the request's
+        SchemeContext the documents the retriever loaded are reused.
+        """
         eligible = []
         rejected = []
 
-        user = {
-            "age": user_profile.get("age"),
-            "gender": user_profile.get("gender", "").lower(),
-            "state": user_profile.get("state", "").lower(),
-            "occupation": user_profile.get("occupation", "").lower(),
-            "monthly_income": user_profile.get("monthly_income")
-        }
+        user = normalize_user(user_profile)
 
         scheme_ids = [s["scheme_id"] for s in schemes]
-        all_schemes_data = {
-            s["_id"]: s
-            for s in self.collection.find({"_id": {"$in": scheme_ids}})
-        }
+        if scheme_context is not None:
+            all_schemes_data = {str(s["_id"]): s for s in scheme_context.get_many(scheme_ids)}
+        elif self.catalog is not None:
+            all_schemes_data = {s["_id"]: s for s in self.catalog.get_many(scheme_ids)}
+        else:
+            all_schemes_data = {
+                s["_id"]: s
+                for s in self.collection.find({"_id": {"$in": scheme_ids}})
+            }
 
         for scheme in schemes:
             scheme_id = scheme["scheme_id"]
@@ -70,7 +92,7 @@ class EligibilityAgent(AIBaseAgent):
             rules = self.precomputed_rules.get(scheme_id, {})
             if not rules:
                 print(f"No rules found for {scheme_id}, skipping eligibility checks")
-            matrix = self.build_eligibility_matrix(user, rules)
+            matrix = self.compiled_rules.get(scheme_id, NO_RULES).matrix(user)
 
             failed = [
                 f"{k}: {v['reason']}"
@@ -78,16 +100,17 @@ class EligibilityAgent(AIBaseAgent):
                 if v["status"] == "FAIL"
             ]
 
-            # Print eligibility matrix for this scheme
-            print(f"\n{'='*80}")
-            print(f"📋 ELIGIBILITY MATRIX FOR: {scheme_data.get('scheme_name')}")
-            print(f"   Scheme ID: {scheme_id}")
-            print(f"{'='*80}")
-            for criterion, result in matrix.items():
-                status_icon = "✅" if result["status"] == "PASS" else "❌"
-                print(f"{status_icon} {criterion}: {result['status']}")
-                print(f"   Reason: {result['reason']}")
-            print(f"{'='*80}\n")
+            # Print eligibility matrix for this scheme (full trace verbosity only)
+            if verbose(FULL):
+                print(f"\n{'='*80}")
+                print(f"📋 ELIGIBILITY MATRIX FOR: {scheme_data.get('scheme_name')}")
+                print(f"   Scheme ID: {scheme_id}")
+                print(f"{'='*80}")
+                for criterion, result in matrix.items():
+                    status_icon = "✅" if result["status"] == "PASS" else "❌"
+                    print(f"{status_icon} {criterion}: {result['status']}")
+                    print(f"   Reason: {result['reason']}")
+                print(f"{'='*80}\n")
 
             if not failed:
                 eligible.append({
@@ -108,122 +131,75 @@ class EligibilityAgent(AIBaseAgent):
                     "reason": "; ".join(failed)
                 })
 
+        current_span().set(schemes=len(schemes), eligible=len(eligible), rejected=len(rejected))
         return eligible, rejected
 
     # --------------------------------------------------
-    # Eligibility matrix (single source of truth)
+    # Every eligible scheme (no retrieval)
     # --------------------------------------------------
-    def build_eligibility_matrix(self, user: dict, rules: dict):
-        matrix = {}
-
-        # -------- Age --------
-        age = user.get("age")
-        min_age = rules.get("min_age")
-        max_age = rules.get("max_age")
-
-        if min_age is not None or max_age is not None:
-            status = "PASS"
-            reason = None
-
-            if min_age is not None and age < min_age:
-                status = "FAIL"
-                reason = f"Age {age} is below minimum {min_age}"
-
-            if max_age is not None and age > max_age:
-                status = "FAIL"
-                reason = f"Age {age} exceeds maximum {max_age}"
-
-            matrix["age"] = {
-                "rule": {"min_age": min_age, "max_age": max_age},
-                "user_value": age,
-                "status": status,
-                "reason": reason
-            }
-
-        # -------- Gender --------
-        rule_gender = rules.get("gender")
-        if rule_gender:
-            user_gender = user.get("gender")
-            status = "PASS"
-            reason = None
-
-            if isinstance(rule_gender, str):
-                if rule_gender.lower() != "any" and user_gender != rule_gender.lower():
-                    status = "FAIL"
-                    reason = "Gender mismatch"
-
-            elif isinstance(rule_gender, list):
-                allowed = [g.lower() for g in rule_gender if g]
-                if user_gender not in allowed:
-                    status = "FAIL"
-                    reason = "Gender not allowed"
-
-            matrix["gender"] = {
-                "rule": rule_gender,
-                "user_value": user_gender,
-                "status": status,
-                "reason": reason
-            }
-
-        # -------- State --------
-        rule_state = rules.get("state")
-        if rule_state:
-            user_state = user.get("state")
-
-            allowed = (
-                [s.lower() for s in rule_state if s]
-                if isinstance(rule_state, list)
-                else [rule_state.lower()]
-            )
-
-            status = "PASS" if user_state in allowed else "FAIL"
-
-            matrix["state"] = {
-                "rule": rule_state,
-                "user_value": user_state,
-                "status": status,
-                "reason": None if status == "PASS" else "State mismatch"
-            }
-
-        # -------- Occupation --------
-        rule_occ = rules.get("occupation")
-
-        if isinstance(rule_occ, list):
-            rule_occ = [o for o in rule_occ if isinstance(o, str)]
-
-        if rule_occ:
-            user_occ = user.get("occupation")
-
-            allowed = (
-                [o.lower() for o in rule_occ]
-                if isinstance(rule_occ, list)
-                else [rule_occ.lower()]
-            )
-
-            status = "PASS" if user_occ in allowed else "FAIL"
-
-            matrix["occupation"] = {
-                "rule": rule_occ,
-                "user_value": user_occ,
-                "status": status,
-                "reason": None if status == "PASS" else "Occupation mismatch"
+    def eligibility_engine(self) -> EligibilityEngine:
+        """
+        The EligibilityEngine over every scheme in the catalog (or Mongo),
+        rebuilt when the catalog version changes.
+        """
+        version = self.catalog.version if self.catalog is not None else None
+        with self._engine_lock:
+            if self._engine is None or version != self._engine_version:
+                if self.catalog is not None:
+                    # Schemes removed from Mongo keep a catalog ordinal but no record
+                    scheme_ids = [r["_id"] for r in self.catalog.records if r is not None]
+                else:
+                    scheme_ids = [s["_id"] for s in self.collection.find({}, {"_id": 1})]
+                self._engine = EligibilityEngine.build(self.compiled_rules, scheme_ids)
+                self._engine_version = version
+                print(f"🧮 Eligibility engine compiled for {self._engine.size} schemes")
+            return self._engine
+
+    @traced("eligibility.find_eligible_schemes")
+    @timed_stage("eligibility_all")
+    def find_eligible_schemes(self, user_profile: dict, limit: int | None = None):
+        """
+        Every scheme the user qualifies for, in scheme order, in the same
+        shape as validate_user_for_schemes' eligible entries. Returns
+        (eligible, total_eligible); `limit` caps the entries built.
+        """
+        user = normalize_user(user_profile)
+        engine = self.eligibility_engine()
+        ordinals = np.flatnonzero(engine.eligible(user))
+        scheme_ids = engine.id_array[ordinals[:limit]].tolist()
+
+        if self.catalog is not None:
+            schemes_data = {s["_id"]: s for s in self.catalog.get_many(scheme_ids)}
+        else:
+            schemes_data = {
+                s["_id"]: s
+                for s in self.collection.find({"_id": {"$in": scheme_ids}})
             }
 
-        # -------- Income --------
-        max_income = rules.get("max_income")
-        income = user.get("monthly_income")
-
-        if max_income is not None and income is not None:
-            status = "PASS" if income <= max_income else "FAIL"
-
-            matrix["income"] = {
-                "rule": {"max_income": max_income},
-                "user_value": income,
-                "status": status,
-                "reason": None if status == "PASS" else "Income exceeds limit"
-            }
+        eligible = []
+        for scheme_id in scheme_ids:
+            scheme_data = schemes_data.get(scheme_id)
+            if not scheme_data:
+                continue
+            rules = self.precomputed_rules.get(scheme_id, {})
+            eligible.append({
+                "_id": scheme_id,
+                "scheme_id": scheme_id,
+                "scheme_name": scheme_data.get("scheme_name"),
+                "eligibility_rules": rules,
+                "eligibility_matrix": self.compiled_rules.get(scheme_id, NO_RULES).matrix(user),
+                "final_decision": "ELIGIBLE"
+            })
+
+        current_span().set(schemes=engine.size, eligible=len(ordinals))
+        return eligible, len(ordinals)
 
-        return matrix
+    # --------------------------------------------------
+    # Eligibility matrix (single source of truth)
+    # --------------------------------------------------
+    def build_eligibility_matrix(self, user: dict, rules: dict):
+        """Per-criterion PASS/FAIL matrix for raw rules (compiled on the fly)."""
+        return compile_rules(rules).matrix(user)
 
     # --------------------------------------------------
     # LLM utilities (unchanged)
@@ -0,0 +1,159 @@
+# agents/eligibility_engine.py
+
+import math
+import numpy as np
+from .eligibility_rules import GENDER_LIST, GENDER_VALUE, CompiledRules, compile_rules
+
+
+def normalize_user(user_profile: dict) -> dict:
+    """The profile fields the eligibility rules read, strings lowercased."""
+    return {
+        "age": user_profile.get("age"),
+        "gender": user_profile.get("gender", "").lower(),
+        "state": user_profile.get("state", "").lower(),
+        "occupation": user_profile.get("occupation", "").lower(),
+        "monthly_income": user_profile.get("monthly_income")
+    }
+
+
+def _limit(value) -> float:
+    """A compiled rule limit (already numeric, see compile_clause); NaN when the rule sets none."""
+    return math.nan if value is None else float(value)
+
+
+class EligibilityEngine:
+    """
+    Compiled eligibility rules (eligibility_rules.CompiledRules) laid out
+    as columns, one row per clause (one per scheme for flat rules): age
+    and income limits as float arrays (NaN = no limit), and one packed
+    bitmap per lowercased gender, state and occupation value over rows,
+    stored like FacetIndex. `eligible()` checks one profile against every
+    scheme in a few numpy passes; a scheme passes when any of its rows does.
+
+    Decisions match CompiledRules.passes (and so the original
+    EligibilityAgent matrix), quirks included: max_age 0 rejects every
+    adult, a gender list that contains "Any" only admits the gender "any",
+    and a failed maximum age replaces the minimum age reason.
+    """
+
+    def __init__(self, scheme_ids: list, predicates: list):
+        self.scheme_ids = scheme_ids
+        self.id_array = np.array(scheme_ids, dtype=object)
+        self.ordinals = {scheme_id: i for i, scheme_id in enumerate(scheme_ids)}
+        self.predicates = predicates
+        self.size = len(scheme_ids)
+
+        clauses = [clause for predicate in predicates for clause in predicate.clauses]
+        self.rows = len(clauses)
+        self.row_scheme = np.repeat(
+            np.arange(self.size, dtype="int64"), [len(p.clauses) for p in predicates]
+        )
+
+        ages = [clause.check("age") for clause in clauses]
+        incomes = [clause.check("income") for clause in clauses]
+        genders = [clause.check("gender") for clause in clauses]
+        states = [clause.check("state") for clause in clauses]
+        occupations = [clause.check("occupation") for clause in clauses]
+
+        self.min_age = np.array([_limit(c.min_age) if c else math.nan for c in ages], dtype="float64")
+        self.max_age = np.array([_limit(c.max_age) if c else math.nan for c in ages], dtype="float64")
+        self.max_income = np.array([_limit(c.max_income) if c else math.nan for c in incomes], dtype="float64")
+        self.age_checked = np.array([c is not None for c in ages], dtype=bool)
+        self.income_checked = np.array([c is not None for c in incomes], dtype=bool)
+
+        self.gender_checked = np.array([c is not None for c in genders], dtype=bool)
+        self.gender_restricted = np.array(
+            [c is not None and c.kind in (GENDER_VALUE, GENDER_LIST) for c in genders], dtype=bool
+        )
+        self.state_checked = np.array([c is not None for c in states], dtype=bool)
+        self.occupation_checked = np.array([c is not None for c in occupations], dtype=bool)
+
+        self.bitmaps = {
+            "gender": self._bitmaps(c.allowed if c else () for c in genders),
+            "state": self._bitmaps(c.allowed if c else () for c in states),
+            "occupation": self._bitmaps(c.allowed if c else () for c in occupations),
+        }
+
+    @classmethod
+    def build(cls, rules_by_scheme: dict, scheme_ids=None) -> "EligibilityEngine":
+        """
+        `rules_by_scheme` maps scheme id to its rules (precomputed_rules_new.json)
+        or to already compiled CompiledRules. `scheme_ids` is the scheme
+        universe (defaults to the schemes with rules); schemes without
+        rules have no checks, as in the matrix.
+        """
+        scheme_ids = list(rules_by_scheme if scheme_ids is None else scheme_ids)
+        predicates = []
+        for scheme_id in scheme_ids:
+            rules = rules_by_scheme.get(scheme_id)
+            predicates.append(rules if isinstance(rules, CompiledRules) else compile_rules(rules))
+        return cls(scheme_ids, predicates)
+
+    def _bitmaps(self, per_row_values) -> dict:
+        postings = {}
+        for row, values in enumerate(per_row_values):
+            for value in values:
+                postings.setdefault(value, []).append(row)
+
+        bitmaps = {}
+        for value, rows in postings.items():
+            mask = np.zeros(self.rows, dtype=bool)
+            mask[np.asarray(rows, dtype="int64")] = True
+            bitmaps[value] = np.packbits(mask, bitorder="little")
+        return bitmaps
+
+    def _allowed(self, criterion: str, value) -> np.ndarray:
+        bitmap = self.bitmaps[criterion].get(value)
+        if bitmap is None:
+            return np.zeros(self.rows, dtype=bool)
+        return np.unpackbits(bitmap, count=self.rows, bitorder="little").view(bool)
+
+    # ---------------------------
+    # Evaluation
+    # ---------------------------
+    def evaluate(self, user: dict) -> dict:
+        """
+        criterion -> (checked, failed) boolean masks over clause rows, for
+        a user from normalize_user(). A criterion is in a clause's matrix
+        where `checked`, and FAILs where `failed`.
+        """
+        age = user.get("age")
+        income = user.get("monthly_income")
+
+        # NaN limits compare False, so absent limits never fail
+        age_failed = (age < self.min_age) | (age > self.max_age)
+
+        result = {
+            "age": (self.age_checked, age_failed),
+            "gender": (self.gender_checked, self.gender_restricted & ~self._allowed("gender", user.get("gender"))),
+            "state": (self.state_checked, self.state_checked & ~self._allowed("state", user.get("state"))),
+            "occupation": (
+                self.occupation_checked,
+                self.occupation_checked & ~self._allowed("occupation", user.get("occupation")),
+            ),
+        }
+
+        if income is None:
+            no_check = np.zeros(self.rows, dtype=bool)
+            result["income"] = (no_check, no_check)
+        else:
+            result["income"] = (self.income_checked, income > self.max_income)
+        return result
+
+    def eligible(self, user: dict) -> np.ndarray:
+        """Boolean mask over scheme ordinals: True where some clause has no failing criterion."""
+        failed = np.zeros(self.rows, dtype=bool)
+        for _, criterion_failed in self.evaluate(user).values():
+            failed |= criterion_failed
+        if self.rows == self.size:
+            return ~failed
+        eligible = np.zeros(self.size, dtype=bool)
+        eligible[self.row_scheme[~failed]] = True
+        return eligible
+
+    def eligible_ids(self, user: dict) -> list:
+        return self.id_array[self.eligible(user)].tolist()
+
+    def failures(self, user: dict, ordinal: int) -> list:
+        """One scheme's "criterion: reason" strings, as validate_user_for_schemes reports them."""
+        return self.predicates[ordinal].failures(user)
@@ -0,0 +1,272 @@
+# agents/eligibility_rules.py
+
+import math
+
+# Matrix criteria, in the order the eligibility matrix lists them
+CRITERIA = ("age", "gender", "state", "occupation", "income")
+
+# How a gender rule is checked
+GENDER_ANY = 1     # the string "Any": everyone passes
+GENDER_VALUE = 2   # one string: exact match ("Gender mismatch")
+GENDER_LIST = 3    # list of strings: membership ("Gender not allowed")
+GENDER_OTHER = 4   # any other truthy value: listed in the matrix, always PASS
+
+
+def _entry(rule, user_value, failed_reason):
+    return {
+        "rule": rule,
+        "user_value": user_value,
+        "status": "FAIL" if failed_reason else "PASS",
+        "reason": failed_reason
+    }
+
+
+class AgeCheck:
+    __slots__ = ("min_age", "max_age")
+
+    name = "age"
+
+    def __init__(self, min_age, max_age):
+        self.min_age = min_age
+        self.max_age = max_age
+
+    def passes(self, user) -> bool:
+        age = user["age"]
+        return not (
+            (self.min_age is not None and age < self.min_age)
+            or (self.max_age is not None and age > self.max_age)
+        )
+
+    def entry(self, user) -> dict:
+        age = user["age"]
+        reason = None
+        if self.min_age is not None and age < self.min_age:
+            reason = f"Age {age} is below minimum {self.min_age}"
+        # A failed maximum replaces the minimum reason
+        if self.max_age is not None and age > self.max_age:
+            reason = f"Age {age} exceeds maximum {self.max_age}"
+        return _entry({"min_age": self.min_age, "max_age": self.max_age}, age, reason)
+
+
+class GenderCheck:
+    __slots__ = ("rule", "kind", "allowed")
+
+    name = "gender"
+
+    def __init__(self, rule, kind, allowed):
+        self.rule = rule
+        self.kind = kind
+        self.allowed = allowed
+
+    def passes(self, user) -> bool:
+        return self.kind in (GENDER_ANY, GENDER_OTHER) or user["gender"] in self.allowed
+
+    def entry(self, user) -> dict:
+        reason = None
+        if not self.passes(user):
+            reason = "Gender mismatch" if self.kind == GENDER_VALUE else "Gender not allowed"
+        return _entry(self.rule, user["gender"], reason)
+
+
+class MembershipCheck:
+    """State or occupation: the user's lowercased value must be one of the rule's."""
+
+    __slots__ = ("name", "rule", "allowed", "reason")
+
+    def __init__(self, name, rule, allowed, reason):
+        self.name = name
+        self.rule = rule
+        self.allowed = allowed
+        self.reason = reason
+
+    def passes(self, user) -> bool:
+        return user[self.name] in self.allowed
+
+    def entry(self, user) -> dict:
+        return _entry(self.rule, user[self.name], None if self.passes(user) else self.reason)
+
+
+class IncomeCheck:
+    __slots__ = ("max_income",)
+
+    name = "income"
+
+    def __init__(self, max_income):
+        self.max_income = max_income
+
+    def passes(self, user) -> bool:
+        income = user["monthly_income"]
+        return income is None or income <= self.max_income
+
+    def entry(self, user) -> dict:
+        # Not part of the matrix when the user gave no income
+        income = user["monthly_income"]
+        if income is None:
+            return None
+        return _entry({"max_income": self.max_income}, income, None if income <= self.max_income else "Income exceeds limit")
+
+
+class Clause:
+    """AND of the checks one rule set defines (checks it leaves out always pass)."""
+
+    __slots__ = ("checks",)
+
+    def __init__(self, checks: tuple):
+        self.checks = checks
+
+    def check(self, name: str):
+        for check in self.checks:
+            if check.name == name:
+                return check
+        return None
+
+    def passes(self, user) -> bool:
+        for check in self.checks:
+            if not check.passes(user):
+                return False
+        return True
+
+    def matrix(self, user) -> dict:
+        matrix = {}
+        for check in self.checks:
+            entry = check.entry(user)
+            if entry is not None:
+                matrix[check.name] = entry
+        return matrix
+
+
+class CompiledRules:
+    """
+    One scheme's eligibility as an OR of clauses, compiled once. Flat
+    rules are a single clause and behave exactly like the original
+    EligibilityAgent matrix.
+    """
+
+    __slots__ = ("clauses",)
+
+    def __init__(self, clauses: tuple):
+        self.clauses = clauses
+
+    def passes(self, user) -> bool:
+        """Eligibility only, short-circuiting on the first passing clause."""
+        for clause in self.clauses:
+            if clause.passes(user):
+                return True
+        return False
+
+    def matrix(self, user) -> dict:
+        """
+        Per-criterion matrix. With several clauses it is the first passing
+        clause's matrix (or the clause with the fewest failures), and every
+        entry records its "clause" index.
+        """
+        if len(self.clauses) == 1:
+            return self.clauses[0].matrix(user)
+
+        best, best_index, best_failures = {}, 0, None
+        for index, clause in enumerate(self.clauses):
+            matrix = clause.matrix(user)
+            failures = sum(entry["status"] == "FAIL" for entry in matrix.values())
+            if best_failures is None or failures < best_failures:
+                best, best_index, best_failures = matrix, index, failures
+            if failures == 0:
+                break
+        for entry in best.values():
+            entry["clause"] = best_index
+        return best
+
+    def failures(self, user) -> list:
+        """"criterion: reason" strings, as validate_user_for_schemes reports them."""
+        return [f"{k}: {v['reason']}" for k, v in self.matrix(user).items() if v["status"] == "FAIL"]
+
+
+# ---------------------------
+# Compiler
+# ---------------------------
+def _lowered(values) -> frozenset:
+    return frozenset(v.lower() for v in values if isinstance(v, str))
+
+
+def _numeric_limit(value):
+    """
+    An age or income limit as a number: numeric strings ("40", "10,000")
+    are parsed, anything else that is not a finite number means no limit.
+    """
+    if isinstance(value, str):
+        text = value.replace(",", "").strip()
+        try:
+            value = int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return value
+
+
+def compile_clause(rules: dict) -> Clause:
+    """One flat rule dict (precomputed_rules_new.json schema) -> Clause."""
+    checks = []
+
+    min_age = _numeric_limit(rules.get("min_age"))
+    max_age = _numeric_limit(rules.get("max_age"))
+    if min_age is not None or max_age is not None:
+        checks.append(AgeCheck(min_age, max_age))
+
+    rule_gender = rules.get("gender")
+    if rule_gender:
+        if isinstance(rule_gender, str):
+            if rule_gender.lower() == "any":
+                checks.append(GenderCheck(rule_gender, GENDER_ANY, frozenset()))
+            else:
+                checks.append(GenderCheck(rule_gender, GENDER_VALUE, frozenset([rule_gender.lower()])))
+        elif isinstance(rule_gender, list):
+            checks.append(GenderCheck(rule_gender, GENDER_LIST, _lowered(g for g in rule_gender if g)))
+        else:
+            checks.append(GenderCheck(rule_gender, GENDER_OTHER, frozenset()))
+
+    rule_state = rules.get("state")
+    if rule_state and isinstance(rule_state, (str, list)):
+        allowed = _lowered(s for s in rule_state if s) if isinstance(rule_state, list) else _lowered([rule_state])
+        checks.append(MembershipCheck("state", rule_state, allowed, "State mismatch"))
+
+    rule_occ = rules.get("occupation")
+    if isinstance(rule_occ, list):
+        rule_occ = [o for o in rule_occ if isinstance(o, str)]
+    elif not isinstance(rule_occ, str):
+        # e.g. {"Cattle Owner": true}: nothing to compare against
+        rule_occ = None
+    if rule_occ:
+        allowed = _lowered(rule_occ) if isinstance(rule_occ, list) else _lowered([rule_occ])
+        checks.append(MembershipCheck("occupation", rule_occ, allowed, "Occupation mismatch"))
+
+    max_income = _numeric_limit(rules.get("max_income"))
+    if max_income is not None:
+        checks.append(IncomeCheck(max_income))
+
+    return Clause(tuple(checks))
+
+
+def compile_rules(rules) -> CompiledRules:
+    """
+    A scheme's rules -> CompiledRules. A non-empty "clauses" list (written
+    by others/extract_eligibility.py for multi-rule eligibility) is an OR
+    of flat rule dicts; otherwise the rule dict itself is the one clause.
+    """
+    if not isinstance(rules, dict):
+        rules = {}
+    clauses = [c for c in rules.get("clauses") or [] if isinstance(c, dict)]
+    if clauses:
+        return CompiledRules(tuple(compile_clause(c) for c in clauses))
+    return CompiledRules((compile_clause(rules),))
+
+
+def compile_all(rules_by_scheme: dict) -> dict:
+    """scheme id -> CompiledRules for every scheme in precomputed_rules_new.json."""
+    return {scheme_id: compile_rules(rules) for scheme_id, rules in rules_by_scheme.items()}
+
+
+# Schemes without precomputed rules: no checks, always eligible
+NO_RULES = compile_rules({})
@@ -0,0 +1,160 @@
+# agents/facet_index.py
+
+import threading
+import numpy as np
+from .facets import FACET_FIELDS, facet_fields
+
+# Facet name -> stored scheme field it is read from
+FACETS = {
+    "state": "state_norm",
+    "occupation": "occupation_norm",
+    "gender": "gender_norm",
+    "level": "level",
+}
+
+
+def facet_values(scheme) -> dict:
+    """
+    Normalized values of every facet for one scheme. Uses the facet fields
+    written at ingest when the document has them, otherwise computes them.
+    """
+    if all(scheme.get(field) for field in FACET_FIELDS):
+        values = {field: scheme.get(field) for field in FACET_FIELDS}
+    else:
+        values = facet_fields(scheme)
+
+    level = str(scheme.get("level") or "").strip().lower()
+    values["level"] = [level] if level else []
+
+    return {facet: tuple(sorted(set(values[field]))) for facet, field in FACETS.items()}
+
+
+class FacetIndex:
+    """
+    Packed bitmaps (1 bit per scheme ordinal, little-endian, as numpy uint8)
+    for every normalized state, occupation alias, gender and level value.
+    Candidate sets are bitmap AND/OR; `mask()` turns a bitmap into the
+    boolean ordinal mask taken by FAISS filtered search and the rerank.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.bitmaps = {facet: {} for facet in FACETS}
+        self.row_values = []
+        self.present = self.empty()
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Build / incremental update
+    # ---------------------------
+    @classmethod
+    def build(cls, records) -> "FacetIndex":
+        """`records` is indexed by ordinal (e.g. SchemeCatalog.records); None = no scheme."""
+        index = cls()
+        index._grow(len(records))
+
+        postings = {facet: {} for facet in FACETS}
+        for ordinal, scheme in enumerate(records):
+            values = facet_values(scheme) if scheme is not None else None
+            index.row_values[ordinal] = values
+            if values is None:
+                continue
+            for facet, facet_vals in values.items():
+                for value in facet_vals:
+                    postings[facet].setdefault(value, []).append(ordinal)
+
+        for facet, value_ordinals in postings.items():
+            for value, ordinals in value_ordinals.items():
+                index.bitmaps[facet][value] = index._pack(ordinals)
+        index.present = index._pack([o for o, v in enumerate(index.row_values) if v is not None])
+        return index
+
+    def _pack(self, ordinals) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[np.asarray(ordinals, dtype="int64")] = True
+        return np.packbits(mask, bitorder="little")
+
+    def _grow(self, size: int):
+        if size <= self.size:
+            return
+        n_bytes = (size + 7) // 8
+        for bitmaps in self.bitmaps.values():
+            for value, bitmap in bitmaps.items():
+                bitmaps[value] = np.concatenate([bitmap, np.zeros(n_bytes - len(bitmap), dtype="uint8")])
+        self.present = np.concatenate([self.present, np.zeros(n_bytes - len(self.present), dtype="uint8")])
+        self.row_values.extend([None] * (size - self.size))
+        self.size = size
+
+    def _set_bit(self, bitmap: np.ndarray, ordinal: int, on: bool):
+        if on:
+            bitmap[ordinal >> 3] |= np.uint8(1 << (ordinal & 7))
+        else:
+            bitmap[ordinal >> 3] &= np.uint8(~(1 << (ordinal & 7)) & 0xFF)
+
+    def update(self, ordinal: int, scheme) -> bool:
+        """Re-index one scheme (None removes it). Returns True if anything changed."""
+        with self._lock:
+            self._grow(ordinal + 1)
+            old = self.row_values[ordinal]
+            new = facet_values(scheme) if scheme is not None else None
+            if old == new:
+                return False
+
+            for facet in FACETS:
+                old_vals = set(old[facet]) if old else set()
+                new_vals = set(new[facet]) if new else set()
+                for value in old_vals - new_vals:
+                    self._set_bit(self.bitmaps[facet][value], ordinal, False)
+                for value in new_vals - old_vals:
+                    bitmap = self.bitmaps[facet].get(value)
+                    if bitmap is None:
+                        bitmap = self.bitmaps[facet][value] = self.empty()
+                    self._set_bit(bitmap, ordinal, True)
+
+            self._set_bit(self.present, ordinal, new is not None)
+            self.row_values[ordinal] = new
+            return True
+
+    def sync(self, records) -> int:
+        """Apply a fresh ordinal-indexed record list; only changed schemes are touched."""
+        changed = 0
+        for ordinal, scheme in enumerate(records):
+            changed += self.update(ordinal, scheme)
+        return changed
+
+    # ---------------------------
+    # Set operations
+    # ---------------------------
+    def empty(self) -> np.ndarray:
+        return np.zeros((self.size + 7) // 8, dtype="uint8")
+
+    def all(self) -> np.ndarray:
+        return self.present.copy()
+
+    def bitmap(self, facet: str, values) -> np.ndarray:
+        """OR of the bitmaps of `values` (unknown values match nothing)."""
+        result = self.empty()
+        bitmaps = self.bitmaps[facet]
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap, out=result)
+        return result
+
+    def select(self, **selection) -> np.ndarray:
+        """AND across facets of the OR within each facet, e.g. select(state=[...], level=[...])."""
+        result = self.all()
+        for facet, values in selection.items():
+            if values is not None:
+                np.bitwise_and(result, self.bitmap(facet, values), out=result)
+        return result
+
+    def mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """Boolean mask over scheme ordinals (AIBaseAgent allowed_ordinals / rerank masks)."""
+        return np.unpackbits(bitmap, count=self.size, bitorder="little").astype(bool)
+
+    def ordinals(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(self.mask(bitmap))
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(np.unpackbits(bitmap, count=self.size, bitorder="little").sum())
@@ -0,0 +1,124 @@
+# agents/facets.py
+
+import re
+from pymongo import ASCENDING, UpdateOne
+from .occupation_taxonomy import load_taxonomy
+
+# Normalized facet fields written on every scheme document at ingest.
+# Candidate queries match them with plain `$in` equality, so Mongo can use
+# the (multikey) indexes instead of scanning with case-insensitive regexes.
+FACET_FIELDS = ("state_norm", "occupation_norm", "gender_norm")
+
+# Stored when a scheme has no state / gender restriction
+ANY_STATE = "*"
+ANY_GENDER = "any"
+
+# Scheme text scanned for taxonomy occupations when computing occupation_norm
+OCCUPATION_TEXT_FIELDS = ("scheme_name", "category", "tags", "eligibility_text")
+
+# "Tamil Nadu (Applicable)" -> "tamil nadu"
+_QUALIFIER = re.compile(r"\s*\([^)]*\)\s*$")
+_SPACES = re.compile(r"\s+")
+
+# Ingest stores Central schemes with this placeholder state (see
+# others/database_creation.py); they are open to every state
+_APPLICABLE = re.compile(r"\(\s*applicable\s*\)\s*$", re.IGNORECASE)
+
+# Normalized rule states that name no particular state
+NATIONWIDE_STATES = frozenset({"all", "all states", "india"})
+
+
+def _values(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value if v]
+    return [str(value)] if str(value).strip() else []
+
+
+def normalize_state(value) -> str:
+    state = _SPACES.sub(" ", str(value or "").strip().lower())
+    return _QUALIFIER.sub("", state).strip()
+
+
+def occupation_aliases(occupation: str) -> frozenset:
+    """The occupation, its tokens and the taxonomy aliases of everything it mentions."""
+    return load_taxonomy().aliases(occupation or "")
+
+
+def state_facets(*values) -> list:
+    states = {normalize_state(v) for value in values for v in _values(value)}
+    states.discard("")
+    if states & NATIONWIDE_STATES:
+        return [ANY_STATE]
+    return sorted(states) or [ANY_STATE]
+
+
+def scheme_states(scheme) -> list:
+    """The scheme's own state fields, minus the placeholder ingest writes for Central schemes."""
+    if str(scheme.get("level") or "").strip().lower() == "central":
+        return []
+    return [v for v in _values(scheme.get("state")) + _values(scheme.get("states")) if not _APPLICABLE.search(v)]
+
+
+def occupation_facets(occupation, text: str = "") -> list:
+    """
+    Explicit occupations (with their aliases), plus the expanded aliases of
+    every taxonomy occupation mentioned in the scheme text.
+    """
+    taxonomy = load_taxonomy()
+    terms = set()
+    for occ in _values(occupation):
+        terms |= taxonomy.aliases(occ)
+    terms |= taxonomy.expand(taxonomy.detect(text))
+    return sorted(terms)
+
+
+def gender_facets(gender) -> list:
+    genders = {g.strip().lower() for g in _values(gender)}
+    genders.discard("")
+    return sorted(genders) or [ANY_GENDER]
+
+
+def facet_fields(scheme, rules: dict | None = None) -> dict:
+    """
+    Facet values for one scheme document. `rules` are its precomputed
+    eligibility rules (precomputed_rules_new.json), when available.
+    """
+    rules = rules or {}
+
+    text = " ".join(" ".join(_values(scheme.get(field))) for field in OCCUPATION_TEXT_FIELDS)
+
+    return {
+        "state_norm": state_facets(scheme_states(scheme), rules.get("state")),
+        "occupation_norm": occupation_facets(
+            _values(scheme.get("occupation")) + _values(rules.get("occupation")), text
+        ),
+        "gender_norm": gender_facets(rules.get("gender") or scheme.get("gender")),
+    }
+
+
+def ensure_facet_indexes(collection):
+    """Multikey indexes backing the candidate queries."""
+    for field in FACET_FIELDS:
+        collection.create_index([(field, ASCENDING)])
+
+
+def refresh_facets(collection, rules: dict, batch_size: int = 500) -> int:
+    """Recompute and store the facet fields of every scheme. Returns the count."""
+    updated = 0
+    batch = []
+    projection = {f: 1 for f in ("state", "states", "level", "occupation", "gender") + OCCUPATION_TEXT_FIELDS}
+    for scheme in collection.find({}, projection):
+        batch.append(UpdateOne(
+            {"_id": scheme["_id"]},
+            {"$set": facet_fields(scheme, rules.get(scheme["_id"]))}
+        ))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch).modified_count
+
+    ensure_facet_indexes(collection)
+    return updated
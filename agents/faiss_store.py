@@ -0,0 +1,105 @@
+# agents/faiss_store.py
+
+import os
+import json
+import pickle
+import faiss
+import numpy as np
+
+# Memory-map index data instead of copying it into each process, so several
+# workers on one box share a single page-cache copy of every index.
+# IO_FLAG_MMAP_IFC also maps flat codes, but combined with IO_FLAG_MMAP it
+# is rejected for IVF indexes ("mmap only supported for File objects"), so
+# those fall back to the inverted-list mmap alone.
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+MMAP_FALLBACK_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+def index_paths(index_dir: str, field: str) -> dict:
+    return {
+        "index": os.path.join(index_dir, f"faiss_index_{field}.faiss"),
+        "ids": os.path.join(index_dir, f"faiss_ids_{field}.npy"),
+        "meta": os.path.join(index_dir, f"faiss_meta_{field}.json"),
+        "legacy": os.path.join(index_dir, f"faiss_index_{field}.pkl"),
+    }
+
+
+def file_version(path: str):
+    """Cheap change stamp for a file on disk (None if it does not exist)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def save_faiss_index(index_dir: str, field: str, data: dict):
+    """
+    Write one field index as a native FAISS file plus a numpy ids sidecar
+    (and its build metadata as JSON).
+    """
+    paths = index_paths(index_dir, field)
+
+    faiss.write_index(data["index"], paths["index"])
+    np.save(paths["ids"], np.asarray([str(doc_id) for doc_id in data["ids"]]), allow_pickle=False)
+
+    with open(paths["meta"], "w", encoding="utf-8") as f:
+        json.dump(data.get("meta") or {}, f, indent=2)
+
+
+def read_index(path: str, mmap: bool = True):
+    if not mmap:
+        return faiss.read_index(path)
+    try:
+        return faiss.read_index(path, MMAP_FLAGS)
+    except RuntimeError:
+        return faiss.read_index(path, MMAP_FALLBACK_FLAGS)
+
+
+def load_faiss_index(index_dir: str, field: str, mmap: bool = True):
+    """
+    Load one field index. Native files are memory-mapped; the legacy pickle
+    format is still read (fully into memory) when no native file exists.
+    Returns None if the field has no index on disk.
+    """
+    paths = index_paths(index_dir, field)
+
+    if os.path.exists(paths["index"]) and os.path.exists(paths["ids"]):
+        index = read_index(paths["index"], mmap)
+        ids = np.load(paths["ids"], mmap_mode="r" if mmap else None, allow_pickle=False)
+
+        meta = {}
+        if os.path.exists(paths["meta"]):
+            with open(paths["meta"], "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+        return {"index": index, "ids": ids, "meta": meta, "version": file_version(paths["index"])}
+
+    if os.path.exists(paths["legacy"]):
+        with open(paths["legacy"], "rb") as f:
+            data = pickle.load(f)
+        data["version"] = file_version(paths["legacy"])
+        return data
+
+    return None
+
+
+def load_faiss_indexes(index_dir: str, fields: list, mmap: bool = True) -> dict:
+    faiss_indexes = {}
+    for field in fields:
+        data = load_faiss_index(index_dir, field, mmap=mmap)
+        if data is None:
+            print(f"⚠️ FAISS index missing for {field}")
+            continue
+        faiss_indexes[field] = data
+    return faiss_indexes
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB (None where unsupported)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        return None
@@ -0,0 +1,215 @@
+# agents/metrics.py
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency bucket upper bounds in seconds: sub-millisecond index lookups up
+# to OCR and LLM generation that take tens of seconds
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _label_text(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in items:
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set (non-cumulative counts, sum and
+    count); rendered cumulatively in Prometheus format. `quantile()`
+    interpolates within the bucket like PromQL's histogram_quantile.
+    """
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels):
+        """Estimated q-quantile for one label set, or None without observations."""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None or series[2] == 0:
+                return None
+            counts, count = list(series[0]), series[2]
+
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    # Beyond the last finite bucket: report its bound
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)) -> dict:
+        """{label values: {"count", "mean_ms", "p50_ms", ...}} for every series."""
+        with self._lock:
+            keys = list(self.series)
+        result = {}
+        for key in sorted(keys):
+            labels = dict(zip(self.labelnames, key))
+            _, total, count = self.series[key]
+            entry = {"count": count, "mean_ms": round(total / count * 1000, 3) if count else None}
+            for q in quantiles:
+                value = self.quantile(q, **labels)
+                entry[f"p{int(q * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+            result["/".join(key) or self.name] = entry
+        return result
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self.series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labelnames, key, ("le", _format_bound(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+# ---------------------------
+# Pipeline metrics
+# ---------------------------
+# stage: embedding, candidates, faiss_search, rerank, lexical_fallback,
+# eligibility, eligibility_all, enrich, ocr, llm_generation
+STAGE_LATENCY = registry.histogram(
+    "scheme_pipeline_stage_seconds", "Latency of each pipeline stage", ["stage"]
+)
+FAISS_FIELD_LATENCY = registry.histogram(
+    "scheme_faiss_field_search_seconds", "Latency of one FAISS field index search", ["field"]
+)
+RETRIEVAL_CACHE = registry.counter(
+    "scheme_retrieval_cache_total", "Retrieval result cache lookups", ["result"]
+)
+CANDIDATE_FALLBACKS = registry.counter(
+    "scheme_candidate_fallback_total", "Searches whose candidate space fell back to the full corpus"
+)
+LEXICAL_FALLBACKS = registry.counter(
+    "scheme_lexical_fallback_total", "Searches that needed lexical fallback results"
+)
+LEXICAL_FALLBACK_SCHEMES = registry.counter(
+    "scheme_lexical_fallback_schemes_total", "Schemes added by the lexical fallback"
+)
+OCR_FAILURES = registry.counter(
+    "scheme_ocr_failures_total", "OCR text extractions that failed"
+)
+
+
+def stage_timer(stage: str):
+    """Context manager observing one pipeline stage's latency."""
+    return STAGE_LATENCY.time(stage=stage)
+
+
+def timed_stage(stage: str):
+    """Decorator: observe the function's latency as pipeline stage `stage`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with STAGE_LATENCY.time(stage=stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage_summary() -> dict:
+    """p50/p95/p99 (ms) per stage and per FAISS field, for capacity planning."""
+    return {
+        "stages": STAGE_LATENCY.summary(),
+        "faiss_fields": FAISS_FIELD_LATENCY.summary(),
+    }
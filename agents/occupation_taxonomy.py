@@ -0,0 +1,293 @@
+# agents/occupation_taxonomy.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from .faiss_store import file_version
+from .scheme_features import TOKEN_PATTERN, normalize_text
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAXONOMY_PATH = os.path.join(PROJECT_ROOT, "occupation_taxonomy.json")
+
+POSTINGS_FILE = "occupation_postings.json"
+
+# Memoized user occupation strings per taxonomy (cleared when full)
+ALIAS_CACHE_SIZE = 4096
+
+# Scheme fields scanned when building the occupation -> scheme posting lists
+POSTING_TEXT_FIELDS = ("occupation", "scheme_name", "category", "tags", "eligibility_text", "description")
+
+
+def normalize_phrase(text) -> str:
+    """Lowercase tokens joined by single spaces (hyphens, punctuation dropped)."""
+    return " ".join(TOKEN_PATTERN.findall(normalize_text(text)))
+
+
+def pluralize(word: str) -> str:
+    if word.endswith("man"):
+        return word[:-3] + "men"
+    if word.endswith("y") and len(word) > 1 and word[-2] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        return word + "es"
+    return word + "s"
+
+
+def inflections(phrase: str) -> set:
+    """The phrase plus its plural (last word inflected)."""
+    forms = {phrase}
+    words = phrase.split(" ")
+    if words[-1] and not words[-1].endswith("ing"):
+        forms.add(" ".join(words[:-1] + [pluralize(words[-1])]))
+    return forms
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: every pattern is found in one left-to-right pass
+    over the text, however many patterns there are.
+    """
+
+    def __init__(self, patterns: dict):
+        # patterns: pattern string -> value reported on match
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = nxt
+            self.out[node] = self.out[node] + (value,)
+
+        # Breadth-first failure links; outputs inherit their fallback's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class OccupationTaxonomy:
+    """
+    Canonical occupations with their aliases and inflected forms, loaded
+    from occupation_taxonomy.json. "includes" links (e.g. artisan ->
+    weaver) are expanded up front: an occupation stands for itself, every
+    broader occupation that includes it and every narrower one it includes.
+    All alias forms are compiled into one Aho-Corasick automaton.
+    """
+
+    def __init__(self, data: dict, version=None):
+        self.version = version
+        self._aliases = {}
+        occupations = data.get("occupations", {})
+        self.canonicals = list(occupations)
+
+        # Alias form -> owning canonical (first definition wins)
+        self.alias_owner = {}
+        self.terms = {}
+        for canonical, entry in occupations.items():
+            forms = set()
+            for alias in [canonical] + list(entry.get("aliases", [])):
+                phrase = normalize_phrase(alias)
+                if phrase:
+                    forms |= inflections(phrase)
+            for form in forms:
+                self.alias_owner.setdefault(form, canonical)
+            self.terms[canonical] = frozenset(forms)
+
+        narrower = {c: set(occupations[c].get("includes", [])) & set(occupations) for c in occupations}
+        broader = {c: set() for c in occupations}
+        for canonical, children in narrower.items():
+            for child in children:
+                broader[child].add(canonical)
+
+        self.closure = {
+            c: frozenset({c} | self._reachable(c, narrower) | self._reachable(c, broader))
+            for c in occupations
+        }
+        self.expanded = {
+            c: frozenset().union(*[self.terms[d] for d in self.closure[c]])
+            for c in occupations
+        }
+
+        # Space-padded patterns, matched against space-padded normalized text,
+        # only hit whole words
+        self.automaton = AhoCorasick({f" {form} ": owner for form, owner in self.alias_owner.items()})
+
+    @staticmethod
+    def _reachable(start: str, edges: dict) -> set:
+        seen = set()
+        stack = list(edges[start])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(edges[node])
+        return seen
+
+    def detect(self, text) -> set:
+        """Canonical occupations mentioned anywhere in the text (one pass)."""
+        phrase = normalize_phrase(text)
+        if not phrase:
+            return set()
+        return self.automaton.find(f" {phrase} ")
+
+    def expand(self, canonicals) -> frozenset:
+        """Every alias form of the given occupations and their related occupations."""
+        return frozenset().union(*[self.expanded[c] for c in canonicals if c in self.expanded])
+
+    def related(self, canonicals) -> frozenset:
+        return frozenset().union(*[self.closure[c] for c in canonicals if c in self.closure])
+
+    def aliases(self, occupation: str) -> frozenset:
+        """
+        Alias set for a user occupation string: the string itself, its tokens
+        and the expanded aliases of every occupation it mentions.
+        """
+        cached = self._aliases.get(occupation)
+        if cached is not None:
+            return cached
+
+        occ = (occupation or "").strip().lower()
+        if not occ:
+            return frozenset()
+        tokens = set(TOKEN_PATTERN.findall(occ))
+        aliases = frozenset({occ} | tokens | self.expand(self.detect(occ)))
+
+        if len(self._aliases) >= ALIAS_CACHE_SIZE:
+            self._aliases.clear()
+        self._aliases[occupation] = aliases
+        return aliases
+
+
+# path -> OccupationTaxonomy, replaced when the file's version changes
+_taxonomies = {}
+_taxonomy_lock = threading.Lock()
+
+
+def load_taxonomy(path: str = TAXONOMY_PATH) -> OccupationTaxonomy:
+    """The parsed taxonomy, reloaded once the file on disk changes."""
+    version = file_version(path)
+    taxonomy = _taxonomies.get(path)
+    if taxonomy is not None and taxonomy.version == version:
+        return taxonomy
+
+    with _taxonomy_lock:
+        taxonomy = _taxonomies.get(path)
+        if taxonomy is not None and taxonomy.version == version:
+            return taxonomy
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ Occupation taxonomy not found at {path}; occupation aliases disabled")
+            data = {}
+        taxonomy = OccupationTaxonomy(data, version=version)
+        _taxonomies[path] = taxonomy
+        return taxonomy
+
+
+class OccupationPostings:
+    """
+    Precomputed canonical occupation -> scheme id posting lists, already
+    expanded over the taxonomy closure, so occupation candidates are a
+    union of a few lists. Built by others/build_faiss.py.
+    """
+
+    def __init__(self, postings: dict, taxonomy_version=None):
+        self.postings = postings
+        self.taxonomy_version = taxonomy_version
+        self.version = None
+
+    @classmethod
+    def build(cls, schemes, taxonomy: OccupationTaxonomy | None = None) -> "OccupationPostings":
+        taxonomy = taxonomy or load_taxonomy()
+
+        direct = {}
+        for scheme in schemes:
+            if scheme is None:
+                continue
+            text = " ".join(normalize_text(scheme.get(field)) for field in POSTING_TEXT_FIELDS)
+            for canonical in taxonomy.detect(text):
+                direct.setdefault(canonical, []).append(scheme.get("_id"))
+
+        postings = {}
+        for canonical in taxonomy.canonicals:
+            ids = {}
+            for related in taxonomy.closure[canonical]:
+                for scheme_id in direct.get(related, []):
+                    ids[scheme_id] = True
+            if ids:
+                postings[canonical] = list(ids)
+
+        return cls(postings, taxonomy.version)
+
+    def candidates(self, occupation: str, taxonomy: OccupationTaxonomy | None = None) -> list:
+        """Scheme ids for every occupation the user's occupation string mentions."""
+        taxonomy = taxonomy or load_taxonomy()
+        ids = {}
+        for canonical in taxonomy.detect(occupation):
+            for scheme_id in self.postings.get(canonical, []):
+                ids[scheme_id] = True
+        return list(ids)
+
+    def save(self, index_dir: str):
+        with open(os.path.join(index_dir, POSTINGS_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {"taxonomy_version": self.taxonomy_version, "postings": self.postings},
+                f,
+                ensure_ascii=False,
+            )
+
+    def matches(self, taxonomy: OccupationTaxonomy | None = None) -> bool:
+        """Whether these lists were built from the taxonomy as it is now."""
+        return self.taxonomy_version == (taxonomy or load_taxonomy()).version
+
+    @classmethod
+    def load(cls, index_dir: str):
+        """
+        Load saved posting lists, or None if the directory has none or they
+        were built from another version of the taxonomy.
+        """
+        path = os.path.join(index_dir, POSTINGS_FILE)
+        if not os.path.exists(path):
+            return None
+
+        start = time.time()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        postings = cls(data.get("postings", {}), data.get("taxonomy_version"))
+        if not postings.matches():
+            print(f"⚠️ Occupation postings in {index_dir} were built from another taxonomy version; ignoring them")
+            return None
+        postings.version = file_version(path)
+        print(f"🧭 Occupation postings loaded: {len(postings.postings)} occupations in {round((time.time() - start) * 1000, 1)}ms")
+        return postings
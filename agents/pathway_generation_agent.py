@@ -1,6 +1,8 @@
 # agents/pathway_generation_agent.py
 
 from .ai_agents_base import AIBaseAgent
+from .tracing import traced
+from .metrics import stage_timer
 import json
 import re
 
@@ -42,6 +44,7 @@ class PathwayGenerationAgent(AIBaseAgent):
 
         return fallback
 
+    @traced("pathway_generation.generate_pathway")
     def generate_pathway(self, eligibility_output: dict, document_status: dict) -> dict:
         """
         Generate full guidance for a scheme. Always generate:
@@ -132,7 +135,8 @@ Formatting rules:
         print("============================================\n")
 
         try:
-            llm_output = self.llm.generate(prompt, max_tokens=600)
+            with stage_timer("llm_generation"):
+                llm_output = self.llm.generate(prompt, max_tokens=600)
         except Exception as e:
             print(f"[PATHWAY_LLM_ERROR] {e}")
             return self._fallback_pathway(eligibility_output, missing_docs)
@@ -1,15 +1,134 @@
 from .ai_agents_base import AIBaseAgent
+from .bm25_index import BM25Index
+from .facets import ANY_STATE, normalize_state, occupation_aliases
+from .facet_index import FacetIndex
+from .scheme_catalog import ReadWriteLock
+from .occupation_taxonomy import TAXONOMY_PATH, OccupationPostings, load_taxonomy
+from .stage_pool import run_stages, shared_stage_pool
+from .tracing import FULL, current_span, traced, span, verbose
+from .metrics import CANDIDATE_FALLBACKS, LEXICAL_FALLBACKS, LEXICAL_FALLBACK_SCHEMES, RETRIEVAL_CACHE, stage_timer, timed_stage
+from .faiss_store import file_version
+from .scheme_features import SchemeFeatureArrays, SchemeFeatureStore, to_float, tokenize
 from pymongo import MongoClient
+import os
 import numpy as np
+import functools
 import json
+import math
 import re
 import time
+import zlib
 from datetime import datetime
-from collections import defaultdict
+
+# Monthly income bucket width used when canonicalizing profile text
+INCOME_BUCKET_SIZE = 5000
+
+# Rerank weights, in column order of the rerank feature matrices:
+# occupation exact, occupation alias overlap, state exact, gender, income
+PROFILE_SIGNAL_WEIGHTS = np.array([0.80, 0.25, 0.20, 0.10, 0.05])
+# query token overlap, occupation token overlap
+LEXICAL_WEIGHTS = np.array([0.20, 0.20])
+# semantic, lexical boost, profile score, state candidate, occupation
+# candidate, occupation exact, state exact
+RERANK_WEIGHTS = np.array([0.60, 1.0, 0.55, 0.10, 0.22, 0.12, 0.08])
+
+
+def weighted_sum(matrix: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    matrix @ weights, accumulated one column at a time (left to right) so
+    every score rounds exactly like the scalar `w0*x0 + w1*x1 + ...` formula.
+    """
+    out = np.zeros(matrix.shape[0], dtype="float64")
+    for column, weight in enumerate(weights):
+        out += matrix[:, column] * weight
+    return out
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, ties kept in input order
+    (same result as a stable descending sort truncated to k).
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype="int64")
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+        chosen = np.sort(np.concatenate([above, ties]))
+    else:
+        chosen = np.arange(n)
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+
+def reads_catalog(method):
+    """
+    Catch up with a reloaded catalog, then run `method` with every
+    catalog-derived structure held stable (no rebuild mid-request).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._refresh_from_catalog()
+        with self._catalog_lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class PolicyRetrieverAgent(AIBaseAgent):
-    def __init__(self, faiss_indexes, llm, max_context_chars: int = 500):
-        super().__init__(faiss_indexes, llm)
+    def __init__(
+        self,
+        faiss_indexes,
+        llm,
+        max_context_chars: int = 500,
+        adaptive_search_depth: bool = False,
+        initial_search_depth: int = 40,
+        filtered_search: bool = False,
+        result_cache=None,
+        rules_file: str = "precomputed_rules_new.json",
+        catalog=None,
+        scheme_features=None,
+        lexical_index=None,
+        facet_index=None,
+        occupation_postings=None,
+        concurrent_stages: bool = False,
+        stage_pool=None,
+    ):
+        super().__init__(faiss_indexes, llm, catalog.scheme_ids if catalog is not None else None)
+
+        # Optional in-memory SchemeCatalog; Mongo is used when absent
+        self.catalog = catalog
+        # Catalog version the derived structures below were built from;
+        # requests read them under the lock, rebuilds write them
+        self.catalog_version = catalog.version if catalog is not None else None
+        self._catalog_lock = ReadWriteLock()
+
+        # Precomputed rerank features (token ids, facets); see agents/scheme_features.py
+        if scheme_features is None:
+            records = catalog.records if catalog is not None else []
+            scheme_features = SchemeFeatureStore.build(records, catalog.version if catalog is not None else None)
+        self.scheme_features = scheme_features
+        self.feature_arrays = None
+
+        # In-process BM25 index for occupation candidates and the lexical
+        # fallback; without one (and without a catalog) Mongo $regex is used
+        if lexical_index is None and catalog is not None:
+            lexical_index = BM25Index.build(catalog.records)
+            lexical_index.version = catalog.version
+        self.lexical_index = lexical_index
+
+        # Set on first use: whether scheme documents carry the facet fields
+        self.facet_fields_present = None
+
+        # In-memory bitmap facet index over ordinals (needs the catalog's ordinals)
+        if facet_index is None and catalog is not None:
+            facet_index = FacetIndex.build(catalog.records)
+        self.facet_index = facet_index
+
+        # Taxonomy occupation -> scheme posting lists (see agents/occupation_taxonomy.py)
+        if occupation_postings is None and catalog is not None:
+            occupation_postings = OccupationPostings.build(catalog.records)
+        self.occupation_postings = occupation_postings
 
         self.policy_fields = [
             "description",
@@ -25,6 +144,22 @@ class PolicyRetrieverAgent(AIBaseAgent):
 
         self.max_context_chars = max_context_chars
 
+        # Adaptive mode widens the per-field FAISS depth only when needed
+        self.adaptive_search_depth = adaptive_search_depth
+        self.initial_search_depth = initial_search_depth
+
+        # Filtered mode restricts FAISS to the state candidate set (IDSelector)
+        self.filtered_search = filtered_search
+
+        # Concurrent mode runs embedding and candidate queries on a shared pool
+        self.concurrent_stages = concurrent_stages
+        self.stage_pool = stage_pool or (shared_stage_pool() if concurrent_stages else None)
+
+        # Optional RetrievalCache; invalidated whenever corpus_version() changes
+        self.result_cache = result_cache
+        agents_dir = os.path.dirname(os.path.abspath(__file__))
+        self.rules_path = os.path.join(os.path.dirname(agents_dir), rules_file)
+
         self.field_weights = {
             "description": 0.45,
             "eligibility_text": 0.35,
@@ -32,137 +167,95 @@ class PolicyRetrieverAgent(AIBaseAgent):
             "documents_required_text": 0.05,
         }
 
-    def _normalize_text(self, value):
-        if value is None:
-            return ""
-        if isinstance(value, list):
-            return " ".join([str(v) for v in value if v is not None]).lower()
-        return str(value).lower()
+        # Fields also searched with the profile vector (profile anchors)
+        self.profile_anchor_fields = ["description", "eligibility_text"]
 
     def _tokenize(self, text: str):
-        return set(re.findall(r"[a-z0-9]+", (text or "").lower()))
+        return tokenize(text)
 
     def _occupation_aliases(self, occupation: str) -> set[str]:
-        occ = (occupation or "").strip().lower()
-        if not occ:
-            return set()
-
-        alias_map = {
-            "fisherman": {"fisherman", "fishermen", "fisher", "fisherfolk", "fishing"},
-            "farmer": {"farmer", "farmers", "agriculture", "agricultural", "cultivator"},
-            "student": {"student", "students", "learner", "education"},
-            "worker": {"worker", "labour", "labor", "employee", "unorganized"},
-            "artisan": {"artisan", "craft", "handicraft", "weaver"},
-        }
-
-        tokens = self._tokenize(occ)
-        aliases = set(tokens)
-        aliases.add(occ)
-
-        for canonical, expanded in alias_map.items():
-            if occ == canonical or canonical in tokens or len(tokens & expanded) > 0:
-                aliases |= expanded
-
-        return aliases
+        return occupation_aliases(occupation)
 
-    def _state_match(self, scheme: dict, user_state: str) -> bool:
-        if not user_state:
-            return False
-
-        user_state = user_state.strip().lower()
-        if not user_state:
-            return False
-
-        state_values = []
-        for field in ["state", "states"]:
-            value = scheme.get(field)
-            if value is None:
-                continue
-            if isinstance(value, list):
-                state_values.extend([str(v).strip().lower() for v in value if v])
-            else:
-                state_values.append(str(value).strip().lower())
-
-        if not state_values:
-            return False
-
-        return user_state in state_values
-
-    def _occupation_match(self, scheme: dict, user_occupation: str) -> bool:
-        if not user_occupation:
-            return False
-
-        user_occupation = user_occupation.strip().lower()
-        if not user_occupation:
-            return False
-        user_aliases = self._occupation_aliases(user_occupation)
+    def _to_float(self, value):
+        return to_float(value)
 
-        occ_values = []
-        value = scheme.get("occupation")
-        if value is not None:
-            if isinstance(value, list):
-                occ_values.extend([str(v).strip().lower() for v in value if v])
-            else:
-                occ_values.append(str(value).strip().lower())
-
-        if not occ_values:
-            return False
-
-        for occ in occ_values:
-            occ_tokens = self._tokenize(occ)
-            if occ in user_aliases or len(occ_tokens & user_aliases) > 0:
-                return True
-
-        return False
-
-    def _build_text_blob(self, scheme: dict) -> str:
-        parts = [
-            self._normalize_text(scheme.get("scheme_name")),
-            self._normalize_text(scheme.get("description")),
-            self._normalize_text(scheme.get("eligibility_text")),
-            self._normalize_text(scheme.get("benefits_text")),
-            self._normalize_text(scheme.get("occupation")),
-            self._normalize_text(scheme.get("state")),
-            self._normalize_text(scheme.get("states")),
-            self._normalize_text(scheme.get("category")),
-            self._normalize_text(scheme.get("ministry")),
-        ]
-        return " ".join([p for p in parts if p]).strip()
+    def _income_bucket(self, income) -> str:
+        income = self._to_float(income)
+        # "inf", "nan", "1e400" parse as floats but have no bucket
+        if income is None or not math.isfinite(income):
+            return "unknown"
+        lower = int(income // INCOME_BUCKET_SIZE) * INCOME_BUCKET_SIZE
+        return f"{lower}-{lower + INCOME_BUCKET_SIZE - 1}"
 
-    def _to_float(self, value):
-        if value is None:
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(",", "").strip()
-            return float(value)
-        except Exception:
-            return None
-
-    def _profile_signal_scores(self, scheme: dict, user_profile: dict, scheme_tokens: set[str], text_blob: str):
+    def _profile_text(self, user_profile: dict) -> str:
+        """
+        Canonical profile text for embedding: lowercased fields and bucketed
+        income, so equivalent profiles share one cached profile vector.
+        """
         occupation = str(user_profile.get("occupation") or "").strip().lower()
         state = str(user_profile.get("state") or "").strip().lower()
         gender = str(user_profile.get("gender") or "").strip().lower()
-        income = self._to_float(user_profile.get("monthly_income"))
 
-        occupation_exact = 1.0 if self._occupation_match(scheme, occupation) else 0.0
+        return (
+            f"Occupation: {occupation or 'none'}\n"
+            f"State: {state or 'none'}\n"
+            f"Gender: {gender or 'none'}\n"
+            f"Income: {self._income_bucket(user_profile.get('monthly_income'))}"
+        )
+
+    def _profile_context(self, query: str, user_profile: dict) -> dict:
+        """Per-request user-side values the rerank compares every scheme against."""
+        occupation = str(user_profile.get("occupation") or "").strip().lower()
+        return {
+            "occupation": occupation,
+            "occ_aliases": self._occupation_aliases(occupation) if occupation else set(),
+            "state": str(user_profile.get("state") or "").strip().lower(),
+            "gender": str(user_profile.get("gender") or "").strip().lower(),
+            "income": self._to_float(user_profile.get("monthly_income")),
+            "query_tokens": self._tokenize(query),
+            "occ_tokens": self._tokenize(str(user_profile.get("occupation") or "")),
+        }
+
+    def _intern_profile_context(self, ctx: dict):
+        # Token ids are looked up after scheme features exist, so schemes first
+        # seen in this request have already extended the vocabulary
+        ctx["query_ids"] = self.scheme_features.token_ids(ctx["query_tokens"])
+        ctx["occ_ids"] = self.scheme_features.token_ids(ctx["occ_tokens"])
+        ctx["alias_ids"] = self.scheme_features.token_ids(ctx["occ_aliases"])
+
+    def _lexical_overlaps(self, features, ctx: dict):
+        query_tokens = ctx["query_tokens"]
+        occ_tokens = ctx["occ_tokens"]
+        query_overlap = (len(ctx["query_ids"] & features.token_ids) / max(len(query_tokens), 1)) if query_tokens else 0.0
+        occ_overlap = (len(ctx["occ_ids"] & features.token_ids) / max(len(occ_tokens), 1)) if occ_tokens else 0.0
+        return query_overlap, occ_overlap
+
+    def _profile_signal_scores(self, features, ctx: dict):
+        occupation = ctx["occupation"]
+        occ_aliases = ctx["occ_aliases"]
+
+        occupation_exact = 0.0
         occupation_token_overlap = 0.0
         if occupation:
-            occ_aliases = self._occupation_aliases(occupation)
-            occupation_token_overlap = len(occ_aliases & scheme_tokens) / max(len(occ_aliases), 1)
+            if any(occ in occ_aliases for occ in features.occupation_norm) or (
+                features.occupation_token_ids & ctx["alias_ids"]
+            ):
+                occupation_exact = 1.0
+            occupation_token_overlap = len(ctx["alias_ids"] & features.token_ids) / max(len(occ_aliases), 1)
 
-        state_exact = 1.0 if self._state_match(scheme, state) else 0.0
+        state_exact = 1.0 if ctx["state"] and ctx["state"] in features.state_norm else 0.0
 
         gender_match = 0.0
+        gender = ctx["gender"]
         if gender:
-            rule_gender = self._normalize_text(scheme.get("gender"))
+            rule_gender = features.gender_norm
             if rule_gender and ("any" in rule_gender or gender in rule_gender):
                 gender_match = 1.0
 
         income_match = 0.0
-        max_income = self._to_float(scheme.get("max_income"))
-        if income is not None and max_income is not None:
-            if income <= max_income:
+        income = ctx["income"]
+        if income is not None and features.max_income is not None:
+            if income <= features.max_income:
                 income_match = 1.0
 
         profile_score = (
@@ -182,7 +275,511 @@ class PolicyRetrieverAgent(AIBaseAgent):
             "income_match": income_match,
         }
 
-    def _trace(self, system_trace, step, event, node, details, start_time=None):
+    @traced("retrieval.fetch_schemes")
+    def _fetch_schemes(self, scheme_ids: list, scheme_context=None) -> list:
+        """Scheme documents for ids, in the given order (request context, catalog, then Mongo)."""
+        if scheme_context is not None:
+            return scheme_context.get_many(scheme_ids)
+        if self.catalog is not None:
+            return self.catalog.get_many(scheme_ids)
+        docs = {doc["_id"]: doc for doc in self.collection.find({"_id": {"$in": scheme_ids}})}
+        return [docs[i] for i in scheme_ids if i in docs]
+
+    @traced("retrieval.candidate_space")
+    @timed_stage("candidates")
+    def _candidate_space(self, state, occupation: str) -> dict:
+        """
+        State and occupation candidate masks over scheme ordinals (STEP 4),
+        from the facet index, the Mongo facet fields or Mongo regexes.
+        """
+        candidate_ids = []
+        occupation_candidate_ids = []
+        db_filter = {}
+        state_mask = None
+        occupation_mask = None
+        use_facets = False
+
+        if self.facet_index is not None:
+            # In-memory bitmaps: no Mongo round trip, no truncation
+            candidate_backend = "facet_index"
+            if state:
+                db_filter["state_norm"] = [normalize_state(state), ANY_STATE]
+                state_mask = self._facet_mask(self.facet_index.bitmap("state", db_filter["state_norm"]))
+            if occupation:
+                db_filter["occupation_norm"] = sorted(occupation_aliases(occupation))
+                occupation_mask = self._facet_mask(self.facet_index.bitmap("occupation", db_filter["occupation_norm"]))
+
+        else:
+            use_facets = self._has_facet_fields()
+            candidate_backend = "mongo_facets" if use_facets else "mongo_regex"
+
+        if use_facets:
+            # Indexed $in equality on the normalized facet fields, one round trip
+            candidate_ids, occupation_candidate_ids, db_filter = self._facet_candidates(state, occupation)
+
+        elif state and candidate_backend == "mongo_regex":
+            safe_state = re.escape(str(state).strip())
+            db_filter = {
+                "$or": [
+                    {"state": {"$regex": f"^{safe_state}$", "$options": "i"}},
+                    {"states": {"$regex": f"^{safe_state}$", "$options": "i"}},
+                    {"states": {"$elemMatch": {"$regex": f"^{safe_state}$", "$options": "i"}}},
+                    # Schemes with no state restriction at all, and Central
+                    # schemes stored with the ingest placeholder state
+                    {"state": None, "states": None},
+                    {"level": "Central"},
+                    {"state": {"$regex": r"\(\s*applicable\s*\)\s*$", "$options": "i"}}
+                ]
+            }
+
+            cursor = self.collection.find(db_filter, {"_id": 1})
+            if not self.filtered_search:
+                # Only a boost signal here; a FAISS allow-list must be complete
+                cursor = cursor.limit(300)
+            candidate_ids = [doc["_id"] for doc in cursor]
+
+        if state_mask is None:
+            state_mask = self._ids_mask(candidate_ids)
+        if occupation_mask is None:
+            occupation_mask = self._ids_mask(occupation_candidate_ids)
+
+        fallback_used = not state_mask.any()
+        if fallback_used:
+            if self.facet_index is not None:
+                state_mask = self._facet_mask(self.facet_index.all())
+            else:
+                fallback_cursor = self.collection.find({}, {"_id": 1}).limit(300)
+                state_mask = self._ids_mask([doc["_id"] for doc in fallback_cursor])
+
+        # Occupation-intent candidates (helps when semantic search drifts);
+        # taxonomy postings / BM25 text matches are added to the facet matches
+        if occupation and (
+            self._current_occupation_postings() is not None
+            or self.lexical_index is not None
+            or candidate_backend == "mongo_regex"
+        ):
+            occupation_mask |= self._ids_mask(self._occupation_candidates(occupation))
+
+        return {
+            "state_mask": state_mask,
+            "occupation_mask": occupation_mask,
+            "db_filter": db_filter,
+            "candidate_backend": candidate_backend,
+            "fallback_used": fallback_used,
+        }
+
+    @traced("retrieval.embedding")
+    @timed_stage("embedding")
+    def _embed_query_and_profile(self, query: str, profile_text: str) -> tuple:
+        """(query_vector, profile_vector, batched): one batched encode when the LLM supports it."""
+        if hasattr(self.llm, "get_embeddings"):
+            query_vector, profile_vector = self.llm.get_embeddings([query, profile_text])
+            return query_vector, profile_vector, True
+        return self.llm.get_embedding(query), self.llm.get_embedding(profile_text), False
+
+    def _ids_mask(self, scheme_ids) -> np.ndarray:
+        """Boolean ordinal mask of scheme ids (ids outside the ordinal space are ignored)."""
+        return self.ordinal_mask([self.scheme_ordinals[i] for i in scheme_ids if i in self.scheme_ordinals])
+
+    def _facet_mask(self, bitmap) -> np.ndarray:
+        """FacetIndex bitmap -> ordinal mask sized to this agent's ordinal space."""
+        mask = self.facet_index.mask(bitmap)
+        n = len(self.scheme_ids)
+        if len(mask) >= n:
+            return mask[:n].copy()
+        return np.concatenate([mask, np.zeros(n - len(mask), dtype=bool)])
+
+    def _has_facet_fields(self) -> bool:
+        """Whether ingest wrote the normalized facet fields (checked once)."""
+        if self.facet_fields_present is None:
+            self.facet_fields_present = self.collection.find_one(
+                {"state_norm": {"$exists": True}}, {"_id": 1}
+            ) is not None
+        return self.facet_fields_present
+
+    def _facet_candidates(self, state, occupation: str):
+        """
+        State and occupation candidate ids from one aggregation over the
+        facet fields (see agents/facets.py). Returns (state_ids,
+        occupation_ids, match_filter).
+        """
+        matches = {}
+        if state:
+            matches["state"] = {"state_norm": {"$in": [normalize_state(state), ANY_STATE]}}
+        if occupation:
+            matches["occupation"] = {"occupation_norm": {"$in": sorted(occupation_aliases(occupation))}}
+        if not matches:
+            return [], [], {}
+
+        db_filter = {"$or": list(matches.values())}
+        pipeline = [
+            # $facet sub-pipelines cannot use indexes, so the indexed $match runs first
+            {"$match": db_filter},
+            {"$project": {"_id": 1, "state_norm": 1, "occupation_norm": 1}},
+            {"$facet": {
+                name: [{"$match": match}, {"$project": {"_id": 1}}]
+                for name, match in matches.items()
+            }},
+        ]
+        result = next(iter(self.collection.aggregate(pipeline)), {})
+
+        return (
+            [doc["_id"] for doc in result.get("state", [])],
+            [doc["_id"] for doc in result.get("occupation", [])],
+            db_filter,
+        )
+
+    def _current_occupation_postings(self):
+        """
+        The taxonomy postings, rebuilt from the catalog (or dropped without
+        one) once occupation_taxonomy.json changes under them.
+        """
+        postings = self.occupation_postings
+        if postings is None or postings.matches():
+            return postings
+
+        if self.catalog is not None:
+            postings = OccupationPostings.build(self.catalog.records)
+        else:
+            # Dropped until they are rebuilt
+            current_span().set(occupation_postings_dropped=True)
+            postings = None
+        self.occupation_postings = postings
+        return postings
+
+    def _occupation_candidates(self, occupation: str) -> list:
+        """
+        Ids of schemes whose text mentions the occupation or one of its
+        aliases: precomputed taxonomy postings for known occupations, else
+        BM25, else Mongo $regex.
+        """
+        postings = self._current_occupation_postings()
+        if postings is not None and load_taxonomy().detect(occupation):
+            return postings.candidates(occupation)
+
+        occ_aliases = self._occupation_aliases(occupation)
+
+        if self.lexical_index is not None:
+            tokens = set()
+            for occ in occ_aliases:
+                tokens |= self._tokenize(occ)
+            return [scheme_id for scheme_id, _ in self.lexical_index.search(tokens, limit=500)]
+
+        occ_or = []
+        for occ in list(occ_aliases)[:8]:
+            safe = re.escape(occ)
+            occ_or.extend([
+                {"occupation": {"$regex": safe, "$options": "i"}},
+                {"description": {"$regex": safe, "$options": "i"}},
+                {"eligibility_text": {"$regex": safe, "$options": "i"}},
+                {"scheme_name": {"$regex": safe, "$options": "i"}},
+                {"category": {"$regex": safe, "$options": "i"}},
+            ])
+
+        if not occ_or:
+            return []
+        occ_cursor = self.collection.find({"$or": occ_or}, {"_id": 1}).limit(500)
+        return [doc["_id"] for doc in occ_cursor]
+
+    @traced("retrieval.lexical_fallback")
+    @timed_stage("lexical_fallback")
+    def _lexical_fallback_docs(self, query_text: str, occupation_text: str, limit: int, scheme_context=None) -> list:
+        """
+        [(scheme, lexical_score)] for the query/occupation terms, best first.
+        BM25 scores are scaled to 0–1 against the best hit; the Mongo $regex
+        path (no lexical index) has no relevance score and uses 1.0.
+        """
+        if self.lexical_index is not None:
+            hits = self.lexical_index.search(self._tokenize(query_text) | self._tokenize(occupation_text), limit=limit)
+            if not hits:
+                return []
+            best = hits[0][1]
+            scores = dict(hits)
+            docs = self._fetch_schemes([i for i, _ in hits], scheme_context)
+            return [(doc, scores[str(doc["_id"])] / best) for doc in docs]
+
+        or_clauses = []
+        for token in [query_text, occupation_text]:
+            if not token:
+                continue
+            safe = re.escape(token)
+            or_clauses.extend([
+                {"scheme_name": {"$regex": safe, "$options": "i"}},
+                {"description": {"$regex": safe, "$options": "i"}},
+                {"eligibility_text": {"$regex": safe, "$options": "i"}},
+                {"occupation": {"$regex": safe, "$options": "i"}},
+                {"category": {"$regex": safe, "$options": "i"}},
+            ])
+
+        if not or_clauses:
+            return []
+        docs = list(self.collection.find({"$or": or_clauses}).limit(limit))
+        if scheme_context is not None:
+            scheme_context.add(docs)
+        return [(doc, 1.0) for doc in docs]
+
+    def _feature_arrays(self) -> SchemeFeatureArrays:
+        """Ordinal-aligned feature arrays, rebuilt when the feature store changed or grew."""
+        arrays = self.feature_arrays
+        store = self.scheme_features
+        if (
+            arrays is None
+            or arrays.store is not store
+            or arrays.n_features != len(store.features)
+            or arrays.vocab_size != len(store.vocab)
+        ):
+            arrays = self.feature_arrays = SchemeFeatureArrays(store, self.scheme_ids)
+        return arrays
+
+    @traced("retrieval.rerank")
+    @timed_stage("rerank")
+    def _rerank_candidates(self, candidate_docs, semantic, state_mask, occupation_mask, ctx, top_k) -> list[dict]:
+        """
+        Vectorized hybrid rerank of the semantic candidate pool: one row per
+        candidate, one column per signal, weights applied with
+        `weighted_sum`. Returns the top_k rerank entries (profile-consistent
+        schemes first when there are enough of them).
+        """
+        for scheme in candidate_docs:
+            self.scheme_features.get(scheme)
+        self._intern_profile_context(ctx)
+        arrays = self._feature_arrays()
+
+        docs = [d for d in candidate_docs if d.get("_id") in self.scheme_ordinals]
+        ordinals = np.fromiter((self.scheme_ordinals[d.get("_id")] for d in docs), dtype="int64", count=len(docs))
+        if not len(ordinals):
+            return []
+
+        n = len(ordinals)
+        zeros = np.zeros(n, dtype="float64")
+
+        query_tokens = ctx["query_tokens"]
+        occ_tokens = ctx["occ_tokens"]
+        query_overlap = arrays.token_hits(ordinals, ctx["query_ids"]) / max(len(query_tokens), 1) if query_tokens else zeros
+        occ_overlap = arrays.token_hits(ordinals, ctx["occ_ids"]) / max(len(occ_tokens), 1) if occ_tokens else zeros
+
+        if ctx["occupation"]:
+            occupation_exact = (
+                (arrays.occupation_value_hits(ordinals, ctx["occ_aliases"]) > 0)
+                | (arrays.occupation_token_hits(ordinals, ctx["alias_ids"]) > 0)
+            ).astype("float64")
+            occupation_token_overlap = arrays.token_hits(ordinals, ctx["alias_ids"]) / max(len(ctx["occ_aliases"]), 1)
+        else:
+            occupation_exact = occupation_token_overlap = zeros
+
+        state_exact = (arrays.state_hits(ordinals, ctx["state"]) > 0).astype("float64") if ctx["state"] else zeros
+        gender_match = arrays.gender_matches(ordinals, ctx["gender"]).astype("float64") if ctx["gender"] else zeros
+        income_match = arrays.income_matches(ordinals, ctx["income"]).astype("float64") if ctx["income"] is not None else zeros
+
+        profile_score = weighted_sum(
+            np.column_stack([occupation_exact, occupation_token_overlap, state_exact, gender_match, income_match]),
+            PROFILE_SIGNAL_WEIGHTS,
+        )
+        lexical_boost = weighted_sum(np.column_stack([query_overlap, occ_overlap]), LEXICAL_WEIGHTS)
+
+        candidate_semantic = semantic[ordinals]
+        features = np.column_stack([
+            candidate_semantic,
+            lexical_boost,
+            profile_score,
+            state_mask[ordinals],
+            occupation_mask[ordinals],
+            occupation_exact,
+            state_exact,
+        ])
+        final_score = weighted_sum(features, RERANK_WEIGHTS)
+
+        # Hard-prioritize profile-consistent schemes when possible
+        strongly_profiled = (occupation_exact > 0) | (profile_score >= 0.35) | (state_exact > 0)
+        if np.count_nonzero(strongly_profiled) >= max(3, top_k // 2):
+            selected = np.flatnonzero(strongly_profiled)
+        else:
+            selected = np.arange(n)
+        selected = selected[top_k_indices(final_score[selected], top_k)]
+
+        return [
+            {
+                "scheme": docs[i],
+                "score": float(final_score[i]),
+                "semantic": float(candidate_semantic[i]),
+                "query_overlap": float(query_overlap[i]),
+                "occupation_overlap": float(occ_overlap[i]),
+                "profile_score": float(profile_score[i]),
+                "occupation_exact": float(occupation_exact[i]),
+                "state_exact": float(state_exact[i]),
+            }
+            for i in selected
+        ]
+
+    def _fuse_field_scores(self, field_scores: dict, search_fields: list) -> np.ndarray:
+        semantic = np.zeros(len(self.scheme_ids), dtype="float64")
+        for field in search_fields:
+            semantic += field_scores[field][0] * self.field_weights[field]
+
+        # Small profile-anchor retrieval to retain strong user-profile relevance
+        for field in self.profile_anchor_fields:
+            if field in field_scores:
+                semantic += field_scores[field][1] * 0.10
+
+        return semantic
+
+    def _pool_is_stable(self, semantic, field_scores, search_fields, row_k, row_open, pool_cap) -> bool:
+        """
+        True when no scheme outside the current top-`pool_cap` semantic pool
+        could overtake the pool's weakest member at a deeper search.
+
+        A scheme missing from an open (row, field) result list can score at
+        most that list's last retrieved similarity there, so its fused score
+        is bounded by its current score plus those weighted tails.
+        """
+        upper = semantic.copy()
+        for field in search_fields:
+            weights = [self.field_weights[field], 0.10 if field in self.profile_anchor_fields else 0.0]
+            for row, weight in enumerate(weights):
+                if not weight or not row_open[row]:
+                    continue
+                scores = field_scores[field][row]
+                hits = scores > 0
+                if np.count_nonzero(hits) < row_k[row]:
+                    # Index exhausted for this row: nothing left unseen
+                    continue
+                tail = scores[hits].min()
+                upper[~hits] += weight * tail
+
+        n_hits = int(np.count_nonzero(semantic))
+        if n_hits < pool_cap:
+            return bool(np.all(upper[semantic == 0] <= 0))
+
+        pool = np.argpartition(-semantic, pool_cap - 1)[:pool_cap]
+        threshold = semantic[pool].min()
+        outside = np.ones(len(semantic), dtype=bool)
+        outside[pool] = False
+        return bool(np.all(upper[outside] <= threshold))
+
+    @traced("retrieval.faiss_search")
+    @timed_stage("faiss_search")
+    def _semantic_search(self, query_vector, profile_vector, top_k: int, allowed_ordinals=None):
+        """
+        Multi-field FAISS retrieval + score fusion. Returns the fused semantic
+        score per scheme ordinal and the search details for the trace.
+
+        In adaptive mode the search starts shallow and doubles its depth only
+        while the candidate pool (max(top_k*15, 120)) is not yet stable.
+        `allowed_ordinals` restricts every field search to those schemes.
+        """
+        expanded_k = max(top_k * 8, 40)
+        profile_k = max(top_k * 4, 20)
+        search_fields = [f for f in self.field_weights if f in self.faiss_indexes]
+        vectors = np.vstack([query_vector, profile_vector])
+
+        if self.adaptive_search_depth:
+            pool_cap = max(top_k * 15, 120)
+            max_depth = max([self.faiss_indexes[f]["index"].ntotal for f in search_fields] or [0])
+            depth = min(max(self.initial_search_depth, top_k), max(max_depth, 1))
+            widening_rounds = 0
+            calls = 0
+
+            while True:
+                row_k = [depth, min(depth, profile_k)]
+                # The profile anchor is capped at profile_k by design
+                row_open = [depth < max_depth, depth < min(profile_k, max_depth)]
+
+                field_scores = self.retrieve_multi_field_scores(
+                    vectors, search_fields, row_k, allowed_ordinals=allowed_ordinals
+                )
+                calls += len(search_fields)
+                semantic = self._fuse_field_scores(field_scores, search_fields)
+
+                if not any(row_open) or self._pool_is_stable(
+                    semantic, field_scores, search_fields, row_k, row_open, pool_cap
+                ):
+                    break
+
+                depth = min(depth * 2, max_depth)
+                widening_rounds += 1
+
+            search_mode = "adaptive"
+        else:
+            # Query and profile vectors are searched together: one FAISS call per field
+            row_k = [expanded_k, profile_k]
+            field_scores = self.retrieve_multi_field_scores(
+                vectors, search_fields, row_k, allowed_ordinals=allowed_ordinals
+            )
+            semantic = self._fuse_field_scores(field_scores, search_fields)
+            depth = expanded_k
+            widening_rounds = 0
+            calls = len(search_fields)
+            search_mode = "fixed"
+
+        search_info = self._search_info(
+            search_mode, depth, widening_rounds, calls, allowed_ordinals, field_scores, search_fields
+        )
+        current_span().set(search_mode=search_mode, search_depth=depth, faiss_search_calls=calls)
+        return semantic, search_info
+
+    def _search_info(self, search_mode, depth, widening_rounds, calls, allowed_ordinals, field_scores, search_fields) -> dict:
+        return {
+            "search_mode": search_mode,
+            "search_depth": depth,
+            "widening_rounds": widening_rounds,
+            "faiss_search_calls": calls,
+            "filtered": allowed_ordinals is not None,
+            "allowed_candidates": None if allowed_ordinals is None else int(np.count_nonzero(allowed_ordinals)),
+            "field_retrieval": [
+                {
+                    "field": field,
+                    "weight": self.field_weights[field],
+                    "hits": int(np.count_nonzero(field_scores[field][0]))
+                }
+                for field in search_fields
+            ],
+        }
+
+    @traced("retrieval.faiss_search_batch")
+    def _semantic_search_batch(self, query_vectors, profile_vectors, top_k: int, allowed_ordinals=None) -> list:
+        """
+        `_semantic_search` for several (query, profile) pairs sharing one
+        `allowed_ordinals`. In fixed mode all query and profile vectors are
+        stacked into one matrix (queries first, then profiles), so each field
+        index is searched once for the whole batch; every row is searched at
+        the same depth as the single path, so per-item scores are identical.
+        Adaptive depth is decided per item and falls back to single searches.
+        """
+        if self.adaptive_search_depth:
+            return [
+                self._semantic_search(query_vector, profile_vector, top_k, allowed_ordinals)
+                for query_vector, profile_vector in zip(query_vectors, profile_vectors)
+            ]
+
+        n_items = len(query_vectors)
+        expanded_k = max(top_k * 8, 40)
+        profile_k = max(top_k * 4, 20)
+        search_fields = [f for f in self.field_weights if f in self.faiss_indexes]
+
+        vectors = np.vstack(list(query_vectors) + list(profile_vectors))
+        row_k = [expanded_k] * n_items + [profile_k] * n_items
+        batch_scores = self.retrieve_multi_field_scores(
+            vectors, search_fields, row_k, allowed_ordinals=allowed_ordinals
+        )
+
+        searches = []
+        for item in range(n_items):
+            field_scores = {
+                field: scores[[item, n_items + item]] for field, scores in batch_scores.items()
+            }
+            semantic = self._fuse_field_scores(field_scores, search_fields)
+            search_info = self._search_info(
+                "fixed", expanded_k, 0, len(search_fields), allowed_ordinals, field_scores, search_fields
+            )
+            search_info["batch_size"] = n_items
+            searches.append((semantic, search_info))
+        return searches
+
+    def _trace(self, system_trace, step, event, node, details, start_time=None, latency_ms=None):
+        # The _system trace is only built for callers that asked for one
+        if system_trace is None:
+            return
+
         entry = {
             "step": step,
             "event": event,
@@ -193,39 +790,121 @@ class PolicyRetrieverAgent(AIBaseAgent):
 
         if start_time:
             entry["latency_ms"] = round((time.time() - start_time) * 1000, 2)
+        elif latency_ms is not None:
+            entry["latency_ms"] = latency_ms
 
         system_trace.append(entry)
 
-    # ---------------------------
-    # Main method
-    # ---------------------------
-    def retrieve_policies(
-    self,
-    query: str,
-    user_profile: dict,
-    top_k: int = 25,
-    system_trace: list | None = None
-) -> list[dict]:
-
+    def _trace_completed(self, system_trace, overall_start, cache_hit=False):
+        current_span().set(cache_hit=cache_hit)
         if system_trace is None:
-            system_trace = []
+            return
 
-        overall_start = time.time()
+        total_latency = round((time.time() - overall_start) * 1000, 2)
 
-        # -------------------------
-        # STEP 2 — Semantic Query
-        # -------------------------
-        step_start = time.time()
+        system_trace.append({
+            "step": 8,
+            "event": "RETRIEVAL_PIPELINE_COMPLETED",
+            "node": "POLICY_RETRIEVER",
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "latency_ms": total_latency,
+            "details": {
+                "total_latency_ms": total_latency,
+                "cache_hit": cache_hit
+            }
+        })
 
-        profile_text = f"""
-        Occupation: {user_profile.get("occupation")}
-        State: {user_profile.get("state")}
-        Gender: {user_profile.get("gender")}
-        Income: {user_profile.get("monthly_income")}
+    def corpus_version(self) -> tuple:
         """
+        Version of everything a cached ranking depends on: the loaded field
+        indexes, the precomputed rules file on disk, the scheme catalog, the
+        lexical index and the occupation taxonomy.
+        """
+        index_versions = tuple(
+            (field, data.get("version"), data["index"].ntotal)
+            for field, data in sorted(self.faiss_indexes.items())
+        )
+        catalog_version = self.catalog.version if self.catalog is not None else None
+        lexical_version = self.lexical_index.version if self.lexical_index is not None else None
+        version = (
+            index_versions,
+            file_version(self.rules_path),
+            catalog_version,
+            lexical_version,
+            file_version(TAXONOMY_PATH),
+        )
+        return version + (format(zlib.crc32(repr(version).encode()), "08x"),)
 
-        full_query = f"{query}. {profile_text}"
+    def warm_up(self, entries: list, top_k: int = 10) -> int:
+        """
+        Replay (query, user_profile) pairs, e.g. the most frequent entries of
+        the query log, to populate the result cache. Returns how many ran.
+        """
+        warmed = 0
+        for query, user_profile in entries:
+            try:
+                self.retrieve_policies(query=query, user_profile=user_profile, top_k=top_k)
+                warmed += 1
+            except Exception as e:
+                print(f"⚠️ Cache warm-up failed for '{query}': {e}")
+        return warmed
+
+    # ---------------------------
+    # Shared pipeline stages
+    # ---------------------------
+    def _refresh_from_catalog(self):
+        """Rebuild the catalog-derived structures after the catalog reloaded."""
+        if self.catalog is None:
+            return
+        self.catalog.maybe_refresh()
+        if self.catalog.version == self.catalog_version:
+            return
+
+        # Waits for requests in flight; one rebuild per catalog version
+        with self._catalog_lock.write():
+            version = self.catalog.version
+            if version == self.catalog_version:
+                return
+            records = self.catalog.records
+
+            # Schemes appended by the reload get ordinals here too
+            self._extend_ordinal_space(self.catalog.scheme_ids[:len(records)])
+            self.scheme_features = SchemeFeatureStore.build(records, version)
+            self.lexical_index = BM25Index.build(records)
+            self.lexical_index.version = version
+            self.facet_fields_present = None
+            if self.facet_index is not None:
+                self.facet_index.sync(records)
+            self.occupation_postings = OccupationPostings.build(records)
+            self.catalog_version = version
+
+    @traced("retrieval.cache_lookup")
+    def _cached_results(self, query, user_profile, top_k, system_trace, overall_start) -> tuple:
+        """(cache_key, corpus_version, cached results or None); traces a hit."""
+        if self.result_cache is None:
+            return None, None, None
+
+        corpus_version = self.corpus_version()
+        cache_key = self.result_cache.make_key(query, user_profile, top_k)
+        cached = self.result_cache.get(cache_key, corpus_version)
+        RETRIEVAL_CACHE.inc(result="hit" if cached is not None else "miss")
+
+        if cached is not None:
+            self._trace(system_trace, 2,
+                "RETRIEVAL_CACHE_HIT",
+                "RETRIEVAL_CACHE",
+                {
+                    "returned": len(cached),
+                    "corpus_version": corpus_version[-1],
+                    "cache": self.result_cache.stats()
+                },
+                overall_start
+            )
+            self._trace_completed(system_trace, overall_start, cache_hit=True)
 
+        return cache_key, corpus_version, cached
+
+    def _trace_query_constructed(self, system_trace, full_query, step_start):
         self._trace(system_trace, 2,
             "SEMANTIC_QUERY_CONSTRUCTED",
             "POLICY_RETRIEVER",
@@ -236,122 +915,69 @@ class PolicyRetrieverAgent(AIBaseAgent):
             step_start
         )
 
-        # Embeddings: keep user query and profile context separate for better control
-        step_start = time.time()
-        query_vector = self.llm.get_embedding(query)
-        profile_vector = self.llm.get_embedding(profile_text)
+    def _trace_stages(self, system_trace, embedding_dimension, batched, candidates, occupation, stage_timing, batch_size=None):
+        """Steps 3-4: embedding, candidate space and the stage join."""
+        if system_trace is None:
+            return
+
+        state_mask = candidates["state_mask"]
+        candidate_backend = candidates["candidate_backend"]
 
         self._trace(system_trace, 3,
             "QUERY_EMBEDDED",
             "VECTOR_ENCODER",
             {
                 "embedding_type": "semantic_vector",
-                "embedding_dimension": len(query_vector),
-                "query_strategy": "hybrid_query_plus_profile"
+                "embedding_dimension": embedding_dimension,
+                "query_strategy": "hybrid_query_plus_profile",
+                "batched_encode": batched
             },
-            step_start
+            latency_ms=stage_timing["stages"]["embedding"]["latency_ms"]
         )
-        step_start = time.time()
-
-        state = user_profile.get("state")
-        occupation = str(user_profile.get("occupation") or "").strip().lower()
-        candidate_ids = []
-        occupation_candidate_ids = []
-        db_filter = {}
-
-        if state:
-            db_filter = {
-                "$or": [
-                    {"state": {"$regex": f"^{state}$", "$options": "i"}},
-                    {"states": {"$regex": f"^{state}$", "$options": "i"}},
-                    {"states": {"$elemMatch": {"$regex": f"^{state}$", "$options": "i"}}},
-                    {"state": None},          
-                    {"states": None}
-                ]
-            }
-
-            cursor = self.collection.find(db_filter, {"_id": 1}).limit(300)
-            candidate_ids = [doc["_id"] for doc in cursor]
-
-
-        if not candidate_ids:
-            fallback_cursor = self.collection.find({}, {"_id": 1}).limit(300)
-            candidate_ids = [doc["_id"] for doc in fallback_cursor]
-            fallback_used = True
-        else:
-            fallback_used = False
-
-        # Occupation-intent candidates (helps when semantic search drifts)
-        if occupation:
-            occ_aliases = list(self._occupation_aliases(occupation))[:8]
-            occ_or = []
-            for occ in occ_aliases:
-                safe = re.escape(occ)
-                occ_or.extend([
-                    {"occupation": {"$regex": safe, "$options": "i"}},
-                    {"description": {"$regex": safe, "$options": "i"}},
-                    {"eligibility_text": {"$regex": safe, "$options": "i"}},
-                    {"scheme_name": {"$regex": safe, "$options": "i"}},
-                    {"category": {"$regex": safe, "$options": "i"}},
-                ])
-
-            if occ_or:
-                occ_cursor = self.collection.find({"$or": occ_or}, {"_id": 1}).limit(500)
-                occupation_candidate_ids = [doc["_id"] for doc in occ_cursor]
-
 
         self._trace(system_trace, 4,
             "CANDIDATE_SPACE_REDUCED",
-            "MONGODB",
+            "MONGODB" if candidate_backend != "facet_index" else "FACET_INDEX",
             {
-                "db_filter_applied": db_filter if state else "none",
-                "candidates_considered": len(candidate_ids),
-                "occupation_candidates_considered": len(occupation_candidate_ids),
-                "fallback_to_full_corpus": fallback_used,
-                "sample_candidate_ids": [str(cid) for cid in candidate_ids[:5]]
+                "db_filter_applied": candidates["db_filter"] or "none",
+                "candidate_backend": candidate_backend,
+                "candidates_considered": int(np.count_nonzero(state_mask)),
+                "occupation_candidates_considered": int(np.count_nonzero(candidates["occupation_mask"])),
+                "lexical_backend": "bm25" if self.lexical_index is not None else "mongo_regex",
+                "occupations_detected": sorted(load_taxonomy().detect(occupation)) if occupation else [],
+                "fallback_to_full_corpus": candidates["fallback_used"],
+                "sample_candidate_ids": [str(self.scheme_ids[o]) for o in np.flatnonzero(state_mask)[:5]]
             },
-            step_start
+            latency_ms=stage_timing["stages"]["candidates"]["latency_ms"]
         )
 
-        # -------------------------
-        # STEP 5 — Multi-field FAISS Retrieval + score fusion
-        # -------------------------
-        step_start = time.time()
-
-        semantic_scores = defaultdict(float)
-        retrieval_debug = []
-        expanded_k = max(top_k * 8, 40)
-
-        for field, weight in self.field_weights.items():
-            if field not in self.faiss_indexes:
-                continue
-
-            field_doc_ids, field_scores = self.retrieve_similar_docs_with_scores(
-                query_vector,
-                field,
-                expanded_k
-            )
-
-            for doc_id, score in zip(field_doc_ids, field_scores):
-                semantic_scores[doc_id] += float(score) * weight
-
-            retrieval_debug.append({
-                "field": field,
-                "weight": weight,
-                "hits": len(field_doc_ids)
-            })
+        details = {
+            "execution_mode": stage_timing["mode"],
+            "stages": stage_timing["stages"],
+            "critical_path_ms": stage_timing["critical_path_ms"],
+            "sum_of_stages_ms": stage_timing["sum_of_stages_ms"]
+        }
+        if batch_size is not None:
+            details["batch_size"] = batch_size
+        self._trace(system_trace, 4, "RETRIEVAL_STAGES_JOINED", "STAGE_EXECUTOR", details)
+
+    def _allowed_ordinals(self, state, candidates):
+        # Filtered mode: schemes outside the user's state are never scored
+        if self.filtered_search and state and not candidates["fallback_used"]:
+            return candidates["state_mask"]
+        return None
+
+    def _rank_and_materialize(self, query, user_profile, top_k, semantic, search_info, candidates,
+                              system_trace, search_latency_ms, scheme_context=None) -> list[dict]:
+        """
+        Steps 5-7 for one request, given its fused semantic scores. Scheme
+        documents are loaded through `scheme_context` when given, so later
+        stages of the request find them there.
+        """
+        state_mask = candidates["state_mask"]
+        occupation_mask = candidates["occupation_mask"]
 
-        # Small profile-anchor retrieval to retain strong user-profile relevance
-        for field in ["description", "eligibility_text"]:
-            if field not in self.faiss_indexes:
-                continue
-            prof_doc_ids, prof_scores = self.retrieve_similar_docs_with_scores(
-                profile_vector,
-                field,
-                max(top_k * 4, 20)
-            )
-            for doc_id, score in zip(prof_doc_ids, prof_scores):
-                semantic_scores[doc_id] += float(score) * 0.10
+        semantic_hits = np.flatnonzero(semantic)
 
         self._trace(system_trace, 5,
             "FAISS_SIMILARITY_SEARCH",
@@ -359,11 +985,17 @@ class PolicyRetrieverAgent(AIBaseAgent):
             {
                 "similarity_metric": "cosine",
                 "top_k": top_k,
-                "expanded_k_per_field": expanded_k,
-                "field_retrieval": retrieval_debug,
-                "unique_candidates": len(semantic_scores)
+                "search_mode": search_info["search_mode"],
+                "expanded_k_per_field": search_info["search_depth"],
+                "search_depth": search_info["search_depth"],
+                "widening_rounds": search_info["widening_rounds"],
+                "faiss_search_calls": search_info["faiss_search_calls"],
+                "filtered_search": search_info["filtered"],
+                "allowed_candidates": search_info["allowed_candidates"],
+                "field_retrieval": search_info["field_retrieval"],
+                "unique_candidates": len(semantic_hits)
             },
-            step_start
+            latency_ms=search_latency_ms
         )
 
         # -------------------------
@@ -372,126 +1004,62 @@ class PolicyRetrieverAgent(AIBaseAgent):
         step_start = time.time()
 
         candidate_docs = []
-        if semantic_scores:
-            semantic_sorted_ids = [
-                doc_id for doc_id, _ in sorted(
-                    semantic_scores.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )
-            ]
-            candidate_pool_ids = semantic_sorted_ids[: max(top_k * 15, 120)]
-            candidate_docs = list(self.collection.find({"_id": {"$in": candidate_pool_ids}}))
-
-        state_set = set(candidate_ids) if candidate_ids else set()
-        occupation_set = set(occupation_candidate_ids) if occupation_candidate_ids else set()
-        query_tokens = self._tokenize(query)
-        occ_tokens = self._tokenize(str(user_profile.get("occupation") or ""))
+        if len(semantic_hits):
+            pool = semantic_hits[top_k_indices(semantic[semantic_hits], max(top_k * 15, 120))]
+            candidate_docs = self._fetch_schemes([self.scheme_ids[ordinal] for ordinal in pool], scheme_context)
 
-        reranked = []
+        profile_ctx = self._profile_context(query, user_profile)
         query_text = (query or "").strip().lower()
-        occupation_text = str(user_profile.get("occupation") or "").strip().lower()
-        for scheme in candidate_docs:
-            scheme_id = scheme.get("_id")
-            if scheme_id not in semantic_scores:
-                continue
-
-            semantic = float(semantic_scores[scheme_id])
-            text_blob = self._build_text_blob(scheme)
-            scheme_tokens = self._tokenize(text_blob)
-
-            query_overlap = (len(query_tokens & scheme_tokens) / max(len(query_tokens), 1)) if query_tokens else 0.0
-            occ_overlap = (len(occ_tokens & scheme_tokens) / max(len(occ_tokens), 1)) if occ_tokens else 0.0
-
-            state_boost = 0.10 if scheme_id in state_set else 0.0
-            occupation_candidate_boost = 0.22 if scheme_id in occupation_set else 0.0
-            occupation_boost = 0.12 if self._occupation_match(scheme, user_profile.get("occupation", "")) else 0.0
-            explicit_state_boost = 0.08 if self._state_match(scheme, user_profile.get("state", "")) else 0.0
-
-            lexical_boost = (0.20 * query_overlap) + (0.20 * occ_overlap)
-            profile_signals = self._profile_signal_scores(scheme, user_profile, scheme_tokens, text_blob)
-
-            final_score = (
-                (0.60 * semantic)
-                + lexical_boost
-                + (0.55 * profile_signals["profile_score"])
-                + state_boost
-                + occupation_candidate_boost
-                + occupation_boost
-                + explicit_state_boost
-            )
-
-            reranked.append({
-                "scheme": scheme,
-                "score": final_score,
-                "semantic": semantic,
-                "query_overlap": query_overlap,
-                "occupation_overlap": occ_overlap,
-                "profile_score": profile_signals["profile_score"],
-                "occupation_exact": profile_signals["occupation_exact"],
-                "state_exact": profile_signals["state_exact"],
-            })
-
-        reranked.sort(key=lambda x: x["score"], reverse=True)
+        occupation_text = profile_ctx["occupation"]
 
-        # Hard-prioritize profile-consistent schemes when possible
-        strongly_profiled = [
-            r for r in reranked
-            if (r["occupation_exact"] > 0 or r["profile_score"] >= 0.35 or r["state_exact"] > 0)
-        ]
-
-        if len(strongly_profiled) >= max(3, top_k // 2):
-            reranked = strongly_profiled[:top_k]
-        else:
-            reranked = reranked[:top_k]
+        reranked = self._rerank_candidates(
+            candidate_docs, semantic, state_mask, occupation_mask, profile_ctx, top_k
+        )
+        current_span().set(semantic_candidates=len(semantic_hits), rerank_pool=len(candidate_docs))
 
         # If still weak, apply lexical fallback from MongoDB using query/profile terms
+        fallback_added = 0
         if len(reranked) < top_k and (query_text or occupation_text):
-            or_clauses = []
-            for token in [query_text, occupation_text]:
-                if not token:
+            existing_ids = {str(r["scheme"]["_id"]) for r in reranked}
+            fallback_hits = self._lexical_fallback_docs(query_text, occupation_text, top_k * 3, scheme_context)
+            fallback_features = [self.scheme_features.get(doc) for doc, _ in fallback_hits]
+            self._intern_profile_context(profile_ctx)
+            for (doc, lexical_score), features in zip(fallback_hits, fallback_features):
+                sid = str(doc.get("_id"))
+                if sid in existing_ids:
                     continue
-                safe = re.escape(token)
-                or_clauses.extend([
-                    {"scheme_name": {"$regex": safe, "$options": "i"}},
-                    {"description": {"$regex": safe, "$options": "i"}},
-                    {"eligibility_text": {"$regex": safe, "$options": "i"}},
-                    {"occupation": {"$regex": safe, "$options": "i"}},
-                    {"category": {"$regex": safe, "$options": "i"}},
-                ])
-
-            if or_clauses:
-                existing_ids = {str(r["scheme"]["_id"]) for r in reranked}
-                fallback_docs = list(self.collection.find({"$or": or_clauses}).limit(top_k * 3))
-                for doc in fallback_docs:
-                    sid = str(doc.get("_id"))
-                    if sid in existing_ids:
-                        continue
-                    text_blob = self._build_text_blob(doc)
-                    scheme_tokens = self._tokenize(text_blob)
-                    profile_signals = self._profile_signal_scores(doc, user_profile, scheme_tokens, text_blob)
-                    reranked.append({
-                        "scheme": doc,
-                        "score": 0.35 + (0.45 * profile_signals["profile_score"]),
-                        "semantic": 0.0,
-                        "query_overlap": (len(query_tokens & scheme_tokens) / max(len(query_tokens), 1)) if query_tokens else 0.0,
-                        "occupation_overlap": (len(occ_tokens & scheme_tokens) / max(len(occ_tokens), 1)) if occ_tokens else 0.0,
-                        "profile_score": profile_signals["profile_score"],
-                        "occupation_exact": profile_signals["occupation_exact"],
-                        "state_exact": profile_signals["state_exact"],
-                    })
-                    existing_ids.add(sid)
-                    if len(reranked) >= top_k:
-                        break
+                query_overlap, occ_overlap = self._lexical_overlaps(features, profile_ctx)
+                profile_signals = self._profile_signal_scores(features, profile_ctx)
+                reranked.append({
+                    "scheme": doc,
+                    "score": 0.30 + (0.05 * lexical_score) + (0.45 * profile_signals["profile_score"]),
+                    "semantic": 0.0,
+                    "query_overlap": query_overlap,
+                    "occupation_overlap": occ_overlap,
+                    "profile_score": profile_signals["profile_score"],
+                    "occupation_exact": profile_signals["occupation_exact"],
+                    "state_exact": profile_signals["state_exact"],
+                })
+                existing_ids.add(sid)
+                fallback_added += 1
+                if len(reranked) >= top_k:
+                    break
 
         reranked.sort(key=lambda x: x["score"], reverse=True)
         reranked = reranked[:top_k]
 
+        if candidates["fallback_used"]:
+            CANDIDATE_FALLBACKS.inc()
+        if fallback_added:
+            LEXICAL_FALLBACKS.inc()
+            LEXICAL_FALLBACK_SCHEMES.inc(fallback_added)
+
         self._trace(system_trace, 6,
             "HYBRID_RERANK_COMPLETED",
             "POLICY_RETRIEVER",
             {
                 "final_match_count": len(reranked),
+                "lexical_fallback_added": fallback_added,
                 "rerank_features": [
                     "multi_field_semantic",
                     "query_lexical_overlap",
@@ -529,22 +1097,219 @@ class PolicyRetrieverAgent(AIBaseAgent):
             "POLICY_RETRIEVER",
             {
                 "returned": len(results),
-                "ranked_results": results
+                # Only the top result unless tracing is at full verbosity
+                "ranked_results": results if verbose(FULL) else results[:1]
             },
             step_start
         )
 
-        total_latency = round((time.time() - overall_start) * 1000, 2)
+        return results
 
-        system_trace.append({
-            "step": 8,
-            "event": "RETRIEVAL_PIPELINE_COMPLETED",
-            "node": "POLICY_RETRIEVER",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "latency_ms": total_latency,
-            "details": {
-                "total_latency_ms": total_latency
-            }
-        })
+    # ---------------------------
+    # Main method
+    # ---------------------------
+    @traced("policy_retriever.retrieve_policies")
+    @reads_catalog
+    def retrieve_policies(
+    self,
+    query: str,
+    user_profile: dict,
+    top_k: int = 25,
+    system_trace: list | None = None,
+    scheme_context=None
+) -> list[dict]:
+
+        overall_start = time.time()
+
+        # -------------------------
+        # Result cache (keyed by corpus version)
+        # -------------------------
+        cache_key, corpus_version, cached = self._cached_results(
+            query, user_profile, top_k, system_trace, overall_start
+        )
+        if cached is not None:
+            return cached
+
+        # -------------------------
+        # STEP 2 — Semantic Query
+        # -------------------------
+        step_start = time.time()
+
+        profile_text = self._profile_text(user_profile)
+
+        full_query = f"{query}. {profile_text}"
+
+        self._trace_query_constructed(system_trace, full_query, step_start)
+
+        # Embeddings: keep user query and profile context separate for better
+        # control. They do not depend on the candidate queries, so in
+        # concurrent mode both stages run on the shared stage pool.
+        state = user_profile.get("state")
+        occupation = str(user_profile.get("occupation") or "").strip().lower()
+
+        stage_results, stage_timing = run_stages(
+            {
+                "embedding": lambda: self._embed_query_and_profile(query, profile_text),
+                "candidates": lambda: self._candidate_space(state, occupation),
+            },
+            pool=self.stage_pool if self.concurrent_stages else None,
+        )
+        query_vector, profile_vector, batched = stage_results["embedding"]
+        candidates = stage_results["candidates"]
+
+        self._trace_stages(system_trace, len(query_vector), batched, candidates, occupation, stage_timing)
+
+        # -------------------------
+        # STEP 5 — Multi-field FAISS Retrieval + score fusion
+        # -------------------------
+        step_start = time.time()
+
+        semantic, search_info = self._semantic_search(
+            query_vector, profile_vector, top_k, self._allowed_ordinals(state, candidates)
+        )
+
+        results = self._rank_and_materialize(
+            query, user_profile, top_k, semantic, search_info, candidates,
+            system_trace, round((time.time() - step_start) * 1000, 2), scheme_context
+        )
+
+        if cache_key is not None:
+            self.result_cache.put(cache_key, corpus_version, results)
+
+        self._trace_completed(system_trace, overall_start)
+
+        return results
+
+    @traced("policy_retriever.retrieve_policies_batch")
+    @reads_catalog
+    def retrieve_policies_batch(
+        self,
+        queries: list,
+        profiles: list,
+        top_k: int = 25,
+        system_traces: list | None = None,
+        scheme_context=None
+    ) -> list[list[dict]]:
+        """
+        `retrieve_policies` for many (query, user_profile) pairs in one call.
+
+        Cache hits are answered first. For the rest, every query and profile
+        text is encoded in one batch, the candidate space is computed once
+        per distinct (state, occupation), and each field index is searched
+        once with a multi-row query matrix (per group of identical FAISS
+        filters in filtered mode). Rerank and materialization run per item,
+        so every item's results equal those of the single path.
+
+        `system_traces`, if given, holds one trace list per item. One
+        `scheme_context` (SchemeContext) is shared by every item.
+        """
+        if len(queries) != len(profiles):
+            raise ValueError("queries and profiles must have the same length")
+
+        n_items = len(queries)
+        if system_traces is None:
+            system_traces = [None] * n_items
+
+        overall_start = time.time()
+
+        results = [None] * n_items
+        cache_entries = {}
+        pending = []
+        for item in range(n_items):
+            cache_key, corpus_version, cached = self._cached_results(
+                queries[item], profiles[item], top_k, system_traces[item], overall_start
+            )
+            if cached is not None:
+                results[item] = cached
+            else:
+                cache_entries[item] = (cache_key, corpus_version)
+                pending.append(item)
+
+        if not pending:
+            return results
+
+        # -------------------------
+        # STEP 2 — Semantic Queries
+        # -------------------------
+        step_start = time.time()
+
+        profile_texts = {}
+        candidate_keys = {}
+        for item in pending:
+            profile_texts[item] = self._profile_text(profiles[item])
+            self._trace_query_constructed(
+                system_traces[item], f"{queries[item]}. {profile_texts[item]}", step_start
+            )
+            occupation = str(profiles[item].get("occupation") or "").strip().lower()
+            candidate_keys[item] = (profiles[item].get("state"), occupation)
+
+        # One encode for every query and profile text; one candidate space
+        # per distinct (state, occupation)
+        texts = [queries[item] for item in pending] + [profile_texts[item] for item in pending]
+        distinct_keys = list(dict.fromkeys(candidate_keys.values()))
+
+        def embed_all():
+            with span("retrieval.embedding", texts=len(texts)), stage_timer("embedding"):
+                if hasattr(self.llm, "get_embeddings"):
+                    return self.llm.get_embeddings(texts), True
+                return [self.llm.get_embedding(text) for text in texts], False
+
+        stage_results, stage_timing = run_stages(
+            {
+                "embedding": embed_all,
+                "candidates": lambda: {key: self._candidate_space(*key) for key in distinct_keys},
+            },
+            pool=self.stage_pool if self.concurrent_stages else None,
+        )
+        vectors, batched = stage_results["embedding"]
+        candidate_spaces = stage_results["candidates"]
+
+        query_vectors = dict(zip(pending, vectors[:len(pending)]))
+        profile_vectors = dict(zip(pending, vectors[len(pending):]))
+
+        for item in pending:
+            self._trace_stages(
+                system_traces[item], len(query_vectors[item]), batched,
+                candidate_spaces[candidate_keys[item]], candidate_keys[item][1],
+                stage_timing, batch_size=len(pending)
+            )
+
+        # -------------------------
+        # STEP 5 — Multi-row FAISS Retrieval, grouped by FAISS filter
+        # -------------------------
+        step_start = time.time()
+
+        groups = {}
+        for item in pending:
+            state, _ = key = candidate_keys[item]
+            allowed = self._allowed_ordinals(state, candidate_spaces[key])
+            groups.setdefault(key if allowed is not None else None, []).append(item)
+
+        searches = {}
+        for key, items in groups.items():
+            allowed = None if key is None else candidate_spaces[key]["state_mask"]
+            group_searches = self._semantic_search_batch(
+                [query_vectors[item] for item in items],
+                [profile_vectors[item] for item in items],
+                top_k,
+                allowed,
+            )
+            searches.update(zip(items, group_searches))
+
+        search_latency_ms = round((time.time() - step_start) * 1000, 2)
+
+        for item in pending:
+            semantic, search_info = searches[item]
+            results[item] = self._rank_and_materialize(
+                queries[item], profiles[item], top_k, semantic, search_info,
+                candidate_spaces[candidate_keys[item]], system_traces[item], search_latency_ms,
+                scheme_context
+            )
+
+            cache_key, corpus_version = cache_entries[item]
+            if cache_key is not None:
+                self.result_cache.put(cache_key, corpus_version, results[item])
+
+            self._trace_completed(system_traces[item], overall_start)
 
         return results
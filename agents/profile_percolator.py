@@ -0,0 +1,144 @@
+# agents/profile_percolator.py
+
+import numpy as np
+from .eligibility_engine import normalize_user
+from .eligibility_rules import GENDER_LIST, GENDER_VALUE, CompiledRules, compile_rules
+
+# Categorical profile fields with an inverted map
+CATEGORICAL = ("gender", "state", "occupation")
+
+
+def _bound(value):
+    """A compiled rule limit (already numeric, see compile_clause), or None when the rule sets none."""
+    return None if value is None else float(value)
+
+
+def _column(values) -> np.ndarray:
+    return np.array([np.nan if v is None else float(v) for v in values], dtype="float64")
+
+
+class ProfilePercolator:
+    """
+    Reverse matching: stored user profiles indexed so a scheme's rules
+    find the users they admit without checking every user. Age and
+    income are sorted arrays (a limit is a binary search), gender, state
+    and occupation inverted maps from lowercased value to user ordinals.
+
+    A clause starts from its most selective check (a range slice or the
+    postings of the allowed values) and filters only those users by the
+    other checks, so the cost follows the matches, not the user count.
+    Matches agree with CompiledRules.passes; users without an age never
+    match an age limit.
+    """
+
+    def __init__(self, user_ids: list, profiles: list):
+        users = [normalize_user(p) for p in profiles]
+        self.user_ids = np.asarray(user_ids, dtype="int64")
+        self.size = len(users)
+
+        self.ages = _column(u["age"] for u in users)
+        self.age_order, self.sorted_ages = self._sorted(self.ages)
+
+        self.incomes = _column(u["monthly_income"] for u in users)
+        self.income_order, self.sorted_incomes = self._sorted(self.incomes)
+        # No income given: the income limit is not checked
+        self.no_income = np.flatnonzero(np.isnan(self.incomes))
+
+        self.codes = {}
+        self.vocab = {}
+        self.postings = {}
+        for field in CATEGORICAL:
+            vocab = {}
+            codes = np.array([vocab.setdefault(u[field], len(vocab)) for u in users], dtype="int64")
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(vocab) + 1))
+            self.codes[field] = codes
+            self.vocab[field] = vocab
+            self.postings[field] = {
+                value: order[bounds[code]:bounds[code + 1]] for value, code in vocab.items()
+            }
+
+    @classmethod
+    def build(cls, users) -> "ProfilePercolator":
+        """From (user_id, profile) pairs, e.g. screen_users_job.user_chunks()."""
+        user_ids, profiles = [], []
+        for user_id, profile in users:
+            user_ids.append(user_id)
+            profiles.append(profile)
+        return cls(user_ids, profiles)
+
+    @staticmethod
+    def _sorted(column: np.ndarray) -> tuple:
+        known = np.flatnonzero(~np.isnan(column))
+        order = known[np.argsort(column[known], kind="stable")]
+        return order, column[order]
+
+    # ---------------------------
+    # Per-check plans
+    # ---------------------------
+    def _plan(self, check):
+        """(candidate count, materialize(), keep(ordinals)) for one check, or None if it admits everyone."""
+        if check.name == "age":
+            low, high = _bound(check.min_age), _bound(check.max_age)
+            if low is None and high is None:
+                return None
+            low = -np.inf if low is None else low
+            high = np.inf if high is None else high
+            start = np.searchsorted(self.sorted_ages, low, side="left")
+            stop = np.searchsorted(self.sorted_ages, high, side="right")
+            return (
+                max(stop - start, 0),
+                lambda: self.age_order[start:stop],
+                lambda o: (self.ages[o] >= low) & (self.ages[o] <= high),
+            )
+
+        if check.name == "income":
+            limit = _bound(check.max_income)
+            if limit is None:
+                return None
+            stop = np.searchsorted(self.sorted_incomes, limit, side="right")
+            return (
+                stop + len(self.no_income),
+                lambda: np.concatenate([self.income_order[:stop], self.no_income]),
+                lambda o: ~(self.incomes[o] > limit),
+            )
+
+        if check.name == "gender" and check.kind not in (GENDER_VALUE, GENDER_LIST):
+            return None
+
+        # gender / state / occupation membership
+        field = check.name
+        postings = [self.postings[field][v] for v in check.allowed if v in self.postings[field]]
+        codes = [self.vocab[field][v] for v in check.allowed if v in self.vocab[field]]
+        return (
+            sum(len(p) for p in postings),
+            lambda: np.concatenate(postings) if postings else np.zeros(0, dtype="int64"),
+            lambda o: np.isin(self.codes[field][o], codes),
+        )
+
+    def _clause_ordinals(self, clause) -> np.ndarray:
+        plans = [plan for plan in (self._plan(check) for check in clause.checks) if plan is not None]
+        if not plans:
+            return np.arange(self.size, dtype="int64")
+
+        plans.sort(key=lambda plan: plan[0])
+        ordinals = plans[0][1]()
+        for _, _, keep in plans[1:]:
+            if not len(ordinals):
+                break
+            ordinals = ordinals[keep(ordinals)]
+        return ordinals
+
+    # ---------------------------
+    # Matching
+    # ---------------------------
+    def match(self, rules) -> list:
+        """User ids, in index order, whose profile passes a scheme's rules."""
+        predicate = rules if isinstance(rules, CompiledRules) else compile_rules(rules)
+        ordinals = [self._clause_ordinals(clause) for clause in predicate.clauses]
+        matched = ordinals[0] if len(ordinals) == 1 else np.concatenate(ordinals)
+        return self.user_ids[np.unique(matched)].tolist()
+
+    def match_all(self, rules_by_scheme: dict) -> dict:
+        """scheme id -> matching user ids, for a batch of newly ingested schemes."""
+        return {scheme_id: self.match(rules) for scheme_id, rules in rules_by_scheme.items()}
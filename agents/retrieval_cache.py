@@ -0,0 +1,100 @@
+# agents/retrieval_cache.py
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+class RetrievalCache:
+    """
+    Bounded LRU + TTL cache of retrieve_policies results.
+
+    Entries belong to one corpus version (loaded indexes + rules file, see
+    PolicyRetrieverAgent.corpus_version); when the version changes the whole
+    cache is dropped, so rebuilt indexes never serve stale rankings.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, user_profile: dict, top_k: int) -> tuple:
+        # Only the profile fields retrieval actually reads are part of the key
+        profile = user_profile or {}
+        income = profile.get("monthly_income")
+        try:
+            income = float(str(income).replace(",", "").strip()) if income is not None else None
+        except ValueError:
+            income = str(income)
+
+        return (
+            re.sub(r"\s+", " ", str(query or "")).strip().lower(),
+            str(profile.get("occupation") or "").strip().lower(),
+            str(profile.get("state") or "").strip().lower(),
+            str(profile.get("gender") or "").strip().lower(),
+            income,
+            int(top_k),
+        )
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, results = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Callers enrich result dicts in place, so never hand out the cached ones
+        return [dict(r) for r in results]
+
+    def put(self, key, version, results: list):
+        with self._lock:
+            self._check_version(version)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, [dict(r) for r in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,216 @@
+# agents/scheme_catalog.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Fields kept in memory for every scheme (everything the agents and the
+# API's enrich step read). Other Mongo fields stay in Mongo only.
+SCHEME_FIELDS = (
+    "_id",
+    "scheme_name",
+    "slug",
+    "level",
+    "state",
+    "states",
+    "department",
+    "ministry",
+    "category",
+    "tags",
+    "description",
+    "eligibility_text",
+    "documents_required_text",
+    "benefits_text",
+    "application_steps_text",
+    "application_url",
+    "occupation",
+    "gender",
+    "community",
+    "min_age",
+    "max_age",
+    "max_income",
+    "eligibility_rules",
+    # Normalized facets written at ingest (agents/facets.py)
+    "state_norm",
+    "occupation_norm",
+    "gender_norm",
+)
+
+CATALOG_META_COLLECTION = "catalog_meta"
+
+
+class SchemeRecord:
+    """
+    Compact read-only view of one scheme document. Supports the dict-style
+    access (`scheme["_id"]`, `scheme.get(...)`) the agents already use.
+    """
+
+    __slots__ = ("ordinal",) + SCHEME_FIELDS
+
+    def __init__(self, ordinal: int, doc: dict):
+        self.ordinal = ordinal
+        for field in SCHEME_FIELDS:
+            setattr(self, field, doc.get(field))
+
+    def get(self, key, default=None):
+        if key not in SCHEME_FIELDS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in SCHEME_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in SCHEME_FIELDS and getattr(self, key) is not None
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in SCHEME_FIELDS if getattr(self, field) is not None}
+
+
+def bump_catalog_version(db):
+    """Signal running catalogs to reload (call after ingesting or editing schemes)."""
+    db[CATALOG_META_COLLECTION].update_one(
+        {"_id": "schemes"},
+        {"$inc": {"version": 1}},
+        upsert=True
+    )
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. A waiting writer blocks new readers, so a
+    catalog rebuild is not starved by a steady stream of requests. Not
+    reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class SchemeCatalog:
+    """
+    Memory-resident snapshot of the scheme collection, indexed by the same
+    dense ordinals as the FAISS id arrays. Mongo stays the source of truth;
+    the snapshot reloads when the catalog version in Mongo is bumped.
+    """
+
+    def __init__(self, collection, faiss_indexes: dict | None = None, check_interval_seconds: float = 30):
+        self.collection = collection
+        self.meta_collection = collection.database[CATALOG_META_COLLECTION]
+        self.check_interval_seconds = check_interval_seconds
+
+        # Ordinal order: FAISS field ids first (same walk as AIBaseAgent),
+        # then any scheme that is not indexed yet
+        self.scheme_ids = []
+        self.ordinals = {}
+        for data in (faiss_indexes or {}).values():
+            ids = data["ids"]
+            for doc_id in (ids.tolist() if hasattr(ids, "tolist") else ids):
+                if doc_id not in self.ordinals:
+                    self.ordinals[doc_id] = len(self.scheme_ids)
+                    self.scheme_ids.append(doc_id)
+
+        self.records = []
+        self.version = None
+        self.loaded_at = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        # One version check / reload at a time
+        self._refresh_lock = threading.Lock()
+
+        self.refresh()
+
+    def _stored_version(self):
+        meta = self.meta_collection.find_one({"_id": "schemes"})
+        return (meta or {}).get("version", 0)
+
+    def refresh(self):
+        """Reload every scheme. Existing ordinals never change; new schemes are appended."""
+        start = time.time()
+        stored_version = self._stored_version()
+        docs = {doc["_id"]: doc for doc in self.collection.find({}, {f: 1 for f in SCHEME_FIELDS})}
+
+        with self._lock:
+            for doc_id in docs:
+                if doc_id not in self.ordinals:
+                    self.ordinals[doc_id] = len(self.scheme_ids)
+                    self.scheme_ids.append(doc_id)
+
+            # Schemes removed from Mongo keep their ordinal with no record
+            self.records = [
+                SchemeRecord(ordinal, docs[doc_id]) if doc_id in docs else None
+                for ordinal, doc_id in enumerate(self.scheme_ids)
+            ]
+            self.version = stored_version
+            self.loaded_at = time.time()
+            self._last_check = time.monotonic()
+
+        print(f"📚 Scheme catalog v{stored_version} loaded: {len(docs)} schemes in {round((time.time() - start) * 1000, 1)}ms")
+
+    def maybe_refresh(self) -> bool:
+        """Reload if the stored version moved; checks Mongo at most once per interval."""
+        if time.monotonic() - self._last_check < self.check_interval_seconds:
+            return False
+
+        with self._refresh_lock:
+            # Another request may have checked (and reloaded) while this one waited
+            now = time.monotonic()
+            if now - self._last_check < self.check_interval_seconds:
+                return False
+
+            self._last_check = now
+            if self._stored_version() == self.version:
+                return False
+
+            self.refresh()
+            return True
+
+    def __len__(self):
+        return len(self.scheme_ids)
+
+    def get(self, scheme_id):
+        ordinal = self.ordinals.get(scheme_id)
+        if ordinal is None:
+            ordinal = self.ordinals.get(str(scheme_id))
+        # A reload appends ordinals before it swaps in the longer record list
+        records = self.records
+        return None if ordinal is None or ordinal >= len(records) else records[ordinal]
+
+    def get_many(self, scheme_ids) -> list:
+        records = (self.get(scheme_id) for scheme_id in scheme_ids)
+        return [r for r in records if r is not None]
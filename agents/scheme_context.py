@@ -0,0 +1,75 @@
+# agents/scheme_context.py
+
+from bson import ObjectId
+
+
+def id_filter(scheme_ids) -> dict:
+    """Mongo filter matching scheme ids stored either as strings or as ObjectIds."""
+    ids = list(scheme_ids)
+    return {"_id": {"$in": ids + [ObjectId(i) for i in ids if ObjectId.is_valid(i)]}}
+
+
+class SchemeContext:
+    """
+    The scheme documents one request has touched, each loaded once and
+    shared by the retriever (rerank pool), the eligibility agent and
+    enrichment of the response lists. Lookups try the held documents,
+    then the in-memory SchemeCatalog, then one Mongo `$in` query for all
+    that is still missing. Ids are held as strings.
+    """
+
+    def __init__(self, collection=None, catalog=None):
+        self.collection = collection
+        self.catalog = catalog
+        self.docs = {}
+        # Ids Mongo was asked for and did not have
+        self.absent = set()
+        self.round_trips = 0
+        self.catalog_hits = 0
+
+    def add(self, docs):
+        for doc in docs:
+            if doc is not None:
+                self.docs.setdefault(str(doc["_id"]), doc)
+
+    def pending(self, scheme_ids) -> list:
+        """Ids that are neither held nor in the catalog, i.e. still need a Mongo query."""
+        missing = [
+            sid for sid in dict.fromkeys(str(i) for i in scheme_ids)
+            if sid not in self.docs and sid not in self.absent
+        ]
+        if missing and self.catalog is not None:
+            found = self.catalog.get_many(missing)
+            self.catalog_hits += len(found)
+            self.add(found)
+            missing = [sid for sid in missing if sid not in self.docs]
+        return missing
+
+    def fetched(self, scheme_ids, docs):
+        """Record one Mongo lookup for `scheme_ids` (from pending()) that returned `docs`."""
+        self.round_trips += 1
+        self.add(docs)
+        self.absent.update(sid for sid in scheme_ids if sid not in self.docs)
+
+    def fetch(self, scheme_ids):
+        missing = self.pending(scheme_ids)
+        if missing and self.collection is not None:
+            self.fetched(missing, self.collection.find(id_filter(missing)))
+
+    def get(self, scheme_id):
+        """A held document, or None (does not load anything)."""
+        return self.docs.get(str(scheme_id))
+
+    def get_many(self, scheme_ids) -> list:
+        """Documents for ids, in the given order; unknown ids are skipped."""
+        scheme_ids = list(scheme_ids)
+        self.fetch(scheme_ids)
+        docs = (self.docs.get(str(i)) for i in scheme_ids)
+        return [doc for doc in docs if doc is not None]
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self.docs),
+            "catalog_hits": self.catalog_hits,
+            "mongo_round_trips": self.round_trips,
+        }
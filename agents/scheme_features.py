@@ -0,0 +1,279 @@
+# agents/scheme_features.py
+
+import os
+import re
+import sys
+import pickle
+import time
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Scheme fields whose text makes up the rerank "text blob"
+TEXT_BLOB_FIELDS = (
+    "scheme_name",
+    "description",
+    "eligibility_text",
+    "benefits_text",
+    "occupation",
+    "state",
+    "states",
+    "category",
+    "ministry",
+)
+
+FEATURES_FILE = "scheme_features.pkl"
+
+
+def normalize_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join([str(v) for v in value if v is not None]).lower()
+    return str(value).lower()
+
+
+def tokenize(text: str) -> set:
+    return set(TOKEN_PATTERN.findall((text or "").lower()))
+
+
+def build_text_blob(scheme) -> str:
+    parts = [normalize_text(scheme.get(field)) for field in TEXT_BLOB_FIELDS]
+    return " ".join([p for p in parts if p]).strip()
+
+
+def to_float(value):
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            value = value.replace(",", "").strip()
+        return float(value)
+    except Exception:
+        return None
+
+
+def normalized_values(value) -> tuple:
+    """Stripped, lowercased values of a string-or-list scheme field."""
+    if value is None:
+        return ()
+    if isinstance(value, list):
+        return tuple(sys.intern(str(v).strip().lower()) for v in value if v)
+    return (sys.intern(str(value).strip().lower()),)
+
+
+class SchemeFeatures:
+    """Precomputed rerank inputs for one scheme."""
+
+    __slots__ = (
+        "token_ids",
+        "state_norm",
+        "occupation_norm",
+        "occupation_token_ids",
+        "gender_norm",
+        "max_income",
+        "min_age",
+        "max_age",
+    )
+
+    def __init__(self, token_ids, state_norm, occupation_norm, occupation_token_ids,
+                 gender_norm, max_income, min_age, max_age):
+        self.token_ids = token_ids
+        self.state_norm = state_norm
+        self.occupation_norm = occupation_norm
+        self.occupation_token_ids = occupation_token_ids
+        self.gender_norm = gender_norm
+        self.max_income = max_income
+        self.min_age = min_age
+        self.max_age = max_age
+
+
+class SchemeFeatureStore:
+    """
+    Per-scheme token-id sets (over an interned vocabulary), normalized
+    state/occupation/gender values and parsed numeric facets, keyed by
+    scheme id. Built once at index-build time (others/build_faiss.py) or at
+    startup, so reranking only does set and attribute lookups.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.features = {}
+        self.built_at = None
+        self.source_version = None
+
+    def _intern_tokens(self, tokens) -> frozenset:
+        ids = []
+        for token in tokens:
+            token_id = self.vocab.get(token)
+            if token_id is None:
+                token_id = len(self.vocab)
+                self.vocab[token] = token_id
+            ids.append(token_id)
+        return frozenset(ids)
+
+    def token_ids(self, tokens) -> frozenset:
+        """Ids of the known tokens (unknown tokens cannot overlap any scheme)."""
+        vocab = self.vocab
+        return frozenset(vocab[t] for t in tokens if t in vocab)
+
+    def add(self, scheme) -> SchemeFeatures:
+        occupation_norm = normalized_values(scheme.get("occupation"))
+        occupation_tokens = set()
+        for occ in occupation_norm:
+            occupation_tokens |= tokenize(occ)
+
+        features = SchemeFeatures(
+            token_ids=self._intern_tokens(tokenize(build_text_blob(scheme))),
+            state_norm=frozenset(normalized_values(scheme.get("state")) + normalized_values(scheme.get("states"))),
+            occupation_norm=occupation_norm,
+            occupation_token_ids=self._intern_tokens(occupation_tokens),
+            gender_norm=normalize_text(scheme.get("gender")),
+            max_income=to_float(scheme.get("max_income")),
+            min_age=to_float(scheme.get("min_age")),
+            max_age=to_float(scheme.get("max_age")),
+        )
+        self.features[scheme.get("_id")] = features
+        return features
+
+    def get(self, scheme) -> SchemeFeatures:
+        """Features for a scheme document, computed on the fly if it is new."""
+        features = self.features.get(scheme.get("_id"))
+        if features is None:
+            features = self.add(scheme)
+        return features
+
+    @classmethod
+    def build(cls, schemes, source_version=None) -> "SchemeFeatureStore":
+        store = cls()
+        for scheme in schemes:
+            if scheme is not None:
+                store.add(scheme)
+        store.built_at = time.time()
+        store.source_version = source_version
+        return store
+
+    def save(self, index_dir: str):
+        with open(os.path.join(index_dir, FEATURES_FILE), "wb") as f:
+            pickle.dump(
+                {
+                    "vocab": self.vocab,
+                    "features": {
+                        k: tuple(getattr(v, slot) for slot in SchemeFeatures.__slots__)
+                        for k, v in self.features.items()
+                    },
+                    "built_at": self.built_at,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, index_dir: str):
+        path = os.path.join(index_dir, FEATURES_FILE)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+
+        store = cls()
+        store.vocab = data["vocab"]
+        store.features = {k: SchemeFeatures(*v) for k, v in data["features"].items()}
+        store.built_at = data.get("built_at")
+        return store
+
+
+def _csr(rows) -> tuple:
+    """Flatten a list of int collections into (indptr, flat) arrays."""
+    lengths = np.fromiter((len(r) for r in rows), dtype="int64", count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype="int64")
+    np.cumsum(lengths, out=indptr[1:])
+    flat = np.fromiter((i for r in rows for i in r), dtype="int64", count=int(indptr[-1]))
+    return indptr, flat
+
+
+def _segment_hits(indptr, flat, ordinals: np.ndarray, marked: np.ndarray) -> np.ndarray:
+    """Per ordinal, how many of its ids are marked (a CSR row-sum over a subset of rows)."""
+    starts = indptr[ordinals]
+    lengths = indptr[ordinals + 1] - starts
+    total = int(lengths.sum())
+    if total == 0 or not marked.any():
+        return np.zeros(len(ordinals), dtype="float64")
+
+    # Positions of every id belonging to the selected rows, row after row
+    row_of = np.repeat(np.arange(len(ordinals)), lengths)
+    positions = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[row_of]
+    return np.bincount(row_of, weights=marked[flat[positions]], minlength=len(ordinals))
+
+
+def _mark(size: int, ids) -> np.ndarray:
+    marked = np.zeros(size, dtype=bool)
+    ids = [i for i in ids if i < size]
+    if ids:
+        marked[ids] = True
+    return marked
+
+
+class SchemeFeatureArrays:
+    """
+    Array-backed view of a SchemeFeatureStore aligned to scheme ordinals, so
+    rerank features for a whole candidate pool are computed with NumPy
+    instead of one Python call per scheme.
+    """
+
+    def __init__(self, store: SchemeFeatureStore, scheme_ids: list):
+        rows = [store.features.get(doc_id) for doc_id in scheme_ids]
+        empty = SchemeFeatures(frozenset(), frozenset(), (), frozenset(), "", None, None, None)
+        rows = [r if r is not None else empty for r in rows]
+
+        self.store = store
+        self.n_features = len(store.features)
+        self.vocab_size = len(store.vocab)
+        self.token_indptr, self.token_ids = _csr([r.token_ids for r in rows])
+        self.occ_token_indptr, self.occ_token_ids = _csr([r.occupation_token_ids for r in rows])
+
+        self.state_vocab = {}
+        self.state_indptr, self.state_ids = _csr([
+            [self.state_vocab.setdefault(v, len(self.state_vocab)) for v in r.state_norm] for r in rows
+        ])
+
+        self.occ_value_vocab = {}
+        self.occ_value_indptr, self.occ_value_ids = _csr([
+            [self.occ_value_vocab.setdefault(v, len(self.occ_value_vocab)) for v in r.occupation_norm] for r in rows
+        ])
+
+        gender_codes = {}
+        self.gender_codes = np.array(
+            [gender_codes.setdefault(r.gender_norm, len(gender_codes)) for r in rows], dtype="int64"
+        )
+        self.gender_values = list(gender_codes)
+
+        self.max_income = np.array(
+            [np.nan if r.max_income is None else r.max_income for r in rows], dtype="float64"
+        )
+
+    def token_hits(self, ordinals, token_ids) -> np.ndarray:
+        return _segment_hits(self.token_indptr, self.token_ids, ordinals, _mark(self.vocab_size, token_ids))
+
+    def occupation_token_hits(self, ordinals, token_ids) -> np.ndarray:
+        return _segment_hits(self.occ_token_indptr, self.occ_token_ids, ordinals, _mark(self.vocab_size, token_ids))
+
+    def occupation_value_hits(self, ordinals, values) -> np.ndarray:
+        ids = [self.occ_value_vocab[v] for v in values if v in self.occ_value_vocab]
+        return _segment_hits(self.occ_value_indptr, self.occ_value_ids, ordinals, _mark(len(self.occ_value_vocab), ids))
+
+    def state_hits(self, ordinals, state: str) -> np.ndarray:
+        ids = [self.state_vocab[state]] if state in self.state_vocab else []
+        return _segment_hits(self.state_indptr, self.state_ids, ordinals, _mark(len(self.state_vocab), ids))
+
+    def gender_matches(self, ordinals, gender: str) -> np.ndarray:
+        # Substring semantics of the scalar scorer, evaluated once per distinct value
+        per_value = np.array(
+            [bool(g) and ("any" in g or gender in g) for g in self.gender_values], dtype=bool
+        )
+        return per_value[self.gender_codes[ordinals]]
+
+    def income_matches(self, ordinals, income: float) -> np.ndarray:
+        max_income = self.max_income[ordinals]
+        with np.errstate(invalid="ignore"):
+            return ~np.isnan(max_income) & (income <= max_income)
@@ -0,0 +1,88 @@
+# agents/stage_pool.py
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on retrieval-stage threads shared by every request in the process
+DEFAULT_STAGE_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def shared_stage_pool(max_workers: int | None = None) -> ThreadPoolExecutor:
+    """
+    Process-wide bounded thread pool for independent retrieval stages
+    (embedding, Mongo candidate queries). Created on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max_workers or DEFAULT_STAGE_WORKERS,
+                thread_name_prefix="retrieval-stage",
+            )
+        return _pool
+
+
+def run_stages(stages: dict, pool: ThreadPoolExecutor | None = None) -> tuple:
+    """
+    Run named, independent callables and wait for all of them. With a pool
+    they run concurrently, otherwise one after another. Returns
+    (results, timing): per-stage start/end offsets and latency in ms, the
+    critical path (wall clock until the last stage finished) and the sum
+    of stage latencies. The first stage exception is re-raised after every
+    stage has finished.
+    """
+    origin = time.perf_counter()
+    spans = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            spans[name] = (start, time.perf_counter())
+
+    if pool is None:
+        outcomes = {}
+        for name, fn in stages.items():
+            try:
+                outcomes[name] = (timed(name, fn), None)
+            except Exception as e:
+                outcomes[name] = (None, e)
+    else:
+        # Each stage runs in a copy of the caller's context so trace spans nest
+        futures = {
+            name: pool.submit(contextvars.copy_context().run, timed, name, fn)
+            for name, fn in stages.items()
+        }
+        outcomes = {}
+        for name, future in futures.items():
+            error = future.exception()
+            outcomes[name] = (None if error else future.result(), error)
+
+    critical_path_ms = (time.perf_counter() - origin) * 1000
+
+    for _, error in outcomes.values():
+        if error is not None:
+            raise error
+
+    timing = {
+        "mode": "sequential" if pool is None else "concurrent",
+        "stages": {
+            name: {
+                "start_ms": round((start - origin) * 1000, 2),
+                "end_ms": round((end - origin) * 1000, 2),
+                "latency_ms": round((end - start) * 1000, 2),
+            }
+            for name, (start, end) in spans.items()
+        },
+        "critical_path_ms": round(critical_path_ms, 2),
+    }
+    timing["sum_of_stages_ms"] = round(sum(s["latency_ms"] for s in timing["stages"].values()), 2)
+
+    return {name: result for name, (result, _) in outcomes.items()}, timing
@@ -0,0 +1,367 @@
+# agents/tracing.py
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+
+# Verbosity levels: OFF records nothing, BASIC records spans with small
+# attributes, FULL also keeps large payloads (e.g. every ranked result in
+# the _system trace) and the pretty-printed request snapshots
+OFF = 0
+BASIC = 1
+FULL = 2
+VERBOSITY_LEVELS = {"off": OFF, "basic": BASIC, "full": FULL}
+
+SERVICE_NAME = "govt-scheme-analysis"
+
+# perf_counter_ns is monotonic but has no epoch; this offset turns it into
+# Unix time for export (taken once at import)
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation. Use as a context manager; nests under the current span."""
+
+    __slots__ = ("tracer", "trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status", "_token")
+
+    recording = True
+
+    def __init__(self, tracer, trace, parent_id, name, attributes):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = 0
+        self.end_ns = 0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": format(self.trace.trace_id, "032x"),
+            "span_id": format(self.span_id, "016x"),
+            "parent_id": format(self.parent_id, "016x") if self.parent_id else None,
+            "name": self.name,
+            "start_unix_ns": self.start_ns + _EPOCH_OFFSET_NS,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace is not sampled; every call is a no-op."""
+
+    __slots__ = ("_token",)
+
+    recording = False
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+class _NullSpan(_NoopSpan):
+    """No-op that does not touch the context (tracing switched off entirely)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = random.getrandbits(128)
+        self.spans = []
+
+
+class Tracer:
+    """
+    Span factory with head sampling (decided once per root span, inherited
+    by its children), a bounded ring buffer of recent traces and an
+    optional background exporter. Timing uses perf_counter_ns; nothing is
+    formatted or serialized on the request path.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, verbosity: int = BASIC, buffer_size: int = 512, exporter=None):
+        self.sample_rate = sample_rate
+        self.verbosity = verbosity
+        self.buffer = deque(maxlen=buffer_size)
+        self.exporter = exporter
+        self.started = 0
+        self.sampled = 0
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """TRACE_SAMPLE_RATE, TRACE_VERBOSITY (off/basic/full), TRACE_BUFFER_SIZE, TRACE_EXPORT (file path or http(s) collector URL)."""
+        target = os.environ.get("TRACE_EXPORT")
+        return cls(
+            sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", "1.0")),
+            verbosity=VERBOSITY_LEVELS.get(os.environ.get("TRACE_VERBOSITY", "basic").lower(), BASIC),
+            buffer_size=int(os.environ.get("TRACE_BUFFER_SIZE", "512")),
+            exporter=make_exporter(target) if target else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.verbosity > OFF and self.sample_rate > 0
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return NULL_SPAN
+
+        parent = _current.get()
+        if parent is None:
+            self.started += 1
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _NoopSpan()
+            self.sampled += 1
+            return Span(self, _Trace(), None, name, attributes)
+        if not parent.recording:
+            return _NoopSpan()
+        return Span(self, parent.trace, parent.span_id, name, attributes)
+
+    def _finish(self, span: Span):
+        trace = span.trace
+        trace.spans.append(span)
+        if span.parent_id is None:
+            self.buffer.append(trace)
+            if self.exporter is not None:
+                self.exporter.submit(trace.spans)
+
+    def recent_traces(self, limit: int = 20) -> list:
+        """Newest completed traces first, spans in start order."""
+        traces = list(self.buffer)[-limit:] if limit > 0 else []
+        return [
+            {
+                "trace_id": format(trace.trace_id, "032x"),
+                "root": trace.spans[-1].name,
+                "duration_ms": round(trace.spans[-1].duration_ms, 3),
+                "spans": [s.to_dict() for s in sorted(trace.spans, key=lambda s: s.start_ns)],
+            }
+            for trace in reversed(traces)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "verbosity": next(k for k, v in VERBOSITY_LEVELS.items() if v == self.verbosity),
+            "sample_rate": self.sample_rate,
+            "traces_started": self.started,
+            "traces_sampled": self.sampled,
+            "buffered_traces": len(self.buffer),
+            "exporter": self.exporter.stats() if self.exporter is not None else None,
+        }
+
+
+# ---------------------------
+# OpenTelemetry export
+# ---------------------------
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str)}
+
+
+def otlp_payload(spans: list, service_name: str = SERVICE_NAME) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest for the given spans."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "agents.tracing"},
+                "spans": [
+                    {
+                        "traceId": format(span.trace.trace_id, "032x"),
+                        "spanId": format(span.span_id, "016x"),
+                        "parentSpanId": format(span.parent_id, "016x") if span.parent_id else "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns + _EPOCH_OFFSET_NS),
+                        "endTimeUnixNano": str(span.end_ns + _EPOCH_OFFSET_NS),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                        "status": {"code": 2 if span.status == "error" else 1},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+class BackgroundExporter:
+    """
+    Completed traces are queued (bounded; dropped when full) and written by
+    one daemon thread, so export never blocks a request.
+    """
+
+    def __init__(self, max_queue: int = 1024):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+
+    def submit(self, spans: list):
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            spans = self.queue.get()
+            try:
+                self.write(otlp_payload(spans))
+                self.exported += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Trace export failed: {e}")
+
+    def write(self, payload: dict):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"exported": self.exported, "dropped": self.dropped, "failed": self.failed}
+
+
+class OTLPFileExporter(BackgroundExporter):
+    """One OTLP/JSON request per line (the OpenTelemetry Collector's otlpjsonfile format)."""
+
+    def __init__(self, path: str, max_queue: int = 1024):
+        self.path = path
+        super().__init__(max_queue)
+
+    def write(self, payload: dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class OTLPHttpExporter(BackgroundExporter):
+    """POSTs OTLP/JSON to a collector, e.g. http://localhost:4318/v1/traces."""
+
+    def __init__(self, endpoint: str, max_queue: int = 1024, timeout: float = 2.0):
+        self.endpoint = endpoint if endpoint.rstrip("/").endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+        super().__init__(max_queue)
+
+    def write(self, payload: dict):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def make_exporter(target: str):
+    if target.startswith(("http://", "https://")):
+        return OTLPHttpExporter(target)
+    return OTLPFileExporter(target)
+
+
+# ---------------------------
+# Module-level tracer
+# ---------------------------
+tracer = Tracer.from_env()
+
+
+def configure(sample_rate=None, verbosity=None, buffer_size=None, exporter=None):
+    """Change the process tracer; `verbosity` may be a level or its name."""
+    if sample_rate is not None:
+        tracer.sample_rate = sample_rate
+    if verbosity is not None:
+        tracer.verbosity = VERBOSITY_LEVELS[verbosity.lower()] if isinstance(verbosity, str) else verbosity
+    if buffer_size is not None:
+        tracer.buffer = deque(tracer.buffer, maxlen=buffer_size)
+    if exporter is not None:
+        tracer.exporter = make_exporter(exporter) if isinstance(exporter, str) else exporter
+    return tracer
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def current_span():
+    """The active span (a no-op span outside any trace)."""
+    return _current.get() or NULL_SPAN
+
+
+def verbose(level: int = FULL) -> bool:
+    """True when the configured verbosity is at least `level`."""
+    return tracer.verbosity >= level
+
+
+def traced(name: str):
+    """Decorator: run the function (sync or async) inside a span."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,6 +1,5 @@
 # app.py
 
-import pickle
 import time
 import json
 import sys
@@ -10,6 +9,9 @@ from agents.policy_retriever_agent import PolicyRetrieverAgent
 from agents.eligibility_agent import EligibilityAgent
 from agents.document_validation_agent import DocumentValidationAgent
 from agents.pathway_generation_agent import PathwayGenerationAgent   # ✅ NEW
+from agents.faiss_store import load_faiss_indexes, resident_memory_mb
+from agents.bm25_index import BM25Index
+from agents.occupation_taxonomy import OccupationPostings
 from user_interaction import get_user_profile
 from pymongo import MongoClient
 
@@ -27,18 +29,21 @@ FIELDS = [
 FAISS_TOP_K = 3
 FAST_MODE = True
 
+# Opt-in: widen FAISS depth only while the rerank pool can still change
+ADAPTIVE_SEARCH_DEPTH = False
+
+# Opt-in: FAISS only scores schemes in the user's state candidate set
+FILTERED_SEARCH = False
+
 
 # -------------------------
 # Step 0: Load FAISS indexes
 # -------------------------
-faiss_indexes = {}
 start = time.time()
 
-for field in FIELDS:
-    with open(f"faiss_indexes/faiss_index_{field}.pkl", "rb") as f:
-        faiss_indexes[field] = pickle.load(f)
+faiss_indexes = load_faiss_indexes("faiss_indexes", FIELDS)
 
-print("✅ FAISS indexes loaded in", round(time.time() - start, 2), "sec")
+print("✅ FAISS indexes loaded in", round(time.time() - start, 2), "sec", f"(RSS {resident_memory_mb()} MB)")
 
 
 # -------------------------
@@ -52,7 +57,14 @@ schemes_collection = db["schemes"]
 
 llm = LocalLLM()
 
-policy_agent = PolicyRetrieverAgent(faiss_indexes, llm)
+policy_agent = PolicyRetrieverAgent(
+    faiss_indexes,
+    llm,
+    adaptive_search_depth=ADAPTIVE_SEARCH_DEPTH,
+    filtered_search=FILTERED_SEARCH,
+    lexical_index=BM25Index.load("faiss_indexes"),
+    occupation_postings=OccupationPostings.load("faiss_indexes")
+)
 elig_agent = EligibilityAgent(faiss_indexes, llm)
 doc_agent = DocumentValidationAgent(llm)
 
@@ -73,10 +85,6 @@ user_profile = get_user_profile()
 # -------------------------
 query = "Policies for fishermen"
 
-start = time.time()
-query_vector = llm.get_embedding(query)
-print("⏱️ Embedding time:", round(time.time() - start, 2), "sec")
-
 start = time.time()
 top_k = 3 if FAST_MODE else FAISS_TOP_K
 
@@ -1,7 +1,6 @@
 import uuid
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pickle
 import time
 import os
 from werkzeug.utils import secure_filename
@@ -9,6 +8,7 @@ from pymongo import MongoClient
 from bson import ObjectId
 from datetime import datetime
 import json
+from collections import Counter
 
 #-------------------- MODELS --------------------
 from flask import Flask
@@ -40,6 +40,17 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
+
+class UserSchemeEligibility(db.Model):
+    """One user × scheme decision, written by screen_users_job.py."""
+    __tablename__ = 'user_scheme_eligibility'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    scheme_id = db.Column(db.String(32), primary_key=True)
+    decision = db.Column(db.String(10), nullable=False)
+    failed_criteria = db.Column(db.JSON, nullable=False, default=list)
+    screened_at = db.Column(db.DateTime, server_default=db.func.now())
+
 # -------------------- IMPORT AGENTS --------------------
 import sys
 sys.path.append("..")
@@ -49,6 +60,15 @@ from agents.policy_retriever_agent import PolicyRetrieverAgent
 from agents.eligibility_agent import EligibilityAgent
 from agents.document_validation_agent import DocumentValidationAgent
 from agents.pathway_generation_agent import PathwayGenerationAgent
+from agents.faiss_store import load_faiss_indexes, resident_memory_mb
+from agents.retrieval_cache import RetrievalCache
+from agents.scheme_catalog import SchemeCatalog
+from agents.scheme_context import SchemeContext
+from agents.scheme_features import SchemeFeatureStore
+from agents.bm25_index import BM25Index
+from agents.occupation_taxonomy import OccupationPostings
+from agents.tracing import FULL, current_span, traced, tracer, verbose
+from agents.metrics import PROMETHEUS_CONTENT_TYPE, registry, stage_summary, timed_stage
 
 # -------------------- TESSERACT AUTO-DETECTION --------------------
 import pytesseract
@@ -77,6 +97,26 @@ UPLOAD_FOLDER = "uploads"
 ALLOWED_EXTENSIONS = {"pdf", "png", "jpg", "jpeg"}
 MAX_FILE_SIZE = 5 * 1024 * 1024
 
+# Search result cache + query log replayed to warm it at startup
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL_SECONDS = 900
+QUERY_LOG_PATH = "query_log.jsonl"
+CACHE_WARMUP_TOP_N = 50
+
+# Opt-in (ADAPTIVE_SEARCH_DEPTH=1): FAISS depth widens only while the rerank
+# pool can still change, instead of the fixed 8× / 4× oversampling
+ADAPTIVE_SEARCH_DEPTH = os.environ.get("ADAPTIVE_SEARCH_DEPTH", "0") == "1"
+
+# Opt-in (FILTERED_SEARCH=1): FAISS only scores schemes in the user's state
+# candidate set (IDSelector); by default state is a rerank boost only
+FILTERED_SEARCH = os.environ.get("FILTERED_SEARCH", "0") == "1"
+
+# Upper bound on items per /api/search-schemes/batch request
+MAX_BATCH_ITEMS = 64
+
+# Streamed responses must reach slow clients chunk by chunk, not buffered by proxies
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = MAX_FILE_SIZE
@@ -90,7 +130,9 @@ elig_agent = None
 doc_agent = None
 pathway_agent = None
 schemes_collection = None
+scheme_catalog = None
 AGENTS_READY = False
+SCREENING_TABLE_READY = False
 
 
 # -------------------- HELPERS --------------------
@@ -112,52 +154,110 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# -------------------- AGENT INITIALIZATION --------------------
-def initialize_agents():
-    global faiss_indexes, llm, policy_agent, elig_agent
-    global doc_agent, pathway_agent, schemes_collection, AGENTS_READY
-
-    if AGENTS_READY:
-        return
-
-    print("🔄 Initializing agents...")
-    start_time = time.time()
-
-    # Load FAISS indexes
-    FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
-    for field in FIELDS:
-        path = f"../faiss_indexes/faiss_index_{field}.pkl"
-        if os.path.exists(path):
-            with open(path, "rb") as f:
-                faiss_indexes[field] = pickle.load(f)
-        else:
-            print(f"⚠️ FAISS index missing for {field}")
-
-    # MongoDB
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client["policy_db"]
-    schemes_collection = db["schemes"]
+def log_search_query(query, user_profile):
+    # Only the profile fields retrieval uses; no names or other personal details
+    entry = {
+        "query": query,
+        "userProfile": {
+            k: user_profile.get(k)
+            for k in ("occupation", "state", "gender", "monthly_income")
+        }
+    }
+    try:
+        with open(QUERY_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not append to query log: {e}")
 
-    # Agents
-    llm = LocalLLM()
-    policy_agent = PolicyRetrieverAgent(faiss_indexes, llm)
-    elig_agent = EligibilityAgent(faiss_indexes, llm)
-    doc_agent = DocumentValidationAgent(llm)
-    pathway_agent = PathwayGenerationAgent(llm)
-
-    AGENTS_READY = True
-    print(f"✅ Agents ready in {round(time.time() - start_time, 2)}s")
 
+def top_logged_queries(n):
+    if n <= 0 or not os.path.exists(QUERY_LOG_PATH):
+        return []
 
-# -------------------- ROUTES --------------------
+    counts = Counter()
+    with open(QUERY_LOG_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("query"):
+                counts[json.dumps(entry, sort_keys=True)] += 1
+
+    return [
+        (entry["query"], entry.get("userProfile") or {})
+        for entry in (json.loads(key) for key, _ in counts.most_common(n))
+    ]
 
-@app.route("/api/users/<int:user_id>", methods=["GET"])
-def get_user(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
 
-    return jsonify({
+def apply_scheme_details(s, sid, full):
+    """Copy a scheme's full record (catalog or Mongo) onto a retrieved/validated entry."""
+    s["_id"] = sid
+    s["scheme_id"] = sid
+
+    if full:
+        s["description"] = full.get("description", "")
+        s["benefits_text"] = full.get("benefits_text", "")
+        s["eligibility_text"] = full.get("eligibility_text", "")
+        s["documents_required_text"] = full.get("documents_required_text", "")
+        s["scheme_name"] = full.get("scheme_name", s.get("scheme_name", ""))
+        # Add eligibility rules if present
+        if "eligibility_rules" not in s and "eligibility_rules" in full:
+            s["eligibility_rules"] = full.get("eligibility_rules", {})
+        # Add additional metadata from the scheme
+        s["category"] = full.get("category", "")
+        s["max_income"] = full.get("max_income", "")
+        s["min_age"] = full.get("min_age", "")
+        s["max_age"] = full.get("max_age", "")
+        s["state"] = full.get("state", "")
+        s["gender"] = full.get("gender", "")
+        s["occupation"] = full.get("occupation", "")
+        s["community"] = full.get("community", "")
+        s["application_url"] = full.get("application_url", "")
+        s["ministry"] = full.get("ministry", "")
+
+    return s
+
+
+def scheme_ids_of(schemes):
+    return [str(s.get("scheme_id") or s.get("_id")) for s in schemes]
+
+
+def new_scheme_context():
+    """Per-request SchemeContext: each scheme document is loaded once per request."""
+    return SchemeContext(schemes_collection, scheme_catalog)
+
+
+@timed_stage("enrich")
+def enrich(schemes, scheme_context=None):
+    # One batched lookup for the whole list; none if the request already loaded them
+    if scheme_context is None:
+        scheme_context = new_scheme_context()
+    sids = scheme_ids_of(schemes)
+    scheme_context.fetch(sids)
+    return [apply_scheme_details(s, sid, scheme_context.get(sid)) for s, sid in zip(schemes, sids)]
+
+
+def enrich_lists(scheme_context, *lists):
+    """Enrich several result lists from one lookup of all their schemes."""
+    scheme_context.fetch(sid for schemes in lists for sid in scheme_ids_of(schemes))
+    return [enrich(schemes, scheme_context) for schemes in lists]
+
+
+# -------------------- SHARED REQUEST LOGIC --------------------
+# Used by both the Flask routes below and the ASGI app (asgi_app.py)
+def health_status():
+    status = {"status": "ok", "agents_ready": AGENTS_READY}
+    if policy_agent is not None and policy_agent.result_cache is not None:
+        status["retrieval_cache"] = policy_agent.result_cache.stats()
+    if llm is not None:
+        status["embedding_cache"] = llm.embedding_cache.stats()
+    status["tracing"] = tracer.stats()
+    return status
+
+
+def user_json(user):
+    return {
         "id": user.id,
         "name": user.name,
         "age": user.age,
@@ -165,20 +265,10 @@ def get_user(user_id):
         "state": user.state,
         "occupation": user.occupation,
         "monthly_income": float(user.monthly_income)
-    })
-
-@app.route("/api/health")
-def health():
-    return jsonify({"status": "ok", "agents_ready": AGENTS_READY})
-
+    }
 
-@app.route("/api/save-profile", methods=["POST"])
-def save_profile():
-    initialize_agents()
-    data = request.get_json() 
-    if not data:
-        return jsonify({"error": "Invalid JSON"}), 400
 
+def save_user(data):
     # Save to database
     user = User(
         name=data["name"],
@@ -190,29 +280,14 @@ def save_profile():
     )
     db.session.add(user)
     db.session.commit()
-
-    return jsonify({"status": "success", "profile": data, "user_id": user.id})
+    return user
 
 
-# -------------------- SEARCH SCHEMES --------------------
-@app.route("/api/search-schemes", methods=["POST"])
-def search_schemes():
-    initialize_agents()
-    data = get_json()
-    interaction_id = str(uuid.uuid4())
-
+def retrieve_for_search(query, user_profile, top_k=10, scheme_context=None):
+    """Retrieval for one search. Returns (retrieved, system_trace)."""
     # 🔹 SYSTEM TRACE (NEW)
     system_trace = []
 
-    if not data:
-        return jsonify({"error": "Invalid JSON"}), 400
-
-    query = data.get("query")
-    user_profile = data.get("userProfile", {})
-
-    if not query:
-        return jsonify({"error": "Query required"}), 400
-
     # 🔹 TRACE: request accepted
     system_trace.append({
         "step": 1,
@@ -228,146 +303,128 @@ def search_schemes():
     retrieved = policy_agent.retrieve_policies(
         query=query,
         user_profile=user_profile,
-        top_k=10,
-        system_trace=system_trace
+        top_k=top_k,
+        system_trace=system_trace,
+        scheme_context=scheme_context
     )
 
-    # ❗ These agents are NOT visualized yet (kept unchanged)
-    eligible, rejected = elig_agent.validate_user_for_schemes(
-        user_profile, retrieved
-    )
+    return retrieved, system_trace
 
-    def enrich(schemes):
-        enriched = []
-        for s in schemes:
-            sid = str(s.get("scheme_id") or s.get("_id"))
-            try:
-                full = schemes_collection.find_one({"_id": ObjectId(sid)})
-            except Exception:
-                full = schemes_collection.find_one({"_id": sid})
-
-            s["_id"] = sid
-            s["scheme_id"] = sid
-
-            if full:
-                s["description"] = full.get("description", "")
-                s["benefits_text"] = full.get("benefits_text", "")
-                s["eligibility_text"] = full.get("eligibility_text", "")
-                s["documents_required_text"] = full.get("documents_required_text", "")
-                s["scheme_name"] = full.get("scheme_name", s.get("scheme_name", ""))
-                # Add eligibility rules if present
-                if "eligibility_rules" not in s and "eligibility_rules" in full:
-                    s["eligibility_rules"] = full.get("eligibility_rules", {})
-                # Add additional metadata from the scheme
-                s["category"] = full.get("category", "")
-                s["max_income"] = full.get("max_income", "")
-                s["min_age"] = full.get("min_age", "")
-                s["max_age"] = full.get("max_age", "")
-                s["state"] = full.get("state", "")
-                s["gender"] = full.get("gender", "")
-                s["occupation"] = full.get("occupation", "")
-                s["community"] = full.get("community", "")
-                s["application_url"] = full.get("application_url", "")
-                s["ministry"] = full.get("ministry", "")
-
-            enriched.append(s)
-        return enriched
-
-    # 🔹 SYSTEM SNAPSHOT (UPGRADED, NOT BROKEN)
-    system_snapshot = {
-        "interaction_id": interaction_id,
-        "active_phase": "SCHEME_DISCOVERY",
-        "active_agent": "POLICY_RETRIEVER_AGENT",
-        "trace": system_trace,
-        "metrics": {
-            "query": query,
-            "schemes_found": len(retrieved)
-        }
-    }
 
-    print("\n📊 SYSTEM SNAPSHOT")
-    print(json.dumps(system_snapshot, indent=2))
+def run_search(query, user_profile, top_k=10, scheme_context=None):
+    """
+    Retrieval + eligibility for one search. Returns
+    (retrieved, eligible, rejected, system_trace). Both agents share the
+    request's scheme documents through `scheme_context`.
+    """
+    retrieved, system_trace = retrieve_for_search(query, user_profile, top_k, scheme_context)
 
-    return jsonify(serialize({
-        "interaction_id": interaction_id,
-        "top_schemes": enrich(retrieved),
-        "eligible_schemes": enrich(eligible),
-        "rejected_schemes": enrich(rejected),
-        "_system": system_snapshot
-    }))
+    # ❗ These agents are NOT visualized yet (kept unchanged)
+    eligible, rejected = elig_agent.validate_user_for_schemes(
+        user_profile, retrieved, scheme_context
+    )
 
+    return retrieved, eligible, rejected, system_trace
 
 
-# -------------------- REQUIRED DOCUMENTS --------------------
-@app.route("/api/get-required-documents", methods=["POST"])
-def get_required_documents():
-    initialize_agents()
-    data = get_json()
+def parse_batch(data):
+    """(queries, profiles, top_k, error) from a /api/search-schemes/batch body."""
+    if not data or not isinstance(data.get("items"), list):
+        return None, None, None, "items list required"
 
-    if not data:
-        return jsonify({"error": "Invalid JSON"}), 400
+    items = data["items"]
+    if len(items) > MAX_BATCH_ITEMS:
+        return None, None, None, f"At most {MAX_BATCH_ITEMS} items per batch"
 
-    scheme_id = data.get("scheme_id")
-    if not scheme_id:
-        return jsonify({"error": "scheme_id required"}), 400
+    queries = [item.get("query") for item in items]
+    profiles = [item.get("userProfile") or {} for item in items]
+    if not all(queries):
+        return None, None, None, "Query required for every item"
 
     try:
-        scheme = schemes_collection.find_one({"_id": ObjectId(scheme_id)})
-    except Exception:
-        scheme = schemes_collection.find_one({"_id": scheme_id})
+        top_k = int(data.get("top_k", 10))
+    except (TypeError, ValueError):
+        return None, None, None, "top_k must be an integer"
+
+    return queries, profiles, top_k, None
+
+
+def run_search_batch(queries, profiles, top_k=10, scheme_context=None):
+    """
+    Batched retrieval (one encode, shared candidate sets, multi-row FAISS)
+    + per-item eligibility. Returns a list of (query, retrieved, eligible, rejected, system_trace).
+    """
+    if not queries:
+        return []
+
+    for query, user_profile in zip(queries, profiles):
+        log_search_query(query, user_profile)
+
+    system_traces = [[] for _ in queries]
+    retrieved_batch = policy_agent.retrieve_policies_batch(
+        queries=queries,
+        profiles=profiles,
+        top_k=top_k,
+        system_traces=system_traces,
+        scheme_context=scheme_context
+    )
 
-    if not scheme:
-        return jsonify({"error": "Scheme not found"}), 404
+    results = []
+    for query, user_profile, retrieved, system_trace in zip(queries, profiles, retrieved_batch, system_traces):
+        eligible, rejected = elig_agent.validate_user_for_schemes(user_profile, retrieved, scheme_context)
+        results.append((query, retrieved, eligible, rejected, system_trace))
 
-    required_docs = doc_agent.get_required_documents(
-        scheme_id=scheme_id,
-        raw_documents_text=scheme.get("documents_required_text", "")
-    )
+    current_span().set(batch_size=len(queries))
+    return results
 
-    return jsonify({"required_documents": serialize(required_docs)})
 
+def print_snapshot(system_snapshot):
+    # The full pretty-printed snapshot is for debugging (TRACE_VERBOSITY=full)
+    if verbose(FULL):
+        print("\n📊 SYSTEM SNAPSHOT")
+        print(json.dumps(system_snapshot, indent=2))
+    else:
+        print(f"📊 {system_snapshot['interaction_id']}: {system_snapshot['metrics']['schemes_found']} schemes")
 
-# -------------------- DOCUMENT VALIDATION --------------------
-@app.route("/api/validate-document", methods=["POST"])
-def validate_document():
-    initialize_agents()
 
-    # ===== STEP 1: VALIDATE REQUEST =====
-    if "file" not in request.files:
-        return jsonify({"error": "No file provided"}), 400
+def search_snapshot(interaction_id, query, system_trace, retrieved):
+    # 🔹 SYSTEM SNAPSHOT (UPGRADED, NOT BROKEN)
+    return {
+        "interaction_id": interaction_id,
+        "active_phase": "SCHEME_DISCOVERY",
+        "active_agent": "POLICY_RETRIEVER_AGENT",
+        "trace": system_trace,
+        "metrics": {
+            "query": query,
+            "schemes_found": len(retrieved)
+        }
+    }
 
-    file = request.files["file"]
-    scheme_id = request.form.get("scheme_id")
-    document_type = request.form.get("document_type")
 
-    if not file or file.filename == "":
-        return jsonify({"error": "Invalid file"}), 400
+def ndjson(event):
+    """One line of a streamed (NDJSON) search response."""
+    return json.dumps(serialize(event), default=str) + "\n"
+
 
+def upload_error(filename, scheme_id, document_type):
+    """Reason an upload request is rejected, or None if it is acceptable."""
+    if not filename:
+        return "Invalid file"
     if not scheme_id or not document_type:
-        return jsonify({"error": "Missing scheme_id or document_type"}), 400
+        return "Missing scheme_id or document_type"
+    if not allowed_file(filename):
+        return f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+    return None
 
-    if not allowed_file(file.filename):
-        return jsonify({"error": f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
 
-    print(f"\n📋 DOCUMENT VALIDATION START")
-    print(f"  Scheme ID: {scheme_id}")
-    print(f"  Document Type: {document_type}")
-    print(f"  File: {file.filename}")
+def upload_path(filename):
+    """Timestamped path in the upload folder for a user-supplied filename."""
+    filename = f"{int(time.time())}_{secure_filename(filename)}"
+    return os.path.join(UPLOAD_FOLDER, filename)
 
-    # ===== STEP 2: SAVE FILE =====
-    filename = secure_filename(file.filename)
-    timestamp = int(time.time())
-    filename = f"{timestamp}_{filename}"
-    path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    
-    try:
-        file.save(path)
-        if not os.path.exists(path):
-            return jsonify({"error": "Failed to save file"}), 500
-        print(f"  ✅ File saved: {path}")
-    except Exception as e:
-        return jsonify({"error": f"File save failed: {str(e)}"}), 500
 
+def validate_saved_document(path, scheme_id, document_type):
+    """OCR + keyword validation of an already saved upload. Returns (body, status)."""
     # ===== STEP 3: INITIALIZE SCHEME RULES IN AGENT =====
     try:
         if scheme_id not in doc_agent.doc_rules:
@@ -390,7 +447,7 @@ def validate_document():
             os.remove(path)
         except:
             pass
-        return jsonify({"error": f"Validation failed: {str(e)}"}), 500
+        return {"error": f"Validation failed: {str(e)}"}, 500
 
     # ===== STEP 5: GET VALIDATION MATRIX =====
     try:
@@ -431,28 +488,18 @@ def validate_document():
     }
     
     print(f"\n✅ RESPONSE: {response}\n")
-    return jsonify(response)
-    
+    return response, 200
 
-# -------------------- PATHWAY GENERATION --------------------
-@app.route("/api/generate-guidance", methods=["POST"])
-def generate_pathway():
-    initialize_agents()
-    data = request.get_json(silent=True)
-
-    if not data:
-        return jsonify({"error": "Invalid JSON"}), 400
-
-    eligibility_output = data.get("eligibility_output")
-    document_status = data.get("document_status")  # keep missing docs here
 
+def guidance_response(eligibility_output, document_status):
+    """Pathway + scheme summary for /api/generate-guidance. Returns (body, status)."""
     if not isinstance(eligibility_output, dict):
         eligibility_output = {}
     if not isinstance(document_status, dict):
         document_status = {}
 
     if not eligibility_output and not document_status:
-        return jsonify({"error": "eligibility_output and document_status required"}), 400
+        return {"error": "eligibility_output and document_status required"}, 400
 
     try:
         pathway = pathway_agent.generate_pathway(eligibility_output, document_status)
@@ -464,10 +511,401 @@ def generate_pathway():
             "application_url": scheme_details.get("application_url", "") if isinstance(scheme_details, dict) else "",
         }
 
-        return jsonify({"success": True, "pathway": pathway, "scheme": scheme_payload})
+        return {"success": True, "pathway": pathway, "scheme": scheme_payload}, 200
     except Exception as e:
         print(f"[GENERATE_GUIDANCE_ERROR] {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        return {"success": False, "error": str(e)}, 500
+
+
+def profile_number(value):
+    """Numeric profile field (age, income) from a number or numeric string; None if blank."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return value
+    number = float(str(value).replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+def eligible_schemes_response(data):
+    """Every scheme the profile qualifies for, for /api/eligible-schemes. Returns (body, status)."""
+    user_profile = dict((data or {}).get("userProfile") or {})
+    if not user_profile:
+        return {"error": "userProfile required"}, 400
+
+    try:
+        user_profile["age"] = profile_number(user_profile.get("age"))
+        user_profile["monthly_income"] = profile_number(user_profile.get("monthly_income"))
+        limit = data.get("limit")
+        limit = int(limit) if limit is not None else None
+    except (TypeError, ValueError):
+        return {"error": "age, monthly_income and limit must be numbers"}, 400
+
+    if user_profile["age"] is None:
+        return {"error": "age required"}, 400
+
+    eligible, total = elig_agent.find_eligible_schemes(user_profile, limit=limit)
+    return {"eligible_schemes": enrich(eligible), "total_eligible": total}, 200
+
+
+def ensure_screening_table():
+    """Create user_scheme_eligibility (once per process) so lookups before the first nightly run find it empty."""
+    global SCREENING_TABLE_READY
+    if not SCREENING_TABLE_READY:
+        UserSchemeEligibility.__table__.create(db.engine, checkfirst=True)
+        SCREENING_TABLE_READY = True
+
+
+def screened_schemes_response(user_id):
+    """A user's eligible schemes from the last screen_users_job.py run. Returns (body, status)."""
+    ensure_screening_table()
+    if db.session.get(User, user_id) is None:
+        return {"error": "User not found"}, 404
+
+    rows = (
+        UserSchemeEligibility.query
+        .filter_by(user_id=user_id, decision="ELIGIBLE")
+        .order_by(UserSchemeEligibility.scheme_id)
+        .all()
+    )
+    screened_at = db.session.query(db.func.max(UserSchemeEligibility.screened_at)).filter_by(user_id=user_id).scalar()
+    if screened_at is None:
+        return {"error": "User not screened yet"}, 404
+
+    return {
+        "user_id": user_id,
+        "eligible_schemes": [{"scheme_id": r.scheme_id, "final_decision": r.decision} for r in rows],
+        "total_eligible": len(rows),
+        "screened_at": screened_at.isoformat()
+    }, 200
+
+
+# -------------------- AGENT INITIALIZATION --------------------
+def initialize_agents():
+    global faiss_indexes, llm, policy_agent, elig_agent
+    global doc_agent, pathway_agent, schemes_collection, scheme_catalog, AGENTS_READY
+
+    if AGENTS_READY:
+        return
+
+    print("🔄 Initializing agents...")
+    start_time = time.time()
+
+    # Eligible-scheme lookups are served from this table, even before screen_users_job.py has run
+    with app.app_context():
+        ensure_screening_table()
+
+    # Load FAISS indexes (memory-mapped, shared across worker processes)
+    FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
+    index_start = time.time()
+    rss_before = resident_memory_mb()
+    faiss_indexes.update(load_faiss_indexes("../faiss_indexes", FIELDS))
+    print(
+        f"📦 FAISS indexes loaded in {round((time.time() - index_start) * 1000, 1)}ms "
+        f"(RSS {rss_before} → {resident_memory_mb()} MB)"
+    )
+
+    # MongoDB
+    client = MongoClient("mongodb://localhost:27017/")
+    db = client["policy_db"]
+    schemes_collection = db["schemes"]
+
+    # In-memory scheme snapshot (same ordinals as the FAISS ids)
+    scheme_catalog = SchemeCatalog(schemes_collection, faiss_indexes)
+
+    # Agents
+    llm = LocalLLM()
+    policy_agent = PolicyRetrieverAgent(
+        faiss_indexes,
+        llm,
+        adaptive_search_depth=ADAPTIVE_SEARCH_DEPTH,
+        filtered_search=FILTERED_SEARCH,
+        result_cache=RetrievalCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS),
+        concurrent_stages=True,
+        catalog=scheme_catalog,
+        scheme_features=SchemeFeatureStore.load("../faiss_indexes"),
+        lexical_index=BM25Index.load("../faiss_indexes"),
+        occupation_postings=OccupationPostings.load("../faiss_indexes")
+    )
+    elig_agent = EligibilityAgent(faiss_indexes, llm, catalog=scheme_catalog)
+    doc_agent = DocumentValidationAgent(llm)
+    pathway_agent = PathwayGenerationAgent(llm)
+
+    warmup = top_logged_queries(CACHE_WARMUP_TOP_N)
+    if warmup:
+        warm_start = time.time()
+        warmed = policy_agent.warm_up(warmup, top_k=10)
+        print(f"🔥 Result cache warmed with {warmed} logged queries in {round(time.time() - warm_start, 2)}s")
+
+    AGENTS_READY = True
+    print(f"✅ Agents ready in {round(time.time() - start_time, 2)}s")
+
+
+# -------------------- ROUTES --------------------
+
+@app.route("/api/users/<int:user_id>", methods=["GET"])
+def get_user(user_id):
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    return jsonify(user_json(user))
+
+@app.route("/api/users/<int:user_id>/eligible-schemes", methods=["GET"])
+def get_user_eligible_schemes(user_id):
+    """Precomputed by screen_users_job.py; no agents or screening involved."""
+    body, status = screened_schemes_response(user_id)
+    return jsonify(serialize(body)), status
+
+@app.route("/api/health")
+def health():
+    return jsonify(health_status())
+
+
+@app.route("/api/metrics")
+def metrics():
+    """Prometheus text format; ?format=json gives p50/p95/p99 per stage instead."""
+    if request.args.get("format") == "json":
+        return jsonify(stage_summary())
+    return Response(registry.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route("/api/traces")
+def traces():
+    """Most recent sampled traces from the in-memory ring buffer (?limit=N)."""
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify({"tracing": tracer.stats(), "traces": serialize(tracer.recent_traces(limit))})
+
+
+@app.route("/api/save-profile", methods=["POST"])
+def save_profile():
+    initialize_agents()
+    data = request.get_json() 
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    user = save_user(data)
+
+    return jsonify({"status": "success", "profile": data, "user_id": user.id})
+
+
+# -------------------- SEARCH SCHEMES --------------------
+@app.route("/api/search-schemes", methods=["POST"])
+@traced("http.search_schemes")
+def search_schemes():
+    initialize_agents()
+    data = get_json()
+    interaction_id = str(uuid.uuid4())
+
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    query = data.get("query")
+    user_profile = data.get("userProfile", {})
+
+    if not query:
+        return jsonify({"error": "Query required"}), 400
+
+    log_search_query(query, user_profile)
+
+    scheme_context = new_scheme_context()
+    retrieved, eligible, rejected, system_trace = run_search(query, user_profile, scheme_context=scheme_context)
+
+    system_snapshot = search_snapshot(interaction_id, query, system_trace, retrieved)
+
+    print_snapshot(system_snapshot)
+
+    top_schemes, eligible_schemes, rejected_schemes = enrich_lists(scheme_context, retrieved, eligible, rejected)
+    current_span().set(**scheme_context.stats())
+
+    return jsonify(serialize({
+        "interaction_id": interaction_id,
+        "top_schemes": top_schemes,
+        "eligible_schemes": eligible_schemes,
+        "rejected_schemes": rejected_schemes,
+        "_system": system_snapshot
+    }))
+
+
+
+# -------------------- STREAMING SEARCH --------------------
+@app.route("/api/search-schemes/stream", methods=["POST"])
+@traced("http.search_schemes_stream")
+def search_schemes_stream():
+    """
+    /api/search-schemes as NDJSON, one event per line, sent as each stage
+    finishes: "retrieved" (ranked schemes), "eligibility" (eligible /
+    rejected decisions), "enriched" (full scheme cards, once per list) and
+    "done" (the _system snapshot). An "error" event ends a failed stream.
+    """
+    initialize_agents()
+    data = get_json()
+
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    query = data.get("query")
+    user_profile = data.get("userProfile", {})
+
+    if not query:
+        return jsonify({"error": "Query required"}), 400
+
+    log_search_query(query, user_profile)
+    interaction_id = str(uuid.uuid4())
+
+    def generate():
+        try:
+            scheme_context = new_scheme_context()
+            retrieved, system_trace = retrieve_for_search(query, user_profile, scheme_context=scheme_context)
+            yield ndjson({"event": "retrieved", "interaction_id": interaction_id, "top_schemes": retrieved})
+
+            eligible, rejected = elig_agent.validate_user_for_schemes(user_profile, retrieved, scheme_context)
+            yield ndjson({"event": "eligibility", "eligible_schemes": eligible, "rejected_schemes": rejected})
+
+            scheme_context.fetch(scheme_ids_of(retrieved + eligible + rejected))
+            for key, schemes in (("top_schemes", retrieved), ("eligible_schemes", eligible), ("rejected_schemes", rejected)):
+                yield ndjson({"event": "enriched", "list": key, "schemes": enrich(schemes, scheme_context)})
+
+            yield ndjson({"event": "done", "_system": search_snapshot(interaction_id, query, system_trace, retrieved)})
+        except Exception as e:
+            print(f"[SEARCH_STREAM_ERROR] {e}")
+            yield ndjson({"event": "error", "error": str(e)})
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers=STREAM_HEADERS)
+
+
+# -------------------- BATCH SEARCH --------------------
+@app.route("/api/search-schemes/batch", methods=["POST"])
+@traced("http.search_schemes_batch")
+def search_schemes_batch():
+    """
+    Several searches in one call: {"items": [{"query", "userProfile"}, ...], "top_k"}.
+    Retrieval is batched (one encode, shared candidate sets, multi-row FAISS);
+    each item gets the same response as /api/search-schemes.
+    """
+    initialize_agents()
+
+    queries, profiles, top_k, error = parse_batch(get_json())
+    if error:
+        return jsonify({"error": error}), 400
+
+    # One scheme context for the whole batch: items share documents
+    scheme_context = new_scheme_context()
+    results = []
+    for query, retrieved, eligible, rejected, system_trace in run_search_batch(queries, profiles, top_k, scheme_context):
+        interaction_id = str(uuid.uuid4())
+        top_schemes, eligible_schemes, rejected_schemes = enrich_lists(scheme_context, retrieved, eligible, rejected)
+        results.append({
+            "interaction_id": interaction_id,
+            "top_schemes": top_schemes,
+            "eligible_schemes": eligible_schemes,
+            "rejected_schemes": rejected_schemes,
+            "_system": search_snapshot(interaction_id, query, system_trace, retrieved)
+        })
+    current_span().set(**scheme_context.stats())
+
+    return jsonify(serialize({"results": results}))
+
+
+# -------------------- ALL ELIGIBLE SCHEMES --------------------
+@app.route("/api/eligible-schemes", methods=["POST"])
+@traced("http.eligible_schemes")
+def eligible_schemes():
+    """
+    Every scheme the user qualifies for, no query needed:
+    {"userProfile": {...}, "limit"}. Checked against all schemes at once
+    by the columnar eligibility engine.
+    """
+    initialize_agents()
+
+    body, status = eligible_schemes_response(get_json())
+    return jsonify(serialize(body)), status
+
+
+# -------------------- REQUIRED DOCUMENTS --------------------
+@app.route("/api/get-required-documents", methods=["POST"])
+@traced("http.get_required_documents")
+def get_required_documents():
+    initialize_agents()
+    data = get_json()
+
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    scheme_id = data.get("scheme_id")
+    if not scheme_id:
+        return jsonify({"error": "scheme_id required"}), 400
+
+    scheme = scheme_catalog.get(scheme_id)
+    if scheme is None:
+        try:
+            scheme = schemes_collection.find_one({"_id": ObjectId(scheme_id)})
+        except Exception:
+            scheme = schemes_collection.find_one({"_id": scheme_id})
+
+    if not scheme:
+        return jsonify({"error": "Scheme not found"}), 404
+
+    required_docs = doc_agent.get_required_documents(
+        scheme_id=scheme_id,
+        raw_documents_text=scheme.get("documents_required_text", "")
+    )
+
+    return jsonify({"required_documents": serialize(required_docs)})
+
+
+# -------------------- DOCUMENT VALIDATION --------------------
+@app.route("/api/validate-document", methods=["POST"])
+@traced("http.validate_document")
+def validate_document():
+    initialize_agents()
+
+    # ===== STEP 1: VALIDATE REQUEST =====
+    if "file" not in request.files:
+        return jsonify({"error": "No file provided"}), 400
+
+    file = request.files["file"]
+    scheme_id = request.form.get("scheme_id")
+    document_type = request.form.get("document_type")
+
+    error = upload_error(file.filename if file else "", scheme_id, document_type)
+    if error:
+        return jsonify({"error": error}), 400
+
+    print(f"\n📋 DOCUMENT VALIDATION START")
+    print(f"  Scheme ID: {scheme_id}")
+    print(f"  Document Type: {document_type}")
+    print(f"  File: {file.filename}")
+
+    # ===== STEP 2: SAVE FILE =====
+    path = upload_path(file.filename)
+    
+    try:
+        file.save(path)
+        if not os.path.exists(path):
+            return jsonify({"error": "Failed to save file"}), 500
+        print(f"  ✅ File saved: {path}")
+    except Exception as e:
+        return jsonify({"error": f"File save failed: {str(e)}"}), 500
+
+    body, status = validate_saved_document(path, scheme_id, document_type)
+    return jsonify(body), status
+    
+
+# -------------------- PATHWAY GENERATION --------------------
+@app.route("/api/generate-guidance", methods=["POST"])
+@traced("http.generate_guidance")
+def generate_pathway():
+    initialize_agents()
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
+
+    body, status = guidance_response(data.get("eligibility_output"), data.get("document_status"))
+    return jsonify(body), status
 
 
 # -------------------- RUN --------------------
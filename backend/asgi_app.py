@@ -0,0 +1,418 @@
+# asgi_app.py
+#
+# Asyncio serving path for the backend: the same routes as app.py, served by
+# Starlette + uvicorn. Scheme lookups go through the async Mongo driver
+# (motor); retrieval, eligibility, OCR and LLM calls run on a bounded CPU
+# executor, and blocking I/O without an async driver (Postgres users, upload
+# writes, the query log) on a small I/O executor. Many slow Mongo or OCR calls
+# overlap on one event loop instead of holding one OS thread per request, and
+# the thread count (and so memory) stays fixed however many requests are open.
+#
+# The Flask app (python app.py) keeps working unchanged; both share the
+# agents and request logic in app.py.
+#
+#   cd backend && python asgi_app.py
+#   cd backend && uvicorn asgi_app:app --port 5000
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import uvicorn
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as backend
+from agents.scheme_context import id_filter
+from agents.tracing import current_span, traced, tracer
+from agents.metrics import PROMETHEUS_CONTENT_TYPE, registry, stage_summary, stage_timer
+
+MONGO_URI = "mongodb://localhost:27017/"
+
+# Threads for CPU-bound work (embedding, FAISS, rerank, OCR, LLM generation);
+# numpy, FAISS and torch release the GIL inside their kernels
+CPU_WORKERS = max(2, os.cpu_count() or 2)
+# Threads for blocking I/O that has no async driver here
+IO_WORKERS = 8
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="asgi-cpu")
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="asgi-io")
+
+# Async handle on policy_db.schemes, opened at startup
+schemes = None
+
+
+# -------------------- HELPERS --------------------
+class BackendJSONResponse(JSONResponse):
+    """JSON like Flask's jsonify: NaN allowed, non-JSON values (dates) as strings."""
+
+    def render(self, content) -> bytes:
+        return json.dumps(content, default=str).encode("utf-8")
+
+
+def respond(body, status=200):
+    return BackendJSONResponse(backend.serialize(body), status_code=status)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    # The executor thread runs in a copy of the request's context so trace spans nest
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    return await loop.run_in_executor(cpu_executor, contextvars.copy_context().run, call)
+
+
+async def run_io(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    return await loop.run_in_executor(io_executor, contextvars.copy_context().run, call)
+
+
+async def get_json(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+async def read_form(request, max_bytes):
+    """
+    The request's form, or None once more than max_bytes of body arrive.
+    Counts the bytes actually read, so a chunked upload (no Content-Length)
+    cannot get past the limit.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            return None
+
+    async def receive():
+        return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+    return await Request(request.scope, receive).form()
+
+
+async def find_scheme(sid):
+    scheme = backend.scheme_catalog.get(sid)
+    if scheme is not None:
+        return scheme
+    try:
+        return await schemes.find_one({"_id": ObjectId(sid)})
+    except Exception:
+        return await schemes.find_one({"_id": sid})
+
+
+async def load_schemes(scheme_context, sids):
+    """Fill the request's SchemeContext: whatever it and the catalog lack comes from one motor `$in` query."""
+    missing = scheme_context.pending(sids)
+    if missing:
+        scheme_context.fetched(missing, await schemes.find(id_filter(missing)).to_list(length=None))
+
+
+async def enrich(entries, scheme_context):
+    """app.enrich, with the lookup through motor."""
+    with stage_timer("enrich"):
+        sids = backend.scheme_ids_of(entries)
+        await load_schemes(scheme_context, sids)
+    return [backend.apply_scheme_details(s, sid, scheme_context.get(sid)) for s, sid in zip(entries, sids)]
+
+
+async def search_response(query, retrieved, eligible, rejected, system_trace, scheme_context):
+    interaction_id = str(uuid.uuid4())
+    # One lookup for all three lists
+    await load_schemes(scheme_context, backend.scheme_ids_of(retrieved + eligible + rejected))
+    top_schemes = await enrich(retrieved, scheme_context)
+    eligible_schemes = await enrich(eligible, scheme_context)
+    rejected_schemes = await enrich(rejected, scheme_context)
+    return {
+        "interaction_id": interaction_id,
+        "top_schemes": top_schemes,
+        "eligible_schemes": eligible_schemes,
+        "rejected_schemes": rejected_schemes,
+        "_system": backend.search_snapshot(interaction_id, query, system_trace, retrieved)
+    }
+
+
+def load_user(user_id):
+    with backend.app.app_context():
+        user = backend.User.query.get(user_id)
+        return backend.user_json(user) if user else None
+
+
+def load_screened_schemes(user_id):
+    with backend.app.app_context():
+        return backend.screened_schemes_response(user_id)
+
+
+def create_user(data):
+    with backend.app.app_context():
+        return backend.save_user(data).id
+
+
+def save_upload(upload, path):
+    # UploadFile spools to disk past a small size; copy without reading it all into memory
+    with open(path, "wb") as out:
+        shutil.copyfileobj(upload.file, out)
+
+
+# -------------------- ROUTES --------------------
+async def get_user(request):
+    user = await run_io(load_user, request.path_params["user_id"])
+    if not user:
+        return respond({"error": "User not found"}, 404)
+    return respond(user)
+
+
+async def get_user_eligible_schemes(request):
+    body, status = await run_io(load_screened_schemes, request.path_params["user_id"])
+    return respond(body, status)
+
+
+async def health(request):
+    return respond(backend.health_status())
+
+
+async def metrics(request):
+    if request.query_params.get("format") == "json":
+        return respond(stage_summary())
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+async def traces(request):
+    try:
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        limit = 20
+    return respond({"tracing": tracer.stats(), "traces": tracer.recent_traces(limit)})
+
+
+async def save_profile(request):
+    data = await get_json(request)
+    if not data:
+        return respond({"error": "Invalid JSON"}, 400)
+
+    user_id = await run_io(create_user, data)
+    return respond({"status": "success", "profile": data, "user_id": user_id})
+
+
+@traced("http.search_schemes")
+async def search_schemes(request):
+    data = await get_json(request)
+    if not data:
+        return respond({"error": "Invalid JSON"}, 400)
+
+    query = data.get("query")
+    user_profile = data.get("userProfile", {})
+
+    if not query:
+        return respond({"error": "Query required"}, 400)
+
+    await run_io(backend.log_search_query, query, user_profile)
+
+    scheme_context = backend.new_scheme_context()
+    retrieved, eligible, rejected, system_trace = await run_cpu(
+        backend.run_search, query, user_profile, scheme_context=scheme_context
+    )
+
+    response = await search_response(query, retrieved, eligible, rejected, system_trace, scheme_context)
+    current_span().set(**scheme_context.stats())
+
+    backend.print_snapshot(response["_system"])
+
+    return respond(response)
+
+
+@traced("http.search_schemes_stream")
+async def search_schemes_stream(request):
+    """NDJSON stream of the search stages; same events as app.search_schemes_stream."""
+    data = await get_json(request)
+    if not data:
+        return respond({"error": "Invalid JSON"}, 400)
+
+    query = data.get("query")
+    user_profile = data.get("userProfile", {})
+
+    if not query:
+        return respond({"error": "Query required"}, 400)
+
+    await run_io(backend.log_search_query, query, user_profile)
+    interaction_id = str(uuid.uuid4())
+
+    async def generate():
+        try:
+            scheme_context = backend.new_scheme_context()
+            retrieved, system_trace = await run_cpu(
+                backend.retrieve_for_search, query, user_profile, scheme_context=scheme_context
+            )
+            yield backend.ndjson({"event": "retrieved", "interaction_id": interaction_id, "top_schemes": retrieved})
+
+            eligible, rejected = await run_cpu(
+                backend.elig_agent.validate_user_for_schemes, user_profile, retrieved, scheme_context
+            )
+            yield backend.ndjson({"event": "eligibility", "eligible_schemes": eligible, "rejected_schemes": rejected})
+
+            await load_schemes(scheme_context, backend.scheme_ids_of(retrieved + eligible + rejected))
+            for key, entries in (("top_schemes", retrieved), ("eligible_schemes", eligible), ("rejected_schemes", rejected)):
+                yield backend.ndjson({"event": "enriched", "list": key, "schemes": await enrich(entries, scheme_context)})
+
+            yield backend.ndjson({"event": "done", "_system": backend.search_snapshot(interaction_id, query, system_trace, retrieved)})
+        except Exception as e:
+            print(f"[SEARCH_STREAM_ERROR] {e}")
+            yield backend.ndjson({"event": "error", "error": str(e)})
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers=backend.STREAM_HEADERS)
+
+
+@traced("http.search_schemes_batch")
+async def search_schemes_batch(request):
+    queries, profiles, top_k, error = backend.parse_batch(await get_json(request))
+    if error:
+        return respond({"error": error}, 400)
+
+    scheme_context = backend.new_scheme_context()
+    batch = await run_cpu(backend.run_search_batch, queries, profiles, top_k, scheme_context)
+    results = [await search_response(*item, scheme_context) for item in batch]
+    current_span().set(**scheme_context.stats())
+
+    return respond({"results": results})
+
+
+@traced("http.eligible_schemes")
+async def eligible_schemes(request):
+    body, status = await run_cpu(backend.eligible_schemes_response, await get_json(request))
+    return respond(body, status)
+
+
+@traced("http.get_required_documents")
+async def get_required_documents(request):
+    data = await get_json(request)
+    if not data:
+        return respond({"error": "Invalid JSON"}, 400)
+
+    scheme_id = data.get("scheme_id")
+    if not scheme_id:
+        return respond({"error": "scheme_id required"}, 400)
+
+    scheme = await find_scheme(scheme_id)
+    if not scheme:
+        return respond({"error": "Scheme not found"}, 404)
+
+    required_docs = await run_cpu(
+        backend.doc_agent.get_required_documents,
+        scheme_id=scheme_id,
+        raw_documents_text=scheme.get("documents_required_text", "")
+    )
+
+    return respond({"required_documents": required_docs})
+
+
+@traced("http.validate_document")
+async def validate_document(request):
+    if int(request.headers.get("content-length") or 0) > backend.MAX_FILE_SIZE:
+        return respond({"error": "File too large"}, 413)
+
+    form = await read_form(request, backend.MAX_FILE_SIZE)
+    if form is None:
+        return respond({"error": "File too large"}, 413)
+    upload = form.get("file")
+    scheme_id = form.get("scheme_id")
+    document_type = form.get("document_type")
+
+    if upload is None or isinstance(upload, str):
+        return respond({"error": "No file provided"}, 400)
+
+    error = backend.upload_error(upload.filename or "", scheme_id, document_type)
+    if error:
+        return respond({"error": error}, 400)
+
+    print(f"\n📋 DOCUMENT VALIDATION START")
+    print(f"  Scheme ID: {scheme_id}")
+    print(f"  Document Type: {document_type}")
+    print(f"  File: {upload.filename}")
+
+    path = backend.upload_path(upload.filename)
+    try:
+        await run_io(save_upload, upload, path)
+        print(f"  ✅ File saved: {path}")
+    except Exception as e:
+        return respond({"error": f"File save failed: {str(e)}"}, 500)
+    finally:
+        await upload.close()
+
+    body, status = await run_cpu(backend.validate_saved_document, path, scheme_id, document_type)
+    return respond(body, status)
+
+
+@traced("http.generate_guidance")
+async def generate_guidance(request):
+    data = await get_json(request)
+    if not data:
+        return respond({"error": "Invalid JSON"}, 400)
+
+    body, status = await run_cpu(
+        backend.guidance_response, data.get("eligibility_output"), data.get("document_status")
+    )
+    return respond(body, status)
+
+
+# -------------------- APP --------------------
+@asynccontextmanager
+async def lifespan(app):
+    global schemes
+
+    # Agent loading (FAISS, catalog, models) is blocking: keep it off the loop
+    await run_cpu(backend.initialize_agents)
+    client = AsyncIOMotorClient(MONGO_URI)
+    schemes = client["policy_db"]["schemes"]
+    print(f"⚡ ASGI backend ready ({CPU_WORKERS} CPU / {IO_WORKERS} I/O workers)")
+
+    yield
+
+    client.close()
+    cpu_executor.shutdown(wait=False)
+    io_executor.shutdown(wait=False)
+
+
+routes = [
+    Route("/api/users/{user_id:int}", get_user, methods=["GET"]),
+    Route("/api/users/{user_id:int}/eligible-schemes", get_user_eligible_schemes, methods=["GET"]),
+    Route("/api/health", health, methods=["GET"]),
+    Route("/api/metrics", metrics, methods=["GET"]),
+    Route("/api/traces", traces, methods=["GET"]),
+    Route("/api/save-profile", save_profile, methods=["POST"]),
+    Route("/api/search-schemes", search_schemes, methods=["POST"]),
+    Route("/api/search-schemes/stream", search_schemes_stream, methods=["POST"]),
+    Route("/api/search-schemes/batch", search_schemes_batch, methods=["POST"]),
+    Route("/api/eligible-schemes", eligible_schemes, methods=["POST"]),
+    Route("/api/get-required-documents", get_required_documents, methods=["POST"]),
+    Route("/api/validate-document", validate_document, methods=["POST"]),
+    Route("/api/generate-guidance", generate_guidance, methods=["POST"]),
+]
+
+middleware = [
+    Middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"],
+    )
+]
+
+app = Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+
+
+# -------------------- RUN --------------------
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=5000)
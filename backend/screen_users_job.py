@@ -0,0 +1,191 @@
+# screen_users_job.py
+#
+# Nightly bulk eligibility screening. Streams every registered user from
+# Postgres in id order, a chunk at a time, screens each one against every
+# scheme's compiled rules on a process pool, and replaces the user's rows in
+# user_scheme_eligibility: one row per user × scheme with the decision and
+# the failed criteria. /api/users/<id>/eligible-schemes then serves a
+# user's list straight from that table, so dashboards opening thousands of
+# citizens never run the eligibility checks themselves.
+#
+# With --schemes it runs incrementally instead: the stored profiles are
+# indexed once (ProfilePercolator) and only the given schemes are matched
+# against them, writing ELIGIBLE rows for the users they admit.
+# others/extract_eligibility.py runs this for the schemes it just added.
+#
+#   cd backend && python screen_users_job.py --chunk 2000 --workers 4
+#   cd backend && python screen_users_job.py --schemes SCHEME_0651 SCHEME_0652
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.eligibility_engine import EligibilityEngine, normalize_user
+from agents.eligibility_rules import compile_all
+from agents.profile_percolator import ProfilePercolator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_FILE = os.path.join(ROOT, "precomputed_rules_new.json")
+
+# Per worker process, built once by init_worker
+_engine = None
+
+
+# -------------------- WORKERS --------------------
+def load_rules(rules_file=RULES_FILE) -> dict:
+    with open(rules_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def init_worker(scheme_ids, rules_file=RULES_FILE):
+    """Compile the rules and the columnar engine once per worker process."""
+    global _engine
+    _engine = EligibilityEngine.build(compile_all(load_rules(rules_file)), scheme_ids)
+
+
+def screen_users(profiles, screened_at):
+    """Rows for a batch of (user_id, profile) pairs: every scheme, ELIGIBLE or REJECTED."""
+    rows = []
+    for user_id, profile in profiles:
+        user = normalize_user(profile)
+        eligible = _engine.eligible(user)
+        for ordinal, scheme_id in enumerate(_engine.scheme_ids):
+            passed = bool(eligible[ordinal])
+            rows.append({
+                "user_id": user_id,
+                "scheme_id": scheme_id,
+                "decision": "ELIGIBLE" if passed else "REJECTED",
+                "failed_criteria": [] if passed else _engine.failures(user, ordinal),
+                "screened_at": screened_at
+            })
+    return rows
+
+
+# -------------------- POSTGRES --------------------
+def user_chunks(User, chunk_size):
+    """(user_id, profile) chunks in id order, paged by id so no offset scans."""
+    last_id = 0
+    while True:
+        users = User.query.filter(User.id > last_id).order_by(User.id).limit(chunk_size).all()
+        if not users:
+            return
+        last_id = users[-1].id
+        yield [
+            (u.id, {
+                "age": u.age,
+                "gender": u.gender,
+                "state": u.state,
+                "occupation": u.occupation,
+                "monthly_income": float(u.monthly_income) if u.monthly_income is not None else None
+            })
+            for u in users
+        ]
+
+
+def replace_rows(db, Model, user_ids, rows):
+    """Swap a chunk's users' rows in one transaction (bulk executemany insert)."""
+    db.session.execute(db.delete(Model).where(Model.user_id.in_(user_ids)))
+    if rows:
+        db.session.execute(db.insert(Model), rows)
+    db.session.commit()
+
+
+def percolate_schemes(db, User, Model, rules_by_scheme, chunk_size, screened_at) -> dict:
+    """
+    Incremental run for a few new or re-extracted schemes: their rows are
+    replaced by ELIGIBLE rows for the users they admit (the nightly run
+    fills in the REJECTED ones). Returns scheme id -> user ids that were
+    not eligible for it before.
+    """
+    percolator = ProfilePercolator.build(u for chunk in user_chunks(User, chunk_size) for u in chunk)
+
+    newly_eligible = {}
+    for scheme_id, user_ids in percolator.match_all(rules_by_scheme).items():
+        before = {
+            user_id for (user_id,) in
+            db.session.query(Model.user_id).filter_by(scheme_id=scheme_id, decision="ELIGIBLE")
+        }
+        newly_eligible[scheme_id] = [user_id for user_id in user_ids if user_id not in before]
+
+        db.session.execute(db.delete(Model).where(Model.scheme_id == scheme_id))
+        if user_ids:
+            db.session.execute(db.insert(Model), [
+                {
+                    "user_id": user_id,
+                    "scheme_id": scheme_id,
+                    "decision": "ELIGIBLE",
+                    "failed_criteria": [],
+                    "screened_at": screened_at
+                }
+                for user_id in user_ids
+            ])
+    db.session.commit()
+    return newly_eligible
+
+
+def split(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen every registered user against every scheme")
+    parser.add_argument("--chunk", type=int, default=2000, help="users read from Postgres per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017/")
+    parser.add_argument("--schemes", nargs="+", help="only match these (newly ingested) schemes")
+    args = parser.parse_args()
+
+    # Imported here so worker processes (spawned on Windows) do not load the whole backend
+    from pymongo import MongoClient
+    from app import app, db, User, UserSchemeEligibility
+
+    if args.schemes:
+        rules = load_rules()
+        start = time.time()
+        with app.app_context():
+            UserSchemeEligibility.__table__.create(db.engine, checkfirst=True)
+            newly_eligible = percolate_schemes(
+                db, User, UserSchemeEligibility,
+                {scheme_id: rules.get(scheme_id, {}) for scheme_id in args.schemes},
+                args.chunk, datetime.utcnow()
+            )
+        for scheme_id, user_ids in newly_eligible.items():
+            print(f"📣 {scheme_id}: {len(user_ids)} users newly eligible")
+        print(f"✅ Percolated {len(newly_eligible)} schemes in {round(time.time() - start, 2)}s")
+        return
+
+    # Same scheme universe as EligibilityAgent without a catalog
+    schemes = MongoClient(args.mongo)["policy_db"]["schemes"]
+    scheme_ids = [s["_id"] for s in schemes.find({}, {"_id": 1})]
+    print(f"🧮 Screening against {len(scheme_ids)} schemes with {args.workers} workers")
+
+    start = time.time()
+    screened_at = datetime.utcnow()
+    users = eligible = 0
+
+    with app.app_context(), ProcessPoolExecutor(
+        max_workers=args.workers, initializer=init_worker, initargs=(scheme_ids,)
+    ) as pool:
+        UserSchemeEligibility.__table__.create(db.engine, checkfirst=True)
+
+        for chunk in user_chunks(User, args.chunk):
+            rows = []
+            for batch_rows in pool.map(screen_users, split(chunk, args.workers), [screened_at] * args.workers):
+                rows.extend(batch_rows)
+
+            replace_rows(db, UserSchemeEligibility, [user_id for user_id, _ in chunk], rows)
+            users += len(chunk)
+            eligible += sum(r["decision"] == "ELIGIBLE" for r in rows)
+            print(f"   {users} users screened ({round(time.time() - start, 1)}s)")
+
+    print(f"✅ Screened {users} users: {eligible} eligible user × scheme pairs in {round(time.time() - start, 2)}s")
+
+
+if __name__ == "__main__":
+    main()
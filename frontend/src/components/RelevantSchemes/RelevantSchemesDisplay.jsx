@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { Search, Loader2, TrendingUp, Users, MapPin, Briefcase } from 'lucide-react'
-import api from '../../utils/api'
+import { streamPost } from '../../utils/api'
 
 function RelevantSchemesDisplay({ userProfile,
   setSystemSnapshot,
@@ -26,26 +26,43 @@ function RelevantSchemesDisplay({ userProfile,
       setLoading(true)
       setSearching(true)
 
-      const response = await api.post('/api/search-schemes', {
+      // Streamed: ranked schemes render first, eligibility and full
+      // scheme details fill in as the backend finishes each stage
+      let allSchemes = []
+      await streamPost('/api/search-schemes/stream', {
         query: searchQuery || 'all',
         userProfile
-      })
-      setTopSchemes(response.data.top_schemes || [])
-      setEligibleSchemes(response.data.eligible_schemes || [])
-      setRejectedSchemes(response.data.rejected_schemes || [])
-      setSystemSnapshot(response.data._system || {})
-
-      // Display top_schemes if no search query, otherwise use search results
-      const allSchemes = response.data.top_schemes || []
-      const eligibleSchemes = response.data.eligible_schemes || []
-
-      setSchemes(allSchemes)
-      setShowTop10(false) // Reset filter to show all results
-      setStats({
-        totalSchemes: allSchemes.length,
-        averageMatch: allSchemes.length > 0
-          ? Math.round((eligibleSchemes.length / allSchemes.length) * 100)
-          : 0
+      }, (event) => {
+        if (event.event === 'retrieved') {
+          allSchemes = event.top_schemes || []
+          setTopSchemes(allSchemes)
+          setSchemes(allSchemes)
+          setShowTop10(false) // Reset filter to show all results
+          setStats({ totalSchemes: allSchemes.length, averageMatch: 0 })
+          setLoading(false)
+        } else if (event.event === 'eligibility') {
+          const eligibleSchemes = event.eligible_schemes || []
+          setEligibleSchemes(eligibleSchemes)
+          setRejectedSchemes(event.rejected_schemes || [])
+          setStats({
+            totalSchemes: allSchemes.length,
+            averageMatch: allSchemes.length > 0
+              ? Math.round((eligibleSchemes.length / allSchemes.length) * 100)
+              : 0
+          })
+        } else if (event.event === 'enriched') {
+          const enriched = event.schemes || []
+          if (event.list === 'top_schemes') {
+            setTopSchemes(enriched)
+            setSchemes(enriched)
+          } else if (event.list === 'eligible_schemes') {
+            setEligibleSchemes(enriched)
+          } else if (event.list === 'rejected_schemes') {
+            setRejectedSchemes(enriched)
+          }
+        } else if (event.event === 'done') {
+          setSystemSnapshot(event._system || {})
+        }
       })
     } catch (err) {
       console.error(err)
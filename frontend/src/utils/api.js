@@ -33,4 +33,40 @@ api.interceptors.response.use(
   }
 )
 
+// POST a JSON body to an NDJSON streaming endpoint and call onEvent for
+// every line as it arrives, so results can render before the response ends
+export const streamPost = async (url, body, onEvent) => {
+  console.log(`API Stream: POST ${url}`)
+  const response = await fetch(`${API_BASE_URL}${url}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  })
+
+  if (!response.ok || !response.body) {
+    const error = await response.json().catch(() => ({}))
+    throw new Error(error.error || `Stream request failed (${response.status})`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffered = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done })
+
+    const lines = buffered.split('\n')
+    buffered = lines.pop()
+    for (const line of lines) {
+      if (!line.trim()) continue
+      const event = JSON.parse(line)
+      if (event.event === 'error') throw new Error(event.error)
+      onEvent(event)
+    }
+
+    if (done) break
+  }
+}
+
 export default api
@@ -4,10 +4,13 @@ from gpt4all import GPT4All
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from pathlib import Path
+from .embedding_cache import EmbeddingCache
+
+EMBEDDING_MODEL_ID = "sentence-transformers/all-mpnet-base-v2"
 
 
 class LocalLLM:
-    def __init__(self):
+    def __init__(self, embedding_cache_size: int = 4096):
 
         models_dir = Path("../models")
         models_dir.mkdir(exist_ok=True)
@@ -28,13 +31,40 @@ class LocalLLM:
 
 
         self.embedder = SentenceTransformer(
-            "sentence-transformers/all-mpnet-base-v2"
+            EMBEDDING_MODEL_ID
         )  # 768-d
+        self.embedding_model_id = EMBEDDING_MODEL_ID
+
+        # Repeated queries and profiles reuse their vectors instead of re-encoding
+        self.embedding_cache = EmbeddingCache(max_entries=embedding_cache_size)
 
     def generate(self, prompt: str, max_tokens: int = 256) -> str:
         with self.model.chat_session():
             return self.model.generate(prompt, max_tokens=max_tokens, temp=0.1)
 
     def get_embedding(self, text: str) -> np.ndarray:
-        return self.embedder.encode(text, normalize_embeddings=True)
-    
\ No newline at end of file
+        normalized = self.embedding_cache.normalize(text)
+        key = (self.embedding_model_id, normalized)
+
+        vector = self.embedding_cache.get(key)
+        if vector is None:
+            vector = self.embedding_cache.put(
+                key, self.embedder.encode(normalized, normalize_embeddings=True)
+            )
+        return vector
+
+    def get_embeddings(self, texts: list) -> list:
+        """
+        Embeddings for several texts: cached vectors are reused and all
+        misses are encoded together in one batch.
+        """
+        keys = [(self.embedding_model_id, self.embedding_cache.normalize(t)) for t in texts]
+        vectors = [self.embedding_cache.get(key) for key in keys]
+
+        missing = list(dict.fromkeys(key for key, v in zip(keys, vectors) if v is None))
+        if missing:
+            encoded = self.embedder.encode([key[1] for key in missing], normalize_embeddings=True)
+            fresh = {key: self.embedding_cache.put(key, vector) for key, vector in zip(missing, encoded)}
+            vectors = [v if v is not None else fresh[key] for key, v in zip(keys, vectors)]
+
+        return vectors
@@ -0,0 +1,77 @@
+# bench_eligibility_engine.py
+#
+# Latency of one profile against every scheme with the columnar
+# EligibilityEngine on a synthetic corpus (default 100k schemes, rules
+# resampled from precomputed_rules_new.json), against the per-scheme
+# build_eligibility_matrix loop.
+#
+#   python -m others.bench_eligibility_engine --schemes 100000
+
+import argparse
+import json
+import os
+import random
+import time
+import numpy as np
+from agents.eligibility_agent import EligibilityAgent
+from agents.eligibility_engine import EligibilityEngine, normalize_user
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description="Benchmark the columnar eligibility engine")
+parser.add_argument("--schemes", type=int, default=100000)
+parser.add_argument("--repeat", type=int, default=200)
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+
+with open(os.path.join(ROOT, "precomputed_rules_new.json"), "r", encoding="utf-8") as f:
+    source_rules = list(json.load(f).values())
+
+rules = {f"SCHEME_{i:06d}": rng.choice(source_rules) for i in range(args.schemes)}
+
+PROFILES = [
+    {"age": 34, "gender": "Female", "state": "Puducherry", "occupation": "Fisherman", "monthly_income": 8000},
+    {"age": 50, "gender": "Male", "state": "Kerala", "occupation": "farmer", "monthly_income": 20000},
+    {"age": 19, "gender": "Female", "state": "Tamil Nadu", "occupation": "Student", "monthly_income": None},
+]
+
+
+def timed(fn, repeat: int) -> tuple:
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+start = time.perf_counter()
+engine = EligibilityEngine.build(rules)
+build_ms = (time.perf_counter() - start) * 1000
+
+n_bitmaps = sum(len(b) for b in engine.bitmaps.values())
+bitmap_kb = sum(b.nbytes for bitmaps in engine.bitmaps.values() for b in bitmaps.values()) / 1024
+print(f"✅ EligibilityEngine built for {args.schemes} schemes in {build_ms:.1f}ms ({n_bitmaps} bitmaps, {bitmap_kb:.0f} KB)")
+
+# Scalar baseline on a slice, scaled up (a full pass takes seconds)
+baseline_size = min(args.schemes, 5000)
+baseline_rules = list(rules.values())[:baseline_size]
+
+for profile in PROFILES:
+    user = normalize_user(profile)
+    mask, engine_ms = timed(lambda: engine.eligible(user), args.repeat)
+    ids, ids_ms = timed(lambda: engine.eligible_ids(user), max(args.repeat // 10, 1))
+
+    def scalar():
+        return [
+            all(v["status"] == "PASS" for v in EligibilityAgent.build_eligibility_matrix(None, user, r).values())
+            for r in baseline_rules
+        ]
+
+    expected, scalar_ms = timed(scalar, 1)
+    assert np.array_equal(mask[:baseline_size], np.array(expected))
+
+    print(f"   {profile['occupation']:<10} engine mask:            {engine_ms * 1000:.1f}µs ({int(mask.sum())} eligible)")
+    print(f"   {'':<10} mask → scheme ids:      {ids_ms * 1000:.1f}µs")
+    print(f"   {'':<10} scalar matrix loop:     {scalar_ms * args.schemes / baseline_size:.1f}ms (extrapolated)")
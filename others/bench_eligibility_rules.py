@@ -0,0 +1,37 @@
+# bench_eligibility_rules.py
+#
+# Per-request time to check one profile against every scheme in
+# precomputed_rules_new.json with the compiled predicates
+# (agents/eligibility_rules.py), against the raw-dict matrix they replaced.
+#
+#   python -m others.bench_eligibility_rules --profiles 200
+
+import argparse
+import time
+from agents.eligibility_engine import normalize_user
+from agents.eligibility_rules import compile_all
+from others.eligibility_fixtures import RULES, legacy_matrix, profiles
+
+parser = argparse.ArgumentParser(description="Benchmark compiled eligibility predicates")
+parser.add_argument("--profiles", type=int, default=200)
+parser.add_argument("--seed", type=int, default=2)
+args = parser.parse_args()
+
+users = [normalize_user(p) for p in profiles(args.profiles, seed=args.seed)]
+
+start = time.perf_counter()
+compiled = compile_all(RULES)
+compile_ms = (time.perf_counter() - start) * 1000
+print(f"✅ {len(RULES)} schemes compiled in {compile_ms:.1f}ms")
+
+start = time.perf_counter()
+for user in users:
+    [scheme_id for scheme_id, predicate in compiled.items() if predicate.passes(user)]
+compiled_ms = (time.perf_counter() - start) * 1000 / len(users)
+
+start = time.perf_counter()
+for user in users:
+    [s for s, rules in RULES.items() if all(v["status"] == "PASS" for v in legacy_matrix(user, rules).values())]
+legacy_ms = (time.perf_counter() - start) * 1000 / len(users)
+
+print(f"   corpus pass ({len(users)} profiles): compiled {compiled_ms:.2f}ms, raw-dict matrix {legacy_ms:.2f}ms")
@@ -0,0 +1,105 @@
+# bench_facet_index.py
+#
+# Set-operation latency of the bitmap FacetIndex on a synthetic corpus
+# (default 100k schemes), against the same candidate sets built with
+# Python sets of scheme ids.
+#
+#   python -m others.bench_facet_index --schemes 100000
+
+import argparse
+import random
+import time
+from agents.facet_index import FacetIndex
+
+STATES = [
+    "andhra pradesh", "assam", "bihar", "delhi", "goa", "gujarat", "karnataka", "kerala",
+    "madhya pradesh", "maharashtra", "odisha", "puducherry", "punjab", "rajasthan",
+    "tamil nadu", "telangana", "uttar pradesh", "west bengal",
+]
+OCCUPATIONS = [
+    "farmer", "fisherman", "student", "worker", "artisan", "weaver", "driver",
+    "teacher", "nurse", "entrepreneur", "vendor", "labour", "construction",
+]
+GENDERS = ["male", "female", "any"]
+LEVELS = ["Central", "State"]
+
+parser = argparse.ArgumentParser(description="Benchmark bitmap facet set operations")
+parser.add_argument("--schemes", type=int, default=100000)
+parser.add_argument("--repeat", type=int, default=200)
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+
+
+def synthetic_scheme(i: int) -> dict:
+    return {
+        "_id": f"SCHEME_{i:06d}",
+        "level": rng.choice(LEVELS),
+        "state_norm": rng.sample(STATES, rng.choice([1, 1, 1, 2])) if rng.random() > 0.2 else ["*"],
+        "occupation_norm": rng.sample(OCCUPATIONS, rng.randint(1, 3)),
+        "gender_norm": [rng.choice(GENDERS)],
+    }
+
+
+def timed(fn, repeat: int) -> tuple:
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+records = [synthetic_scheme(i) for i in range(args.schemes)]
+
+start = time.perf_counter()
+index = FacetIndex.build(records)
+build_ms = (time.perf_counter() - start) * 1000
+
+n_bitmaps = sum(len(b) for b in index.bitmaps.values())
+bitmap_kb = sum(b.nbytes for bitmaps in index.bitmaps.values() for b in bitmaps.values()) / 1024
+print(f"✅ FacetIndex built for {args.schemes} schemes in {build_ms:.1f}ms ({n_bitmaps} bitmaps, {bitmap_kb:.0f} KB)")
+
+# Python-set baseline with the same postings
+sets = {}
+for scheme in records:
+    for value in scheme["state_norm"]:
+        sets.setdefault(("state", value), set()).add(scheme["_id"])
+    for value in scheme["occupation_norm"]:
+        sets.setdefault(("occupation", value), set()).add(scheme["_id"])
+    sets.setdefault(("level", scheme["level"].lower()), set()).add(scheme["_id"])
+
+state_values = ["tamil nadu", "*"]
+occupation_values = ["fisherman", "worker", "labour"]
+
+
+def bitmap_query():
+    candidates = index.select(state=state_values, occupation=occupation_values, level=["state"])
+    return index.mask(candidates)
+
+
+def set_query():
+    state = sets[("state", "tamil nadu")] | sets[("state", "*")]
+    occupation = set().union(*[sets[("occupation", v)] for v in occupation_values])
+    return state & occupation & sets[("level", "state")]
+
+
+mask, bitmap_ms = timed(bitmap_query, args.repeat)
+expected, set_ms = timed(set_query, max(args.repeat // 10, 1))
+assert int(mask.sum()) == len(expected)
+
+_, or_ms = timed(lambda: index.bitmap("state", state_values), args.repeat)
+_, mask_ms = timed(lambda: index.mask(index.bitmap("state", state_values)), args.repeat)
+
+# Incremental maintenance: re-index 1% of the schemes
+changed = rng.sample(range(args.schemes), max(args.schemes // 100, 1))
+start = time.perf_counter()
+for ordinal in changed:
+    index.update(ordinal, synthetic_scheme(ordinal))
+update_ms = (time.perf_counter() - start) * 1000
+
+print(f"   state OR (2 values):                  {or_ms * 1000:.1f}µs")
+print(f"   state OR → ordinal mask:              {mask_ms * 1000:.1f}µs")
+print(f"   state ∧ occupation ∧ level → mask:    {bitmap_ms * 1000:.1f}µs ({int(mask.sum())} schemes)")
+print(f"   same query with Python sets:          {set_ms * 1000:.1f}µs")
+print(f"   incremental update of {len(changed)} schemes:  {update_ms:.1f}ms")
@@ -0,0 +1,30 @@
+# bench_profile_percolator.py
+#
+# ProfilePercolator index build time and per-scheme match time over
+# synthetic stored profiles (default 200k), matching every scheme in
+# precomputed_rules_new.json.
+#
+#   python -m others.bench_profile_percolator --users 200000
+
+import argparse
+import time
+from agents.profile_percolator import ProfilePercolator
+from others.eligibility_fixtures import RULES, profiles
+
+parser = argparse.ArgumentParser(description="Benchmark reverse matching of schemes against stored profiles")
+parser.add_argument("--users", type=int, default=200000)
+parser.add_argument("--seed", type=int, default=5)
+args = parser.parse_args()
+
+users = [(i, p) for i, p in enumerate(profiles(args.users, seed=args.seed))]
+
+start = time.perf_counter()
+percolator = ProfilePercolator.build(users)
+build_ms = (time.perf_counter() - start) * 1000
+print(f"✅ ProfilePercolator built for {len(users)} profiles in {build_ms:.0f}ms")
+
+start = time.perf_counter()
+matched = percolator.match_all(RULES)
+match_ms = (time.perf_counter() - start) * 1000 / len(RULES)
+
+print(f"   {len(RULES)} schemes: {match_ms:.2f}ms per scheme, {sum(len(ids) for ids in matched.values())} user matches")
@@ -1,15 +1,40 @@
 import os
-import pickle
+import sys
+import json
+import time
+import argparse
 import faiss
 import numpy as np
 from pymongo import MongoClient
 from sentence_transformers import SentenceTransformer  # your embedding model
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.faiss_store import save_faiss_index
+from agents.scheme_features import SchemeFeatureStore
+from agents.bm25_index import BM25Index
+from agents.occupation_taxonomy import OccupationPostings
+
 # -----------------------------
 # Config
 # -----------------------------
 TEXT_FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
 INDEX_DIR = "indexes"
+INDEX_TYPES = ["flat", "ivf_flat", "hnsw", "ivf_pq"]
+
+parser = argparse.ArgumentParser(description="Build per-field FAISS indexes for the scheme corpus")
+parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+parser.add_argument("--nlist", type=int, default=64, help="IVF: number of inverted lists")
+parser.add_argument("--nprobe", type=int, default=8, help="IVF: lists visited per query")
+parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW: neighbours per node")
+parser.add_argument("--ef-construction", type=int, default=200, help="HNSW: build-time beam width")
+parser.add_argument("--ef-search", type=int, default=128, help="HNSW: query-time beam width")
+parser.add_argument("--pq-m", type=int, default=16, help="IVF-PQ: sub-quantizers (must divide dim)")
+parser.add_argument("--pq-nbits", type=int, default=8, help="IVF-PQ: bits per sub-quantizer code")
+parser.add_argument("--report-k", type=int, default=10, help="k used for recall@k in the report")
+parser.add_argument("--queries", help="Held-out query file, one query per line (default: scheme names)")
+parser.add_argument("--max-queries", type=int, default=200)
+args = parser.parse_args()
+
 os.makedirs(INDEX_DIR, exist_ok=True)
 
 # -----------------------------
@@ -25,10 +50,113 @@ schemes = db["schemes"]
 # Replace with your 512-d model
 embed_model = SentenceTransformer("all-mpnet-base-v2")  # 768-d, you can choose 512-d if needed
 
+
+# -----------------------------
+# Index construction
+# -----------------------------
+def build_index(embeddings: np.ndarray, index_type: str):
+    """
+    Build a FAISS index of the requested type. Returns (index, meta) where
+    meta records the build parameters plus the query-time settings
+    (nprobe / efSearch) that AIBaseAgent applies when loading the index.
+    """
+    n, dim = embeddings.shape
+    meta = {"index_type": index_type, "dim": dim, "ntotal": n}
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        # IVF needs enough training points per list; clamp for small corpora
+        nlist = max(1, min(args.nlist, n // 39 or 1))
+        quantizer = faiss.IndexFlatL2(dim)
+
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            if dim % args.pq_m != 0:
+                raise ValueError(f"--pq-m {args.pq_m} must divide embedding dim {dim}")
+            # PQ codebooks need at least 2**nbits training points
+            nbits = min(args.pq_nbits, max(1, int(np.log2(n))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, args.pq_m, nbits)
+            meta.update({"pq_m": args.pq_m, "pq_nbits": nbits})
+
+        index.train(embeddings)
+        index.nprobe = min(args.nprobe, nlist)
+        meta.update({"nlist": nlist, "nprobe": index.nprobe})
+
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, args.hnsw_m)
+        index.hnsw.efConstruction = args.ef_construction
+        index.hnsw.efSearch = args.ef_search
+        meta.update({
+            "hnsw_m": args.hnsw_m,
+            "efConstruction": args.ef_construction,
+            "efSearch": args.ef_search,
+        })
+
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    index.add(embeddings)
+    return index, meta
+
+
+def load_held_out_queries() -> list[str]:
+    """
+    Queries used for the recall/latency report. Scheme names are not part of
+    any indexed field, so they work as a held-out set when no file is given.
+    """
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = [s["scheme_name"] for s in schemes.find({}, {"scheme_name": 1}) if s.get("scheme_name")]
+    return queries[: args.max_queries]
+
+
+def timed_search(index, queries: np.ndarray, k: int):
+    """Search one query at a time, as the retriever does. Returns (indices, per-query ms)."""
+    results = []
+    latencies = []
+    for row in queries:
+        start = time.perf_counter()
+        _, indices = index.search(row.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(indices[0])
+    return np.vstack(results), np.array(latencies)
+
+
+def compare_with_flat(index, flat_index, queries: np.ndarray, k: int) -> dict:
+    exact, flat_ms = timed_search(flat_index, queries, k)
+    approx, approx_ms = timed_search(index, queries, k)
+
+    recalls = [
+        len(set(a[a >= 0]) & set(e[e >= 0])) / max(np.count_nonzero(e >= 0), 1)
+        for a, e in zip(approx, exact)
+    ]
+
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(approx_ms, 50)), 4),
+        "latency_ms_p99": round(float(np.percentile(approx_ms, 99)), 4),
+        "flat_latency_ms_p50": round(float(np.percentile(flat_ms, 50)), 4),
+        "flat_latency_ms_p99": round(float(np.percentile(flat_ms, 99)), 4),
+    }
+
+
 # -----------------------------
 # Build FAISS indexes
 # -----------------------------
 faiss_indexes = {}
+report = {"index_type": args.index_type, "k": args.report_k, "fields": {}}
+
+held_out = load_held_out_queries()
+query_embeddings = None
+if held_out:
+    query_embeddings = embed_model.encode(
+        held_out, convert_to_numpy=True, normalize_embeddings=True
+    ).astype(np.float32)
 
 for field in TEXT_FIELDS:
     texts = []
@@ -42,17 +170,55 @@ for field in TEXT_FIELDS:
     if texts:
         # Generate embeddings
         embeddings = embed_model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        embeddings = embeddings.astype(np.float32)
         dim = embeddings.shape[1]
 
         # Build FAISS index
-        index = faiss.IndexFlatL2(dim)
-        index.add(embeddings.astype(np.float32))
-        faiss_indexes[field] = {"index": index, "ids": ids}
+        index, meta = build_index(embeddings, args.index_type)
+        faiss_indexes[field] = {"index": index, "ids": ids, "meta": meta}
+
+        # Save native index + ids sidecar + metadata to disk
+        save_faiss_index(INDEX_DIR, field, faiss_indexes[field])
+
+        print(f"✅ {args.index_type} FAISS index built & saved for '{field}' with {len(ids)} vectors (dim={dim})")
+
+        # Recall / latency against exact search on the same vectors
+        if query_embeddings is not None:
+            flat_index, _ = build_index(embeddings, "flat")
+            field_report = compare_with_flat(index, flat_index, query_embeddings, args.report_k)
+            field_report.update(meta)
+            report["fields"][field] = field_report
 
-        # Save index + IDs to disk
-        with open(os.path.join(INDEX_DIR, f"faiss_index_{field}.pkl"), "wb") as f:
-            pickle.dump(faiss_indexes[field], f)
+            print(
+                f"   recall@{args.report_k}={field_report[f'recall@{args.report_k}']} "
+                f"p50={field_report['latency_ms_p50']}ms (flat {field_report['flat_latency_ms_p50']}ms) "
+                f"p99={field_report['latency_ms_p99']}ms (flat {field_report['flat_latency_ms_p99']}ms)"
+            )
+
+# -----------------------------
+# Precomputed rerank features (token ids, normalized facets)
+# -----------------------------
+scheme_features = SchemeFeatureStore.build(schemes.find())
+scheme_features.save(INDEX_DIR)
+print(f"✅ Rerank features saved for {len(scheme_features.features)} schemes ({len(scheme_features.vocab)} tokens)")
+
+# -----------------------------
+# BM25 lexical index (occupation candidates + lexical fallback)
+# -----------------------------
+bm25_index = BM25Index.build(schemes.find())
+bm25_index.save(INDEX_DIR)
+print(f"✅ BM25 index saved for {len(bm25_index)} schemes ({len(bm25_index.terms)} terms, {len(bm25_index.postings)} postings)")
+
+# -----------------------------
+# Occupation taxonomy -> scheme posting lists (occupation candidates)
+# -----------------------------
+occupation_postings = OccupationPostings.build(schemes.find())
+occupation_postings.save(INDEX_DIR)
+print(f"✅ Occupation postings saved for {len(occupation_postings.postings)} occupations")
 
-        print(f"✅ FAISS index built & saved for '{field}' with {len(ids)} vectors (dim={dim})")
+report["held_out_queries"] = len(held_out)
+with open(os.path.join(INDEX_DIR, "index_report.json"), "w", encoding="utf-8") as f:
+    json.dump(report, f, indent=2)
 
+print(f"📊 Recall/latency report written to '{INDEX_DIR}/index_report.json'")
 print("🎉 All FAISS indexes are ready in the 'indexes/' folder!")
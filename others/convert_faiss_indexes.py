@@ -0,0 +1,44 @@
+import os
+import sys
+import pickle
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.faiss_store import save_faiss_index, load_faiss_indexes, resident_memory_mb
+
+# -----------------------------
+# Config
+# -----------------------------
+TEXT_FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
+INDEX_DIR = sys.argv[1] if len(sys.argv) > 1 else "faiss_indexes"
+
+# -----------------------------
+# Convert legacy pickles → native FAISS files + ids sidecar
+# -----------------------------
+pickle_start = time.time()
+pickle_rss = resident_memory_mb()
+
+for field in TEXT_FIELDS:
+    legacy_path = os.path.join(INDEX_DIR, f"faiss_index_{field}.pkl")
+    if not os.path.exists(legacy_path):
+        print(f"⚠️ No legacy index for '{field}' at {legacy_path}")
+        continue
+
+    with open(legacy_path, "rb") as f:
+        data = pickle.load(f)
+
+    save_faiss_index(INDEX_DIR, field, data)
+    print(f"✅ Converted '{field}' ({data['index'].ntotal} vectors)")
+
+pickle_ms = round((time.time() - pickle_start) * 1000, 1)
+
+# -----------------------------
+# Compare load cost of the native format
+# -----------------------------
+mmap_start = time.time()
+mmap_rss = resident_memory_mb()
+load_faiss_indexes(INDEX_DIR, TEXT_FIELDS)
+
+print(f"📦 pickle load + convert: {pickle_ms}ms, RSS {pickle_rss} → {mmap_rss} MB")
+print(f"📦 mmap load: {round((time.time() - mmap_start) * 1000, 1)}ms, RSS {mmap_rss} → {resident_memory_mb()} MB")
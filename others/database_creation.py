@@ -1,11 +1,27 @@
 import csv
+import json
+import os
+import sys
 from pymongo import MongoClient
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.scheme_catalog import bump_catalog_version
+from agents.facets import ensure_facet_indexes, facet_fields
+
+RULES_FILE = "precomputed_rules_new.json"
+
 # 1️⃣ Connect to MongoDB
 client = MongoClient("mongodb://localhost:27017/")
 db = client["policy_db"]
 collection = db["schemes"]
 
+# Precomputed eligibility rules (state / occupation / gender) feed the
+# normalized facet fields when they already exist
+rules = {}
+if os.path.exists(RULES_FILE):
+    with open(RULES_FILE, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+
 records = []
 
 # 2️⃣ Open CSV without pandas
@@ -27,9 +43,16 @@ with open("schemes_data.csv", encoding="utf-8") as f:
             "benefits_text": row["benefits"],
             "application_steps_text": row["application"]
         }
+        record.update(facet_fields(record, rules.get(record["_id"])))
         records.append(record)
 
 # 3️⃣ Insert into MongoDB
 collection.insert_many(records)
 
+# Multikey indexes for the state/occupation/gender candidate queries
+ensure_facet_indexes(collection)
+
+# 4️⃣ Tell running servers to reload their in-memory scheme catalog
+bump_catalog_version(db)
+
 print(f"Inserted {len(records)} documents into MongoDB!")
@@ -0,0 +1,183 @@
+# eligibility_fixtures.py
+#
+# Shared inputs of the eligibility tests and benches: the rules in
+# precomputed_rules_new.json, multi-clause rules, synthetic user profiles
+# that hit every value and limit boundary those rules use, and the
+# raw-dict matrix the compiled predicates are checked against.
+
+import json
+import os
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+with open(os.path.join(ROOT, "precomputed_rules_new.json"), "r", encoding="utf-8") as f:
+    RULES = json.load(f)
+
+
+def rule_values(key) -> list:
+    values = set()
+    for rules in RULES.values():
+        value = rules.get(key)
+        for v in value if isinstance(value, list) else [value]:
+            if isinstance(v, str):
+                values.add(v)
+    return sorted(values)
+
+
+def profiles(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    states = rule_values("state") + ["Nowhere", ""]
+    occupations = rule_values("occupation") + ["weaver", ""]
+    genders = ["Male", "Female", "any", "Any", "other", ""]
+    ages = [0, 1, 17, 18, 19, 40, 59, 60, 61, 65, 100]
+    incomes = [None, 0, 5000, 75000, 75001, 200000, 10 ** 7]
+
+    fixed = [
+        {"age": 34, "gender": "Female", "state": "Puducherry", "occupation": "Fisherman", "monthly_income": 8000},
+        {"age": 0, "gender": "any", "state": "karnataka", "occupation": "", "monthly_income": None},
+    ]
+    return fixed + [
+        {
+            "age": rng.choice(ages),
+            "gender": rng.choice(genders),
+            "state": rng.choice(states),
+            "occupation": rng.choice(occupations),
+            "monthly_income": rng.choice(incomes),
+        }
+        for _ in range(n)
+    ]
+
+
+DNF_RULES = {
+    # widows 18-40 in Kerala, or anyone over 60 with a low income
+    "DNF_1": {"clauses": [
+        {"min_age": 18, "max_age": 40, "gender": "Female", "state": ["Kerala"]},
+        {"min_age": 60, "max_income": 10000},
+    ]},
+    # fishermen or farmers, each with their own state list
+    "DNF_2": {"clauses": [
+        {"occupation": ["Fisherman"], "state": ["Puducherry", "Tamil Nadu"]},
+        {"occupation": "farmer", "state": "Kerala"},
+    ]},
+    # an unrestricted alternative: everyone qualifies
+    "DNF_3": {"clauses": [{"max_age": 0}, {}]},
+    "FLAT": {"min_age": 18, "state": ["Kerala"]},
+}
+
+
+def legacy_matrix(user: dict, rules: dict):
+    """The scalar matrix the compiler replaced: re-reads the raw rule dict on every call."""
+    matrix = {}
+
+    # -------- Age --------
+    age = user.get("age")
+    min_age = rules.get("min_age")
+    max_age = rules.get("max_age")
+
+    if min_age is not None or max_age is not None:
+        status = "PASS"
+        reason = None
+
+        if min_age is not None and age < min_age:
+            status = "FAIL"
+            reason = f"Age {age} is below minimum {min_age}"
+
+        if max_age is not None and age > max_age:
+            status = "FAIL"
+            reason = f"Age {age} exceeds maximum {max_age}"
+
+        matrix["age"] = {
+            "rule": {"min_age": min_age, "max_age": max_age},
+            "user_value": age,
+            "status": status,
+            "reason": reason
+        }
+
+    # -------- Gender --------
+    rule_gender = rules.get("gender")
+    if rule_gender:
+        user_gender = user.get("gender")
+        status = "PASS"
+        reason = None
+
+        if isinstance(rule_gender, str):
+            if rule_gender.lower() != "any" and user_gender != rule_gender.lower():
+                status = "FAIL"
+                reason = "Gender mismatch"
+
+        elif isinstance(rule_gender, list):
+            allowed = [g.lower() for g in rule_gender if g]
+            if user_gender not in allowed:
+                status = "FAIL"
+                reason = "Gender not allowed"
+
+        matrix["gender"] = {
+            "rule": rule_gender,
+            "user_value": user_gender,
+            "status": status,
+            "reason": reason
+        }
+
+    # -------- State --------
+    rule_state = rules.get("state")
+    if rule_state:
+        user_state = user.get("state")
+
+        allowed = (
+            [s.lower() for s in rule_state if s]
+            if isinstance(rule_state, list)
+            else [rule_state.lower()]
+        )
+
+        status = "PASS" if user_state in allowed else "FAIL"
+
+        matrix["state"] = {
+            "rule": rule_state,
+            "user_value": user_state,
+            "status": status,
+            "reason": None if status == "PASS" else "State mismatch"
+        }
+
+    # -------- Occupation --------
+    rule_occ = rules.get("occupation")
+
+    if isinstance(rule_occ, list):
+        rule_occ = [o for o in rule_occ if isinstance(o, str)]
+    elif not isinstance(rule_occ, str):
+        # e.g. {"Cattle Owner": true}: nothing to compare against
+        rule_occ = None
+
+    if rule_occ:
+        user_occ = user.get("occupation")
+
+        allowed = (
+            [o.lower() for o in rule_occ]
+            if isinstance(rule_occ, list)
+            else [rule_occ.lower()]
+        )
+
+        status = "PASS" if user_occ in allowed else "FAIL"
+
+        matrix["occupation"] = {
+            "rule": rule_occ,
+            "user_value": user_occ,
+            "status": status,
+            "reason": None if status == "PASS" else "Occupation mismatch"
+        }
+
+    # -------- Income --------
+    max_income = rules.get("max_income")
+    income = user.get("monthly_income")
+
+    if max_income is not None and income is not None:
+        status = "PASS" if income <= max_income else "FAIL"
+
+        matrix["income"] = {
+            "rule": {"max_income": max_income},
+            "user_value": income,
+            "status": status,
+            "reason": None if status == "PASS" else "Income exceeds limit"
+        }
+
+    return matrix
@@ -1,6 +1,10 @@
 import json
 import os
+import subprocess
+import sys
 from agents.eligibility_agent import EligibilityAgent
+from agents.facets import refresh_facets
+from agents.scheme_catalog import bump_catalog_version
 from llm.local_llm import LocalLLM
 
 # -----------------------------
@@ -51,6 +55,11 @@ Allowed keys:
 - max_income (number, INR per month)
 - category (string)
 
+If the text gives alternative sets of conditions (e.g. "widows aged 18-40,
+or persons with disabilities of any age"), return
+{{"eligibility_rules": [{{...}}, {{...}}]}} with one object of the keys
+above per alternative.
+
 Eligibility Text:
 \"\"\"{eligibility_text}\"\"\" 
 
@@ -75,10 +84,17 @@ def normalize_rules(rules: dict) -> dict:
 # -----------------------------
 # 🔑 COLLAPSE TO OLD SCHEMA
 # -----------------------------
+CLAUSE_KEYS = ("min_age", "max_age", "gender", "state", "occupation", "max_income")
+
+
 def collapse_to_legacy_schema(raw: dict) -> dict:
     """
     Convert new / multi-rule eligibility into
     your old flat eligibility schema.
+
+    Multi-rule eligibility also keeps every rule under "clauses" (an OR
+    of flat rules), which agents/eligibility_rules.py compiles; the flat
+    fields stay for facets and older readers.
     """
 
     legacy = {
@@ -122,6 +138,11 @@ def collapse_to_legacy_schema(raw: dict) -> dict:
                     else [rule["state"]]
                 )
 
+        legacy["clauses"] = [
+            {k: rule.get(k) for k in CLAUSE_KEYS if rule.get(k) is not None}
+            for rule in (normalize_rules(dict(r)) for r in raw["eligibility_rules"] if isinstance(r, dict))
+        ]
+
         legacy["occupation"] = list(occupations) or None
         legacy["category"] = list(categories)[0] if categories else None
         legacy["state"] = list(states) or None
@@ -145,6 +166,7 @@ def collapse_to_legacy_schema(raw: dict) -> dict:
 # -----------------------------
 SAVE_EVERY = 10
 processed = 0
+new_scheme_ids = []
 
 for scheme in all_schemes:
     scheme_id = scheme["_id"]
@@ -165,6 +187,7 @@ for scheme in all_schemes:
         precomputed_rules[scheme_id] = final_rules
 
     processed += 1
+    new_scheme_ids.append(scheme_id)
 
     # Save checkpoint every 10 processed schemes
     if processed % SAVE_EVERY == 0:
@@ -179,3 +202,22 @@ with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
     json.dump(precomputed_rules, f, ensure_ascii=False, indent=2)
 
 print(f"✅ Precomputed rules saved for {len(precomputed_rules)} schemes.")
+
+# -----------------------------
+# Rewrite facet fields with the new rules
+# -----------------------------
+updated = refresh_facets(agent.collection, precomputed_rules)
+bump_catalog_version(agent.db)
+print(f"✅ Facet fields refreshed for {updated} schemes.")
+
+# -----------------------------
+# Match the new schemes against stored user profiles
+# -----------------------------
+if new_scheme_ids:
+    backend_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+    result = subprocess.run(
+        [sys.executable, "screen_users_job.py", "--schemes", *new_scheme_ids],
+        cwd=backend_dir
+    )
+    if result.returncode != 0:
+        print("⚠️ Could not match the new schemes against user profiles; the nightly screening will pick them up")
@@ -0,0 +1,48 @@
+# retrieval_fixtures.py
+#
+# Shared inputs of the retrieval tests: a hash-seeded stand-in for the
+# embedding model, the part of a Mongo collection SchemeCatalog reads, and
+# flat per-field FAISS indexes over scheme documents.
+
+import hashlib
+import faiss
+import numpy as np
+from agents.scheme_catalog import CATALOG_META_COLLECTION
+
+FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
+DIM = 32
+
+
+class HashEmbeddings:
+    """Deterministic unit vectors per text, in place of LocalLLM."""
+
+    def get_embedding(self, text: str) -> np.ndarray:
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % (2 ** 32)
+        vector = np.random.RandomState(seed).randn(DIM).astype("float32")
+        return vector / np.linalg.norm(vector)
+
+    def get_embeddings(self, texts: list) -> np.ndarray:
+        return np.vstack([self.get_embedding(text) for text in texts])
+
+
+class MemoryCollection:
+    """The part of a pymongo collection SchemeCatalog reads: every document, no version stamp."""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+        self.database = {CATALOG_META_COLLECTION: self}
+
+    def find(self, query=None, projection=None):
+        return [dict(doc) for doc in self.docs]
+
+    def find_one(self, query=None, projection=None):
+        return None
+
+
+def flat_indexes(schemes: list, llm) -> dict:
+    indexes = {}
+    for field in FIELDS:
+        index = faiss.IndexFlatL2(DIM)
+        index.add(llm.get_embeddings([scheme[field] for scheme in schemes]))
+        indexes[field] = {"index": index, "ids": [scheme["_id"] for scheme in schemes]}
+    return indexes
@@ -0,0 +1,91 @@
+# test_adaptive_search_depth.py
+#
+# Recall of the adaptive FAISS search depth (PolicyRetrieverAgent with
+# adaptive_search_depth=True) against the fixed 8× query / 4× profile
+# oversampling it replaces, on synthetic clustered field indexes. Both are
+# scored against an exhaustive search (every row of every field index): the
+# adaptive pool must find at least everything the fixed depth finds.
+# Needs no MongoDB.
+#
+#   python -m others.test_adaptive_search_depth
+
+import faiss
+import numpy as np
+from agents.policy_retriever_agent import PolicyRetrieverAgent
+
+FIELDS = ["description", "eligibility_text", "documents_required_text", "benefits_text"]
+N_SCHEMES = 3000
+DIM = 32
+TOP_KS = (3, 10, 25)
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_indexes(rng) -> dict:
+    """Per-field flat indexes over clustered vectors (many near-ties, like real scheme text)."""
+    centers = unit(rng.standard_normal((40, DIM)))
+    topic = rng.integers(0, len(centers), N_SCHEMES)
+    ids = [f"SCHEME_{i:04d}" for i in range(N_SCHEMES)]
+
+    indexes = {}
+    for field in FIELDS:
+        vectors = unit(centers[topic] + 0.35 * rng.standard_normal((N_SCHEMES, DIM)))
+        index = faiss.IndexFlatL2(DIM)
+        index.add(vectors)
+        indexes[field] = {"index": index, "ids": ids}
+    return indexes, centers
+
+
+def top(semantic: np.ndarray, k: int) -> set:
+    hits = np.flatnonzero(semantic)
+    return set(hits[np.argsort(-semantic[hits], kind="stable")[:k]].tolist())
+
+
+def recall_by_mode(n_queries: int = 60, seed: int = 0) -> dict:
+    """top_k -> (adaptive recall, fixed recall) of the exhaustive top_k schemes."""
+    rng = np.random.default_rng(seed)
+    indexes, centers = synthetic_indexes(rng)
+    fixed = PolicyRetrieverAgent(indexes, llm=None)
+    adaptive = PolicyRetrieverAgent(indexes, llm=None, adaptive_search_depth=True)
+
+    results = {}
+    for top_k in TOP_KS:
+        found = {"adaptive": 0, "fixed": 0}
+        for _ in range(n_queries):
+            query = unit(centers[rng.integers(len(centers))] + 0.5 * rng.standard_normal(DIM))
+            profile = unit(rng.standard_normal(DIM))
+
+            # Exhaustive: every row of every field for the query; the profile
+            # anchor is capped at its depth in both modes by design
+            field_scores = fixed.retrieve_multi_field_scores(
+                np.vstack([query, profile]), FIELDS, [N_SCHEMES, max(top_k * 4, 20)]
+            )
+            expected = top(fixed._fuse_field_scores(field_scores, FIELDS), top_k)
+
+            for mode, agent in (("adaptive", adaptive), ("fixed", fixed)):
+                semantic, _ = agent._semantic_search(query, profile, top_k)
+                found[mode] += len(top(semantic, top_k) & expected)
+
+        total = n_queries * top_k
+        results[top_k] = (found["adaptive"] / total, found["fixed"] / total)
+    return results
+
+
+def check_recall(results: dict):
+    for top_k, (adaptive_recall, fixed_recall) in results.items():
+        assert adaptive_recall >= fixed_recall, (top_k, adaptive_recall, fixed_recall)
+        assert adaptive_recall >= 0.99, (top_k, adaptive_recall)
+
+
+def test_adaptive_depth_recall():
+    check_recall(recall_by_mode())
+
+
+if __name__ == "__main__":
+    results = recall_by_mode()
+    for top_k, (adaptive_recall, fixed_recall) in results.items():
+        print(f"   recall@{top_k}: adaptive {adaptive_recall:.4f}, fixed {fixed_recall:.4f}")
+    check_recall(results)
+    print("✅ Adaptive search depth recalls at least what the fixed depth does")
@@ -0,0 +1,91 @@
+# test_batch_retrieval.py
+#
+# Checks PolicyRetrieverAgent.retrieve_policies_batch against
+# retrieve_policies called item by item: same schemes, same order, same
+# scores, with the default, adaptive-depth and filtered FAISS search. Runs
+# on synthetic schemes (rules from precomputed_rules_new.json, random text)
+# held in an in-memory SchemeCatalog, flat field indexes and a hash-seeded
+# stand-in for the embedding model. Needs no MongoDB or GPT4All model.
+#
+#   python -m others.test_batch_retrieval
+
+import json
+import os
+import random
+from agents.policy_retriever_agent import PolicyRetrieverAgent
+from agents.scheme_catalog import SchemeCatalog
+from others.retrieval_fixtures import HashEmbeddings, MemoryCollection, flat_indexes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "fisherman fishermen farmer farmers student scholarship health women pension loan housing "
+    "worker construction artisan weaver education agriculture boat subsidy insurance disability widow"
+).split()
+STATES = ["Puducherry", "Tamil Nadu", "Kerala", "Karnataka", None]
+
+QUERIES = ["schemes for fishermen", "pension", "education loan", "zzz"]
+PROFILES = [
+    {"occupation": "Fisherman", "state": "Puducherry", "gender": "Female", "monthly_income": 8000, "age": 34},
+    {"occupation": "farmer", "state": "Kerala", "gender": "Male", "monthly_income": 20000, "age": 50},
+    {"occupation": "Student", "state": "Tamil Nadu", "gender": "Female", "monthly_income": 0, "age": 19},
+    {"occupation": "weaver", "state": "Nowhere", "gender": "male", "monthly_income": 1000, "age": 40},
+    {"occupation": "Fisherman", "state": "Puducherry", "gender": "Male", "monthly_income": 3000, "age": 60},
+    {"occupation": "", "state": None, "gender": "", "monthly_income": None, "age": None},
+]
+
+
+def synthetic_schemes(seed: int = 0) -> list:
+    with open(os.path.join(ROOT, "precomputed_rules_new.json"), "r", encoding="utf-8") as f:
+        rules = json.load(f)
+
+    rng = random.Random(seed)
+    schemes = []
+    for scheme_id, rule in rules.items():
+        scheme = {
+            "_id": scheme_id,
+            "scheme_name": " ".join(rng.sample(WORDS, 3)).title(),
+            "description": " ".join(rng.choices(WORDS, k=20)),
+            "eligibility_text": " ".join(rng.choices(WORDS, k=12)),
+            "benefits_text": " ".join(rng.choices(WORDS, k=8)),
+            "documents_required_text": " ".join(rng.choices(WORDS, k=5)),
+            "category": rng.choice(WORDS),
+            "level": rng.choice(["Central", "State"]),
+        }
+        state = rng.choice(STATES)
+        if state:
+            scheme["state"] = state
+        for key in ("occupation", "gender", "max_income"):
+            if rule.get(key) is not None:
+                scheme[key] = rule[key]
+        schemes.append(scheme)
+    return schemes
+
+
+def test_batch_matches_single():
+    llm = HashEmbeddings()
+    schemes = synthetic_schemes()
+    indexes = flat_indexes(schemes, llm)
+    catalog = SchemeCatalog(MemoryCollection(schemes), indexes, check_interval_seconds=float("inf"))
+
+    queries = [query for query in QUERIES for _ in PROFILES]
+    profiles = [profile for _ in QUERIES for profile in PROFILES]
+
+    for options in ({}, {"adaptive_search_depth": True}, {"filtered_search": True}):
+        agent = PolicyRetrieverAgent(indexes, llm, catalog=catalog, **options)
+        # Catalog, facet index, BM25 and taxonomy postings answer everything
+        agent.collection = None
+
+        for top_k in (3, 10):
+            single = [agent.retrieve_policies(q, p, top_k=top_k) for q, p in zip(queries, profiles)]
+            traces = [[] for _ in queries]
+            batch = agent.retrieve_policies_batch(queries, profiles, top_k=top_k, system_traces=traces)
+
+            assert batch == single, (options, top_k)
+            assert any(results for results in batch)
+            assert all(trace[-1]["event"] == "RETRIEVAL_PIPELINE_COMPLETED" for trace in traces)
+
+
+if __name__ == "__main__":
+    test_batch_matches_single()
+    print(f"✅ Batched retrieval matches retrieve_policies on {len(QUERIES) * len(PROFILES)} items per mode")
@@ -0,0 +1,96 @@
+# test_central_schemes.py
+#
+# Users outside Tamil Nadu and Puducherry must still be offered Central
+# (nationwide) schemes. others/database_creation.py stores every Central
+# scheme with the placeholder state "Tamil Nadu (Applicable)" and every
+# other scheme with "Puducherry"; this builds a corpus the same way
+# (facet fields from agents/facets.facet_fields) and checks the retriever
+# returns nationwide schemes (Central, no state in their eligibility rules)
+# to users from other states, with and without state-filtered FAISS
+# search. Needs no MongoDB.
+#
+#   python -m others.test_central_schemes
+
+import random
+from agents.facets import ANY_STATE, facet_fields
+from agents.policy_retriever_agent import PolicyRetrieverAgent
+from agents.scheme_catalog import SchemeCatalog
+from others.eligibility_fixtures import RULES
+from others.retrieval_fixtures import HashEmbeddings, MemoryCollection, flat_indexes
+
+WORDS = (
+    "fisherman farmer student scholarship health women pension loan housing worker "
+    "construction artisan weaver education agriculture boat subsidy insurance disability widow"
+).split()
+
+QUERIES = ["pension for widows", "education loan", "subsidy for farmers"]
+PROFILES = [
+    {"occupation": "farmer", "state": "Bihar", "gender": "Male", "monthly_income": 6000, "age": 45},
+    {"occupation": "Student", "state": "Kerala", "gender": "Female", "monthly_income": 0, "age": 19},
+    {"occupation": "", "state": "Assam", "gender": "", "monthly_income": None, "age": None},
+]
+TOP_K = 10
+
+
+def ingested_schemes(seed: int = 0) -> list:
+    """Scheme documents shaped like others/database_creation.py writes them."""
+    rng = random.Random(seed)
+    schemes = []
+    for scheme_id in RULES:
+        level = "Central" if rng.random() < 0.6 else "State"
+        scheme = {
+            "_id": scheme_id,
+            "scheme_name": " ".join(rng.sample(WORDS, 3)).title(),
+            "state": "Tamil Nadu (Applicable)" if level == "Central" else "Puducherry",
+            "level": level,
+            "category": rng.choice(WORDS),
+            "tags": rng.sample(WORDS, 2),
+            "description": " ".join(rng.choices(WORDS, k=20)),
+            "eligibility_text": " ".join(rng.choices(WORDS, k=12)),
+            "documents_required_text": " ".join(rng.choices(WORDS, k=5)),
+            "benefits_text": " ".join(rng.choices(WORDS, k=8)),
+        }
+        scheme.update(facet_fields(scheme, RULES.get(scheme_id)))
+        schemes.append(scheme)
+    return schemes
+
+
+def check_central_schemes(options: dict):
+    llm = HashEmbeddings()
+    schemes = ingested_schemes()
+    nationwide = {
+        scheme["_id"] for scheme in schemes
+        if scheme["level"] == "Central" and not RULES.get(scheme["_id"], {}).get("state")
+    }
+    indexes = flat_indexes(schemes, llm)
+    catalog = SchemeCatalog(MemoryCollection(schemes), indexes, check_interval_seconds=float("inf"))
+
+    agent = PolicyRetrieverAgent(indexes, llm, catalog=catalog, **options)
+    agent.collection = None
+
+    for profile in PROFILES:
+        for query in QUERIES:
+            results = agent.retrieve_policies(query, profile, top_k=TOP_K)
+            assert len(results) == TOP_K, (options, profile["state"], query, len(results))
+            assert any(r["scheme_id"] in nationwide for r in results), (options, profile["state"], query)
+
+
+def test_placeholder_state_is_nationwide():
+    central = {"level": "Central", "state": "Tamil Nadu (Applicable)"}
+    assert facet_fields(central)["state_norm"] == [ANY_STATE]
+    assert facet_fields({"state": "Tamil Nadu (Applicable)"})["state_norm"] == [ANY_STATE]
+    assert facet_fields({"level": "State", "state": "Puducherry"})["state_norm"] == ["puducherry"]
+    # States named by the eligibility rules still restrict a Central scheme
+    assert facet_fields(central, {"state": ["Bihar"]})["state_norm"] == ["bihar"]
+    assert facet_fields({"level": "State", "state": "Puducherry"}, {"state": "All States"})["state_norm"] == [ANY_STATE]
+
+
+def test_other_states_get_nationwide_schemes():
+    check_central_schemes({})
+    check_central_schemes({"filtered_search": True})
+
+
+if __name__ == "__main__":
+    test_placeholder_state_is_nationwide()
+    test_other_states_get_nationwide_schemes()
+    print(f"✅ Users from {', '.join(p['state'] for p in PROFILES)} are offered nationwide Central schemes")
@@ -0,0 +1,68 @@
+# test_eligibility_engine.py
+#
+# Checks the columnar EligibilityEngine against
+# EligibilityAgent.build_eligibility_matrix on every scheme in
+# precomputed_rules_new.json: same criteria checked, same PASS/FAIL, same
+# reasons. Also checks that find_eligible_schemes counts only schemes
+# still in the catalog. Needs no MongoDB.
+#
+#   python -m others.test_eligibility_engine
+
+from agents.eligibility_agent import EligibilityAgent
+from agents.eligibility_engine import EligibilityEngine, normalize_user
+from agents.eligibility_rules import CRITERIA
+from agents.scheme_catalog import SchemeCatalog
+from others.eligibility_fixtures import RULES, profiles
+from others.retrieval_fixtures import MemoryCollection
+
+PROFILES = 400
+
+
+def scalar_matrix(user, rules):
+    # build_eligibility_matrix never touches self
+    return EligibilityAgent.build_eligibility_matrix(None, user, rules)
+
+
+def test_engine_matches_matrix():
+    engine = EligibilityEngine.build(RULES)
+    assert engine.rows == engine.size  # flat rules: one clause row per scheme
+
+    for profile in profiles(PROFILES):
+        user = normalize_user(profile)
+        evaluation = engine.evaluate(user)
+        mask = engine.eligible(user)
+
+        for ordinal, scheme_id in enumerate(engine.scheme_ids):
+            matrix = scalar_matrix(user, RULES[scheme_id])
+
+            for criterion in CRITERIA:
+                in_matrix, failed = evaluation[criterion]
+                assert bool(in_matrix[ordinal]) == (criterion in matrix), (scheme_id, criterion, profile)
+                if criterion in matrix:
+                    assert bool(failed[ordinal]) == (matrix[criterion]["status"] == "FAIL"), (scheme_id, criterion, profile)
+
+            expected = [f"{k}: {v['reason']}" for k, v in matrix.items() if v["status"] == "FAIL"]
+            assert engine.failures(user, ordinal) == expected, (scheme_id, profile)
+            assert bool(mask[ordinal]) == (not expected)
+
+
+def test_removed_schemes_are_not_counted():
+    # FAISS still holds every id; every third scheme is gone from Mongo
+    scheme_ids = list(RULES)
+    live = [{"_id": sid, "scheme_name": sid} for sid in scheme_ids[::3]]
+    faiss_ids = {"description": {"ids": scheme_ids}}
+    catalog = SchemeCatalog(MemoryCollection(live), faiss_ids, check_interval_seconds=float("inf"))
+
+    agent = EligibilityAgent(catalog=catalog)
+    engine = EligibilityEngine.build(RULES, [s["_id"] for s in live])
+    for profile in profiles(50):
+        expected = engine.eligible_ids(normalize_user(profile))
+        eligible, total = agent.find_eligible_schemes(profile)
+        assert total == len(expected) == len(eligible), profile
+        assert [e["scheme_id"] for e in eligible] == expected
+
+
+if __name__ == "__main__":
+    test_engine_matches_matrix()
+    test_removed_schemes_are_not_counted()
+    print(f"✅ Engine decisions identical to the matrix for {PROFILES} profiles × {len(RULES)} schemes")
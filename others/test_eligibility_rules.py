@@ -0,0 +1,57 @@
+# test_eligibility_rules.py
+#
+# Checks the compiled eligibility predicates (agents/eligibility_rules.py)
+# against the raw-dict matrix they replaced, on every scheme in
+# precomputed_rules_new.json, and multi-clause (OR-of-AND) rules against
+# the columnar EligibilityEngine. Needs no MongoDB. Timings:
+# others/bench_eligibility_rules.py.
+#
+#   python -m others.test_eligibility_rules
+
+from agents.eligibility_engine import EligibilityEngine, normalize_user
+from agents.eligibility_rules import compile_all, compile_rules
+from others.eligibility_fixtures import DNF_RULES, RULES, legacy_matrix, profiles
+
+DNF_CASES = [
+    ({"age": 30, "gender": "Female", "state": "Kerala", "occupation": "", "monthly_income": 50000}, {"DNF_1", "DNF_3", "FLAT"}),
+    ({"age": 65, "gender": "Male", "state": "Goa", "occupation": "", "monthly_income": 8000}, {"DNF_1", "DNF_3"}),
+    ({"age": 65, "gender": "Male", "state": "Goa", "occupation": "", "monthly_income": 80000}, {"DNF_3"}),
+    ({"age": 40, "gender": "Male", "state": "Tamil Nadu", "occupation": "Fisherman", "monthly_income": None}, {"DNF_2", "DNF_3"}),
+    ({"age": 40, "gender": "Male", "state": "Kerala", "occupation": "Farmer", "monthly_income": None}, {"DNF_2", "DNF_3", "FLAT"}),
+]
+
+
+def test_flat_rules_match_legacy():
+    compiled = compile_all(RULES)
+    users = [normalize_user(p) for p in profiles(400, seed=1)]
+
+    for user in users:
+        for scheme_id, rules in RULES.items():
+            expected = legacy_matrix(user, rules)
+            assert compiled[scheme_id].matrix(user) == expected, (scheme_id, user)
+            assert compiled[scheme_id].passes(user) == all(v["status"] == "PASS" for v in expected.values())
+
+
+def test_multi_clause_rules():
+    engine = EligibilityEngine.build(DNF_RULES)
+    assert engine.rows == 7
+
+    for profile, expected in DNF_CASES:
+        user = normalize_user(profile)
+        assert set(engine.eligible_ids(user)) == expected, (profile, engine.eligible_ids(user))
+        for scheme_id, rules in DNF_RULES.items():
+            predicate = compile_rules(rules)
+            assert predicate.passes(user) == (scheme_id in expected)
+            # A passing scheme is explained by a passing clause
+            assert (not predicate.failures(user)) == (scheme_id in expected), (scheme_id, predicate.matrix(user))
+
+    # Failing DNF: the matrix explains the closest clause and records which one
+    matrix = compile_rules(DNF_RULES["DNF_1"]).matrix(normalize_user(DNF_CASES[2][0]))
+    assert {k: (v["status"], v["clause"]) for k, v in matrix.items()} == {"age": ("PASS", 1), "income": ("FAIL", 1)}, matrix
+
+
+if __name__ == "__main__":
+    test_flat_rules_match_legacy()
+    print(f"✅ Compiled matrices identical to the raw-dict matrix on {len(RULES)} schemes")
+    test_multi_clause_rules()
+    print(f"✅ {len(DNF_CASES)} multi-clause profiles agree with the engine")
@@ -0,0 +1,104 @@
+# test_facet_index.py
+#
+# Checks incremental FacetIndex maintenance against a fresh build: after
+# schemes are edited, removed and appended, `sync()` (and `update()` one
+# scheme at a time) leaves the same rows, presence bitmap and per-value
+# bitmaps as FacetIndex.build over the new records. Needs no MongoDB.
+#
+#   python -m others.test_facet_index
+
+import copy
+import random
+import numpy as np
+from agents.facet_index import FACETS, FacetIndex, facet_values
+
+STATES = ["assam", "bihar", "goa", "kerala", "puducherry", "tamil nadu"]
+OCCUPATIONS = ["farmer", "fisherman", "student", "weaver", "driver"]
+GENDERS = ["male", "female", "any"]
+LEVELS = ["Central", "State", ""]
+
+
+def synthetic_scheme(rng, i: int) -> dict:
+    if rng.random() < 0.2:
+        # Raw document without ingest facet fields: computed from its text
+        return {
+            "_id": f"SCHEME_{i:04d}",
+            "level": rng.choice(LEVELS),
+            "state": rng.choice(STATES).title(),
+            "eligibility_text": f"For {rng.choice(OCCUPATIONS)}s and their families",
+        }
+    return {
+        "_id": f"SCHEME_{i:04d}",
+        "level": rng.choice(LEVELS),
+        "state_norm": rng.sample(STATES, rng.randint(1, 2)) if rng.random() > 0.2 else ["*"],
+        "occupation_norm": rng.sample(OCCUPATIONS, rng.randint(1, 3)),
+        "gender_norm": [rng.choice(GENDERS)],
+    }
+
+
+def edited(rng, records: list) -> list:
+    """A later catalog snapshot: some schemes changed, some gone, new ones appended."""
+    records = copy.deepcopy(records)
+    for ordinal in rng.sample(range(len(records)), len(records) // 4):
+        if rng.random() < 0.2:
+            records[ordinal] = None
+        else:
+            scheme = synthetic_scheme(rng, ordinal)
+            if rng.random() < 0.3:
+                # A value no scheme had before
+                scheme["level"] = f"district {ordinal}"
+            records[ordinal] = scheme
+    return records + [synthetic_scheme(rng, len(records) + i) for i in range(37)]
+
+
+def assert_same_index(actual: FacetIndex, expected: FacetIndex):
+    assert actual.size == expected.size
+    assert actual.row_values == expected.row_values
+    assert np.array_equal(actual.mask(actual.present), expected.mask(expected.present))
+
+    for facet in FACETS:
+        # Values whose last scheme went away keep an all-zero bitmap
+        for value in set(actual.bitmaps[facet]) | set(expected.bitmaps[facet]):
+            assert np.array_equal(
+                actual.mask(actual.bitmap(facet, [value])),
+                expected.mask(expected.bitmap(facet, [value])),
+            ), (facet, value)
+
+
+def test_sync_matches_build():
+    rng = random.Random(11)
+    records = [synthetic_scheme(rng, i) for i in range(500)] + [None]
+
+    for _ in range(3):
+        index = FacetIndex.build(records)
+        updated = edited(rng, records)
+
+        before = [facet_values(s) if s is not None else None for s in records]
+        after = [facet_values(s) if s is not None else None for s in updated]
+        before += [None] * (len(after) - len(before))
+
+        assert index.sync(updated) == sum(a != b for a, b in zip(before, after))
+        assert_same_index(index, FacetIndex.build(updated))
+        assert index.sync(updated) == 0
+
+        records = updated
+
+
+def test_update_matches_build():
+    rng = random.Random(12)
+    records = [synthetic_scheme(rng, i) for i in range(300)]
+    updated = edited(rng, records)
+
+    index = FacetIndex.build(records)
+    for ordinal in rng.sample(range(len(updated)), len(updated)):
+        index.update(ordinal, updated[ordinal])
+    assert_same_index(index, FacetIndex.build(updated))
+
+    selection = {"state": ["kerala", "*"], "occupation": ["fisherman"]}
+    assert np.array_equal(index.select(**selection), FacetIndex.build(updated).select(**selection))
+
+
+if __name__ == "__main__":
+    test_sync_matches_build()
+    test_update_matches_build()
+    print("✅ FacetIndex sync/update leave the same bitmaps as a fresh build")
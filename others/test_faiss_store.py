@@ -0,0 +1,68 @@
+# test_faiss_store.py
+#
+# Save → load round trip of agents/faiss_store.py for every index type
+# others/build_faiss.py builds (flat, ivf_flat, hnsw, ivf_pq), memory-mapped
+# and fully loaded: the loaded index answers queries exactly like the one
+# that was saved, and ids and build metadata survive. Needs no MongoDB.
+#
+#   python -m others.test_faiss_store
+
+import tempfile
+import faiss
+import numpy as np
+from agents.faiss_store import load_faiss_index, save_faiss_index
+
+DIM = 32
+N = 2000
+
+
+def build(index_type: str, embeddings: np.ndarray):
+    """The index shapes build_faiss.build_index produces, at test size."""
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(DIM)
+    elif index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(DIM), DIM, 16)
+    elif index_type == "ivf_pq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(DIM), DIM, 16, 8, 6)
+    else:
+        index = faiss.IndexHNSWFlat(DIM, 16)
+
+    if not index.is_trained:
+        index.train(embeddings)
+        index.nprobe = 4
+    index.add(embeddings)
+    return index
+
+
+def test_round_trip_every_index_type():
+    rng = np.random.default_rng(0)
+    embeddings = rng.random((N, DIM), dtype=np.float32)
+    queries = rng.random((20, DIM), dtype=np.float32)
+    ids = [f"SCHEME_{i:04d}" for i in range(N)]
+
+    for index_type in ("flat", "ivf_flat", "hnsw", "ivf_pq"):
+        index = build(index_type, embeddings)
+        expected_d, expected_i = index.search(queries, 10)
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            save_faiss_index(index_dir, "description", {"index": index, "ids": ids, "meta": {"index_type": index_type}})
+
+            for mmap in (True, False):
+                data = load_faiss_index(index_dir, "description", mmap=mmap)
+                assert data is not None, (index_type, mmap)
+                assert data["meta"] == {"index_type": index_type}
+                assert data["ids"].tolist() == ids
+                assert data["index"].ntotal == N
+
+                if index_type.startswith("ivf"):
+                    faiss.extract_index_ivf(data["index"]).nprobe = 4
+                distances, indices = data["index"].search(queries, 10)
+                assert np.array_equal(indices, expected_i), (index_type, mmap)
+                assert np.allclose(distances, expected_d), (index_type, mmap)
+
+                del data
+
+
+if __name__ == "__main__":
+    test_round_trip_every_index_type()
+    print("✅ flat, ivf_flat, hnsw and ivf_pq indexes load (mmap and in-memory) and search as saved")
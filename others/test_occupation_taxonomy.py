@@ -0,0 +1,109 @@
+# test_occupation_taxonomy.py
+#
+# Checks OccupationTaxonomy.detect (one Aho-Corasick pass) against a naive
+# scan that looks for every alias form as a whole-word substring: on the
+# real occupation_taxonomy.json and on a taxonomy of deliberately
+# overlapping aliases ("fish" / "fish farmer" / "farmer" / "farm worker").
+# Also checks that an edited taxonomy file is reloaded and that posting
+# lists built from the old version are recognized as stale. Needs no MongoDB.
+#
+#   python -m others.test_occupation_taxonomy
+
+import json
+import os
+import random
+import tempfile
+import time
+from agents.occupation_taxonomy import (
+    AhoCorasick,
+    OccupationPostings,
+    OccupationTaxonomy,
+    load_taxonomy,
+    normalize_phrase,
+)
+
+OVERLAPPING = {"occupations": {
+    "fish seller": {"aliases": ["fish", "fish vendor"]},
+    "fish farmer": {"aliases": ["fish farming", "aqua farmer"]},
+    "farmer": {"aliases": ["farm", "kisan"], "includes": ["farm worker"]},
+    "farm worker": {"aliases": ["farm labourer", "worker on farm"]},
+    "worker": {"aliases": ["labourer", "daily wage worker"]},
+    "a": {"aliases": ["a a", "a b a"]},
+}}
+
+# Filler that shares prefixes and suffixes with the aliases but is not a word match
+FILLER = [
+    "fishy", "selfish", "farmers'", "farmhouse", "workers'", "coworker", "kisans-", "ab", "aa",
+    "the", "for", "and", "-", ",", "(", ")", "scheme", "support", "FISH", "Farm-Worker",
+]
+
+
+def naive_detect(taxonomy: OccupationTaxonomy, text) -> set:
+    """Every alias form looked up as a space-delimited substring of the normalized text."""
+    padded = f" {normalize_phrase(text)} "
+    return {owner for form, owner in taxonomy.alias_owner.items() if f" {form} " in padded}
+
+
+def random_text(rng, words: list) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+
+
+def check_detect(taxonomy: OccupationTaxonomy, rng, n: int):
+    forms = list(taxonomy.alias_owner)
+    words = forms + [form.upper() for form in forms[:20]] + FILLER
+    for _ in range(n):
+        text = random_text(rng, words)
+        assert taxonomy.detect(text) == naive_detect(taxonomy, text), text
+
+
+def test_detect_matches_naive_scan():
+    rng = random.Random(3)
+    check_detect(OccupationTaxonomy(OVERLAPPING), rng, 3000)
+    check_detect(load_taxonomy(), rng, 3000)
+
+    taxonomy = OccupationTaxonomy(OVERLAPPING)
+    # Word boundaries: prefixes, suffixes and embedded aliases do not count
+    assert taxonomy.detect("selfish farmhouse coworkers") == set()
+    # Overlapping and nested aliases (and plurals) are all reported
+    assert taxonomy.detect("Fish-farming for farm workers") == {
+        "fish seller", "fish farmer", "farmer", "farm worker", "worker"
+    }
+    assert taxonomy.detect("a b a a") == {"a"}
+
+
+def test_automaton_matches_substring_search():
+    rng = random.Random(4)
+    for _ in range(300):
+        patterns = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))}
+        automaton = AhoCorasick({p: p for p in patterns})
+        for _ in range(20):
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 20)))
+            assert automaton.find(text) == {p for p in patterns if p in text}, (patterns, text)
+
+
+def test_edited_taxonomy_is_reloaded():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "occupation_taxonomy.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"occupations": {"farmer": {"aliases": ["cultivator"]}}}, f)
+        before = load_taxonomy(path)
+        assert load_taxonomy(path) is before
+        postings = OccupationPostings.build([{"_id": "S1", "occupation": "kisan"}], before)
+        assert postings.matches(before) and postings.postings == {}
+
+        # A different size, so the version changes even on coarse mtime clocks
+        time.sleep(0.01)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"occupations": {"farmer": {"aliases": ["cultivator", "kisan"]}}}, f)
+        after = load_taxonomy(path)
+        assert after is not before
+        assert "kisan" in after.aliases("farmer") and "kisan" not in before.aliases("farmer")
+        assert not postings.matches(after)
+        assert OccupationPostings.build([{"_id": "S1", "occupation": "kisan"}], after).postings == {"farmer": ["S1"]}
+
+
+if __name__ == "__main__":
+    test_detect_matches_naive_scan()
+    test_automaton_matches_substring_search()
+    test_edited_taxonomy_is_reloaded()
+    print("✅ Taxonomy detection matches a naive whole-word scan; edited taxonomies reload")
@@ -0,0 +1,38 @@
+# test_profile_percolator.py
+#
+# Checks ProfilePercolator reverse matching against CompiledRules.passes:
+# for every scheme in precomputed_rules_new.json (and the multi-clause
+# rules in eligibility_fixtures, and limits extracted as strings), the
+# users it returns are exactly the stored profiles that pass the scheme's
+# rules. Needs no Postgres. Timings: others/bench_profile_percolator.py.
+#
+#   python -m others.test_profile_percolator
+
+from agents.eligibility_engine import normalize_user
+from agents.eligibility_rules import compile_all
+from agents.profile_percolator import ProfilePercolator
+from others.eligibility_fixtures import DNF_RULES, RULES, profiles
+
+# Limits an LLM extraction may leave as strings: numbers are parsed, the rest is no limit
+STRING_LIMIT_RULES = {
+    "STR_1": {"max_age": "40"},
+    "STR_2": {"min_age": "18", "max_income": "10,000"},
+    "STR_3": {"min_age": "eighteen", "max_age": "60.5", "max_income": ""},
+    "STR_4": {"clauses": [{"min_age": " 60 "}, {"max_age": "17", "max_income": "nan"}]},
+}
+
+
+def test_percolator_matches_predicates():
+    users = [(1000 + i, p) for i, p in enumerate(profiles(3000, seed=4))]
+    percolator = ProfilePercolator.build(users)
+    normalized = [(user_id, normalize_user(p)) for user_id, p in users]
+
+    compiled = compile_all({**RULES, **DNF_RULES, **STRING_LIMIT_RULES})
+    for scheme_id, predicate in compiled.items():
+        expected = [user_id for user_id, user in normalized if predicate.passes(user)]
+        assert percolator.match(predicate) == expected, scheme_id
+
+
+if __name__ == "__main__":
+    test_percolator_matches_predicates()
+    print("✅ Percolated users identical to CompiledRules.passes for every scheme")
@@ -0,0 +1,139 @@
+# test_rerank_equivalence.py
+#
+# Checks the vectorized rerank (PolicyRetrieverAgent._rerank_candidates)
+# against the per-scheme scalar scorer it replaced: same schemes, same
+# order, bit-identical scores. Needs no MongoDB or FAISS index.
+#
+#   python -m others.test_rerank_equivalence
+
+import json
+import os
+import numpy as np
+from agents.policy_retriever_agent import PolicyRetrieverAgent
+from agents.scheme_features import SchemeFeatureStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = [
+    {"occupation": "Fisherman", "state": "Puducherry", "gender": "Female", "monthly_income": 8000},
+    {"occupation": "farmer", "state": "Kerala", "gender": "Male", "monthly_income": 20000},
+    {"occupation": "Student", "state": "Tamil Nadu", "gender": "Female", "monthly_income": 0},
+    {"occupation": "weaver", "state": "Nowhere", "gender": "male", "monthly_income": "1,000"},
+    {"occupation": "", "state": "", "gender": "", "monthly_income": None},
+]
+QUERIES = ["schemes for fishermen", "pension for widows", "education loan", "", "zzz"]
+TOP_KS = (1, 3, 10, 25, 200)
+
+
+def legacy_rerank(agent, candidate_docs, semantic_scores, state_set, occupation_set, ctx, top_k):
+    """The scalar scorer: one Python pass per candidate scheme."""
+    candidate_features = [agent.scheme_features.get(scheme) for scheme in candidate_docs]
+    agent._intern_profile_context(ctx)
+
+    reranked = []
+    for scheme, features in zip(candidate_docs, candidate_features):
+        scheme_id = scheme.get("_id")
+        if scheme_id not in semantic_scores:
+            continue
+
+        semantic = float(semantic_scores[scheme_id])
+        query_overlap, occ_overlap = agent._lexical_overlaps(features, ctx)
+        profile_signals = agent._profile_signal_scores(features, ctx)
+
+        state_boost = 0.10 if scheme_id in state_set else 0.0
+        occupation_candidate_boost = 0.22 if scheme_id in occupation_set else 0.0
+        occupation_boost = 0.12 if profile_signals["occupation_exact"] else 0.0
+        explicit_state_boost = 0.08 if profile_signals["state_exact"] else 0.0
+
+        lexical_boost = (0.20 * query_overlap) + (0.20 * occ_overlap)
+
+        final_score = (
+            (0.60 * semantic)
+            + lexical_boost
+            + (0.55 * profile_signals["profile_score"])
+            + state_boost
+            + occupation_candidate_boost
+            + occupation_boost
+            + explicit_state_boost
+        )
+
+        reranked.append({
+            "scheme": scheme,
+            "score": final_score,
+            "semantic": semantic,
+            "query_overlap": query_overlap,
+            "occupation_overlap": occ_overlap,
+            "profile_score": profile_signals["profile_score"],
+            "occupation_exact": profile_signals["occupation_exact"],
+            "state_exact": profile_signals["state_exact"],
+        })
+
+    reranked.sort(key=lambda x: x["score"], reverse=True)
+
+    strongly_profiled = [
+        r for r in reranked
+        if (r["occupation_exact"] > 0 or r["profile_score"] >= 0.35 or r["state_exact"] > 0)
+    ]
+
+    if len(strongly_profiled) >= max(3, top_k // 2):
+        return strongly_profiled[:top_k]
+    return reranked[:top_k]
+
+
+def load_schemes():
+    with open(os.path.join(ROOT, "precomputed_rules_new.json"), "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    return [{"_id": scheme_id, "scheme_name": rule.get("category"), **rule} for scheme_id, rule in rules.items()]
+
+
+def run_case(agent, schemes, rng, query, profile, top_k):
+    n = len(schemes)
+
+    # Sparse semantic scores with deliberate ties
+    semantic = np.zeros(n)
+    hits = rng.choice(n, size=min(n, 200), replace=False)
+    semantic[hits] = np.round(rng.random(len(hits)), 2)
+
+    semantic_hits = np.flatnonzero(semantic)
+    pool = sorted(semantic_hits, key=lambda o: semantic[o], reverse=True)[: max(top_k * 15, 120)]
+    candidate_docs = [schemes[o] for o in pool]
+    semantic_scores = {agent.scheme_ids[o]: float(semantic[o]) for o in semantic_hits}
+
+    state_ordinals = rng.choice(n, size=n // 3, replace=False)
+    occupation_ordinals = rng.choice(n, size=n // 5, replace=False)
+
+    expected = legacy_rerank(
+        agent, candidate_docs, semantic_scores,
+        {agent.scheme_ids[o] for o in state_ordinals},
+        {agent.scheme_ids[o] for o in occupation_ordinals},
+        agent._profile_context(query, profile), top_k,
+    )
+    actual = agent._rerank_candidates(
+        candidate_docs, semantic,
+        agent.ordinal_mask(state_ordinals), agent.ordinal_mask(occupation_ordinals),
+        agent._profile_context(query, profile), top_k,
+    )
+
+    assert len(actual) == len(expected), (query, profile, top_k)
+    for a, e in zip(actual, expected):
+        assert a["scheme"]["_id"] == e["scheme"]["_id"], (query, profile, top_k)
+        for key in ("score", "semantic", "query_overlap", "occupation_overlap",
+                    "profile_score", "occupation_exact", "state_exact"):
+            assert a[key] == e[key], (key, a[key], e[key])
+
+
+def test_rerank_equivalence():
+    schemes = load_schemes()
+    agent = PolicyRetrieverAgent({}, llm=None, scheme_features=SchemeFeatureStore.build(schemes))
+    agent._build_ordinal_space([s["_id"] for s in schemes])
+
+    rng = np.random.default_rng(7)
+    for query in QUERIES:
+        for profile in PROFILES:
+            for top_k in TOP_KS:
+                run_case(agent, schemes, rng, query, profile, top_k)
+
+
+if __name__ == "__main__":
+    test_rerank_equivalence()
+    print(f"✅ Vectorized rerank matches the scalar scorer on {len(QUERIES) * len(PROFILES) * len(TOP_KS)} cases")